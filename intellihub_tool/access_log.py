@@ -0,0 +1,299 @@
+"""
+Structured, non-blocking access log of tool calls.
+
+The request path only builds a small dict and puts a record on an in-memory
+queue (logging.handlers.QueueHandler). A QueueListener thread does everything
+that costs something: measuring the result, JSON encoding and writing to a
+size-rotated file. High-volume tools can be sampled; calls that fail are always
+logged, and every record carries the sample rate it was kept at.
+
+CallRecorder uses the same pipeline to capture every call with its arguments
+(server.py --record) for scripts/replay.py.
+
+One JSON object per line::
+
+    {"ts": "2026-10-18T22:41:07.512Z", "tool": "search", "status": "ok",
+     "session": "7f3a9c10", "client": "addr:127.0.0.1", "wait_ms": 0.04,
+     "latency_ms": 4.21, "error": null, "sample_rate": 1.0, "result_bytes": 1830}
+"""
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+DEFAULT_ACCESS_LOG = {
+    "path": str(BASE_DIR / "logs" / "access.jsonl"),
+    "max_bytes": 10 * 1024 * 1024,
+    "backup_count": 5,
+    # tool name (or "*") -> fraction of successful calls to keep
+    "sample": {},
+}
+
+LOGGER_NAME = "intellihub.access"
+
+
+def parse_access_log(value):
+    """
+    Merge an "access_log" config value over DEFAULT_ACCESS_LOG.
+
+    The log is opt-in: nothing is written unless the config asks for it.
+
+    Args:
+        value: None or False for no log, True for the defaults, or a dict
+            overriding path, max_bytes, backup_count and/or sample
+
+    Returns:
+        The effective settings, or None when logging is disabled
+
+    Raises:
+        ValueError: If the value is malformed
+    """
+    if value is None or value is False:
+        return None
+    settings = copy.deepcopy(DEFAULT_ACCESS_LOG)
+    if value is True:
+        return settings
+    if not isinstance(value, dict):
+        raise ValueError("access_log must be true, false or an object")
+    for key, override in value.items():
+        if key == "path":
+            if not isinstance(override, str) or not override:
+                raise ValueError("access_log.path must be a non-empty string")
+            # Relative paths are relative to intellihub_tool/, like the default.
+            settings["path"] = str(BASE_DIR / override)
+        elif key in ("max_bytes", "backup_count"):
+            if not isinstance(override, int) or override < 0:
+                raise ValueError(f"access_log.{key} must be an integer >= 0")
+            settings[key] = override
+        elif key == "sample":
+            if not isinstance(override, dict) or not all(
+                isinstance(rate, (int, float)) and 0 <= rate <= 1 for rate in override.values()
+            ):
+                raise ValueError("access_log.sample must map tool names to rates between 0 and 1")
+            settings["sample"] = {tool: float(rate) for tool, rate in override.items()}
+        else:
+            raise ValueError(f"Unknown access_log entry '{key}'")
+    return settings
+
+
+def _result_bytes(result):
+    if result is None:
+        return 0
+    if isinstance(result, str):
+        # The server passes the encoded text it sent
+        return len(result) if result.isascii() else len(result.encode("utf-8"))
+    try:
+        return len(json.dumps(result, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return None
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats access records as JSON lines; runs on the listener thread.
+
+    A record is encoded once: RotatingFileHandler formats it to decide on
+    rollover and again to write it, and the second call reuses the line.
+    """
+
+    def format(self, record):
+        line = getattr(record, "line", None)
+        if line is not None:
+            return line
+        fields = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            **record.access,
+        }
+        # The result object rides along so it is measured here, not in the
+        # request path.
+        fields["result_bytes"] = _result_bytes(fields.pop("result", None))
+        record.line = json.dumps(fields, separators=(",", ":"))
+        return record.line
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Access records carry no args or exc_info, so the usual copy and
+        # pre-formatting in the caller's thread is wasted work.
+        return record
+
+
+class _QueuedLog:
+    """JSON-lines file fed through a queue and written by a listener thread."""
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self._listener = None
+        self._lock = threading.Lock()
+        # Records go straight to the handler: no logger lookup, level checks
+        # or caller-frame search, and root-logger configuration cannot
+        # reroute them.
+        self._handler = _QueueHandler(self._queue)
+        atexit.register(self.close)
+
+    def _start_listener(self, path, max_bytes=0, backup_count=0):
+        """Open path (max_bytes 0: never rotate); return the path actually used."""
+        if int(os.environ.get("INTELLIHUB_WORKERS", "1")) > 1:
+            # Rotation is not safe across processes; one file per worker.
+            root, ext = os.path.splitext(path)
+            path = f"{root}-{os.getpid()}{ext}"
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        handler.setFormatter(JsonFormatter())
+        self._listener = logging.handlers.QueueListener(self._queue, handler)
+        self._listener.start()
+        return path
+
+    def _stop_listener(self):
+        if self._listener is not None:
+            # Drains the queue before returning.
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                handler.close()
+            self._listener = None
+
+    def _emit(self, fields):
+        record = logging.LogRecord(LOGGER_NAME, logging.INFO, __file__, 0, "tool_call", None, None)
+        record.access = fields
+        self._handler.handle(record)
+
+    def flush(self):
+        """Write out everything queued so far (restarts the listener)."""
+        with self._lock:
+            if self._listener is not None:
+                self._listener.stop()
+                self._listener.start()
+
+    def close(self):
+        with self._lock:
+            self._stop_listener()
+
+
+class AccessLog(_QueuedLog):
+    """Queue-backed access log; configure() (re)opens the file side."""
+
+    def __init__(self):
+        super().__init__()
+        self.settings = None
+        self.records = 0
+        self.sampled_out = 0
+        self._raw = object()
+
+    def configure(self, value):
+        """
+        Apply an "access_log" config value (see parse_access_log).
+
+        Cheap when nothing changed, so it can run on every call.
+
+        Raises:
+            ValueError: If the value is malformed
+        """
+        if value == self._raw:
+            return
+        settings = parse_access_log(value)
+        with self._lock:
+            if value == self._raw:
+                return
+            self._stop_listener()
+            if settings is not None:
+                self._start_listener(settings["path"], settings["max_bytes"], settings["backup_count"])
+            self.settings = settings
+            self._raw = copy.deepcopy(value)
+
+    def record(self, tool, status, **fields):
+        """
+        Log one tool call (request path: a sampling check and a queue put).
+
+        Args:
+            tool: Tool name
+            status: "ok", or how the call failed ("error", "rejected",
+                "timeout", "cancelled"); failures are never sampled out
+            **fields: session, client, wait_ms, latency_ms, result (the
+                encoded text sent, or a result object; measured on the
+                listener thread), error
+        """
+        settings = self.settings
+        if settings is None:
+            return
+        rate = 1.0
+        if status == "ok":
+            sample = settings["sample"]
+            rate = sample.get(tool, sample.get("*", 1.0))
+            if rate < 1.0 and random.random() >= rate:
+                self.sampled_out += 1
+                return
+        self.records += 1
+        self._emit({"tool": tool, "status": status, **fields, "sample_rate": rate})
+
+    def stats(self):
+        return {
+            "enabled": self.settings is not None,
+            "path": self.settings["path"] if self.settings else None,
+            "records": self.records,
+            "sampled_out": self.sampled_out,
+        }
+
+
+class CallRecorder(_QueuedLog):
+    """
+    Records every tools/call with its arguments, for scripts/replay.py.
+
+    Unlike the access log nothing is sampled, and each record carries "t",
+    the seconds since recording started at which the call arrived, so a
+    replay can reproduce the original pacing.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.path = None
+        self.records = 0
+        self._started = None
+
+    @property
+    def active(self):
+        return self._started is not None
+
+    def start(self, path):
+        """Start appending to path (one file per worker with --workers > 1)."""
+        with self._lock:
+            self._stop_listener()
+            self.path = self._start_listener(os.path.abspath(path))
+            self._started = time.perf_counter()
+
+    def stop(self):
+        with self._lock:
+            self._stop_listener()
+            self._started = None
+
+    def record(self, received, tool, arguments, **fields):
+        """
+        Record one call.
+
+        Args:
+            received: time.perf_counter() when the call arrived
+            tool: Tool name
+            arguments: Call arguments, as sent by the client
+            **fields: session, status, latency_ms, result (the encoded text
+                sent, measured on the listener thread)
+        """
+        started = self._started
+        if started is None:
+            return
+        self.records += 1
+        self._emit({"t": round(received - started, 6), "tool": tool, "arguments": arguments, **fields})
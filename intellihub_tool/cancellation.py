@@ -0,0 +1,77 @@
+"""
+Cooperative cancellation and deadlines for tool calls.
+
+Python threads cannot be interrupted, so a tool running under
+asyncio.to_thread() keeps scanning after its client has gone away. Instead the
+server gives each call a CancelToken; the scan loops in tool.py and roots.py
+call check_cancelled() once per file, which raises OperationCancelled as soon
+as the token is cancelled or its deadline passes.
+
+The token travels in a context variable. asyncio.to_thread() copies the
+caller's context into the worker thread, so tool functions need no extra
+argument, and outside the server (CLI, tests) check_cancelled() is a no-op.
+"""
+import contextlib
+import contextvars
+import threading
+import time
+
+
+class OperationCancelled(BaseException):
+    """
+    A tool call was cancelled or ran past its deadline.
+
+    Derived from BaseException, like asyncio.CancelledError, so the
+    ``except Exception`` blocks that make diagnose() resilient do not swallow
+    it.
+    """
+
+
+class CancelToken:
+    """Cancellation flag with an optional deadline, shared with a worker thread."""
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.reason = None
+        self._event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self, reason="cancelled"):
+        """Ask the call to stop at its next check (the first reason wins)."""
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def check(self):
+        """
+        Raises:
+            OperationCancelled: If the token was cancelled or the deadline passed
+        """
+        if not self._event.is_set() and self.deadline is not None and time.monotonic() > self.deadline:
+            self.cancel(f"deadline of {self.timeout:g} s exceeded")
+        if self._event.is_set():
+            raise OperationCancelled(self.reason)
+
+
+_current = contextvars.ContextVar("intellihub_cancel_token", default=None)
+
+
+def check_cancelled():
+    """Raise OperationCancelled if the current call should stop; cheap otherwise."""
+    token = _current.get()
+    if token is not None:
+        token.check()
+
+
+@contextlib.contextmanager
+def cancel_scope(token):
+    """Make token the current one for the block (and threads started from it)."""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
@@ -1,22 +1,76 @@
 import argparse
+import base64
 import json
+import os
+import shlex
+import sys
 import tool
+import daemon
 from utils import format_diagnostic_report
 
-def main():
-    parser = argparse.ArgumentParser(description="IntelliHub MCP Tool CLI")
+
+class CommandError(ValueError):
+    """A batch or daemon command line that could not be parsed."""
+
+
+class _CommandParser(argparse.ArgumentParser):
+    """ArgumentParser that raises CommandError instead of printing and exiting."""
+
+    def error(self, message):
+        raise CommandError(f"{self.prog}: error: {message}")
+
+    def print_help(self, file=None):
+        raise CommandError(self.format_help())
+
+
+def build_parser(parser_class=argparse.ArgumentParser):
+    parser = parser_class(description="IntelliHub MCP Tool CLI")
+    parser.add_argument("--root", default=None, help="Knowledge root to use (default root if omitted)")
+    parser.add_argument("--no-daemon", action="store_true",
+                        help="Run in this process even if a daemon is listening")
     sub = parser.add_subparsers(dest="command")
 
     # list_files
-    sub.add_parser("list", help="List all files in ai_context")
+    ls = sub.add_parser("list", help="List all files in ai_context")
+    ls.add_argument("--sizes", action="store_true", help="Show bytes and estimated tokens")
+    ls.add_argument("--filter", action="append", default=[], metavar="KEY=VALUE",
+                    help="Only files whose front matter matches (repeatable)")
 
     # read_file
     read = sub.add_parser("read", help="Read a file by relative path")
     read.add_argument("path", type=str)
+    read.add_argument("--max-tokens", type=int, default=None)
+
+    # get_section
+    section = sub.add_parser("section", help="Read one section of a file by heading")
+    section.add_argument("path", type=str)
+    section.add_argument("heading", type=str)
+    section.add_argument("--max-tokens", type=int, default=None)
 
     # search
     search = sub.add_parser("search", help="Search for a term")
     search.add_argument("query", type=str)
+    search.add_argument("--filter", action="append", default=[], metavar="KEY=VALUE",
+                        help="Only search files whose front matter matches (repeatable)")
+    search.add_argument("--context", "-C", type=int, default=0, metavar="LINES",
+                        help="Lines of context around each match (0-20)")
+    search.add_argument("--highlight", action="store_true",
+                        help="Include the offsets of each match")
+
+    # similar
+    sim = sub.add_parser("similar", help="Find passages similar to a query or file")
+    sim.add_argument("query_or_path", type=str)
+    sim.add_argument("--top-k", type=int, default=5)
+
+    # suggest
+    sug = sub.add_parser("suggest", help="Autocomplete a search term")
+    sug.add_argument("prefix", type=str)
+    sug.add_argument("--limit", type=int, default=10)
+
+    # related
+    rel = sub.add_parser("related", help="List files linked to or from a file")
+    rel.add_argument("path", type=str)
+    rel.add_argument("--depth", type=int, default=1)
 
     # get_schema
     schema = sub.add_parser("schema", help="Get a schema by name")
@@ -29,30 +83,194 @@ def main():
     # diagnose
     sub.add_parser("diagnose", help="Run a full diagnostic report")
 
-    args = parser.parse_args()
+    # list_roots
+    sub.add_parser("roots", help="List configured knowledge roots")
+
+    # export_snapshot
+    exp = sub.add_parser("export", help="Write the capsule (or changes since a manifest) as a .tar.gz")
+    exp.add_argument("--since", default=None, metavar="MANIFEST_HASH",
+                     help="Only files changed since this export")
+    exp.add_argument("--output", "-o", default=None,
+                     help="Archive path (default: <root>-<hash>.tar.gz in the current directory)")
+
+    # daemon
+    dmn = sub.add_parser("daemon", help="Keep the index warm and serve CLI calls on a local socket")
+    dmn.add_argument("--stop", action="store_true", help="Stop the running daemon")
+    dmn.add_argument("--socket", default=None,
+                     help="Socket path (default: per-checkout socket in $XDG_RUNTIME_DIR or a private "
+                          "per-user temp directory); clients only find another path through INTELLIHUB_SOCKET")
+
+    # batch
+    sub.add_parser("batch", help="Run one command per stdin line, writing JSON lines")
+
+    return parser
+
+
+# Commands that run tools (and can be sent to the daemon or batched)
+TOOL_COMMANDS = {
+    "list", "read", "section", "search", "similar", "suggest",
+    "related", "schema", "module", "diagnose", "roots", "export",
+}
 
+
+def execute(args):
+    """Run a parsed tool command and return the tool's (JSON-serializable) result."""
     if args.command == "list":
-        print("\n".join(tool.list_files()))
+        return tool.list_files(args.root, sizes=args.sizes, filters=args.filter)
+    if args.command == "read":
+        return tool.read_file(args.path, args.root, args.max_tokens)
+    if args.command == "section":
+        return tool.get_section(args.path, args.heading, args.root, args.max_tokens)
+    if args.command == "search":
+        return tool.search(args.query, args.root, args.filter, args.context, args.highlight)
+    if args.command == "similar":
+        return tool.similar(args.query_or_path, args.top_k, args.root)
+    if args.command == "suggest":
+        return tool.suggest(args.prefix, args.limit, args.root)
+    if args.command == "related":
+        return tool.related(args.path, args.depth, args.root)
+    if args.command == "schema":
+        return tool.get_schema(args.name, args.root)
+    if args.command == "module":
+        return tool.get_module_purpose(args.name, args.root)
+    if args.command == "diagnose":
+        return tool.diagnose(args.root)
+    if args.command == "roots":
+        return tool.list_roots()
+    if args.command == "export":
+        return tool.export_snapshot(args.root, args.since)
+    raise CommandError(f"Not a tool command: {args.command}")
+
 
-    elif args.command == "read":
-        print(tool.read_file(args.path))
+def render(args, result):
+    """Format a command's result the way the CLI prints it."""
+    if args.command == "list":
+        if args.sizes:
+            return "\n".join(f"{e['path']}\t{e['bytes']}\t{e['tokens']}" for e in result)
+        return "\n".join(result)
+    if args.command == "diagnose":
+        return format_diagnostic_report(result)
+    if args.command == "export":
+        result = {key: value for key, value in result.items() if key != "archive"}
+    if isinstance(result, str):
+        return result
+    return json.dumps(result, indent=2)
 
-    elif args.command == "search":
-        results = tool.search(args.query)
-        print(json.dumps(results, indent=2))
 
-    elif args.command == "schema":
-        print(tool.get_schema(args.name))
+def save_export(args, result):
+    """Write an export command's archive to disk and record where in the result."""
+    if args.command != "export":
+        return
+    path = args.output
+    if path is None:
+        suffix = "" if result["full"] else "-delta"
+        path = f"{result['root']}-{result['manifest_hash'][:12]}{suffix}.tar.gz"
+    with open(path, "wb") as f:
+        f.write(base64.b64decode(result["archive"]))
+    result["output"] = path
 
-    elif args.command == "module":
-        print(tool.get_module_purpose(args.name))
 
-    elif args.command == "diagnose":
-        report = tool.diagnose()
-        print(format_diagnostic_report(report))
+def execute_argv(argv):
+    """Parse and run one command line without exiting on errors (batch and daemon)."""
+    args = build_parser(_CommandParser).parse_args(argv)
+    if args.command not in TOOL_COMMANDS:
+        raise CommandError(f"Only tool commands can be run here: {' '.join(sorted(TOOL_COMMANDS))}")
+    return execute(args)
 
-    else:
+
+def _listening(args, path):
+    message = f"IntelliHub daemon listening on {path}"
+    if args.socket and os.environ.get("INTELLIHUB_SOCKET") != args.socket:
+        # Clients resolve the default path; tell them where this one is.
+        message += f" (set INTELLIHUB_SOCKET={path} for clients to use it)"
+    return message
+
+
+def run_daemon(args):
+    if args.stop:
+        if daemon.stop(args.socket):
+            print("IntelliHub daemon stopped", file=sys.stderr)
+        else:
+            print("No IntelliHub daemon is running", file=sys.stderr)
+        return
+    tool.start_indexing()
+    try:
+        daemon.serve(
+            execute_argv,
+            args.socket,
+            ready=lambda path: print(_listening(args, path), file=sys.stderr, flush=True),
+        )
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as e:
+        sys.exit(str(e))
+
+
+def run_batch(args, lines=None, out=None):
+    """
+    Run one command per line (shell-style quoting), writing one JSON line each.
+
+    Blank lines and lines starting with # are skipped. The batch's --root
+    applies to every line that does not give its own.
+    """
+    lines = sys.stdin if lines is None else lines
+    out = sys.stdout if out is None else out
+    prefix = ["--root", args.root] if args.root else []
+
+    client = None if args.no_daemon else daemon.DaemonClient.connect()
+    if client is None:
+        tool.start_indexing()
+    try:
+        for number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = {"line": number}
+            try:
+                argv = prefix + shlex.split(line)
+                if client is not None:
+                    result = client.request(argv)
+                else:
+                    result = execute_argv(argv)
+                entry.update(ok=True, result=result)
+            except daemon.DaemonError as e:
+                entry.update(ok=False, error=str(e), type=e.type_name)
+            except Exception as e:
+                entry.update(ok=False, error=str(e), type=type(e).__name__)
+            out.write(json.dumps(entry) + "\n")
+            out.flush()
+    finally:
+        if client is not None:
+            client.close()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == "daemon":
+        run_daemon(args)
+        return
+    if args.command == "batch":
+        run_batch(args)
+        return
+    if args.command is None:
         parser.print_help()
+        return
+
+    client = None if args.no_daemon else daemon.DaemonClient.connect()
+    if client is None:
+        result = execute(args)
+    else:
+        try:
+            result = client.request(argv)
+        except daemon.DaemonError as e:
+            sys.exit(f"{e.type_name}: {e}")
+        finally:
+            client.close()
+    save_export(args, result)
+    print(render(args, result))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,263 @@
+"""
+Local daemon that keeps the CLI's index and caches warm between invocations.
+
+``cli.py daemon`` starts the knowledge roots once and answers commands on a
+Unix socket; ordinary ``cli.py`` calls (and ``cli.py batch``) find the socket
+and send their arguments there instead of starting over. The protocol is one
+JSON object per line in each direction:
+
+    -> {"argv": ["search", "lumen"]}
+    <- {"ok": true, "result": [...]}
+    <- {"ok": false, "error": "...", "type": "FileNotFoundError"}
+
+The socket lives in $XDG_RUNTIME_DIR, or else in a private (0700)
+per-user directory under the temp directory, and a client only talks to a
+daemon running as its own user.
+
+Unix sockets only; where AF_UNIX is unavailable the CLI always runs locally.
+"""
+import hashlib
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+from pathlib import Path
+
+CONFIG_PATH = Path(__file__).resolve().parent / "config" / "paths.json"
+
+# Seconds a client waits to connect before falling back to running locally
+CONNECT_TIMEOUT = 0.5
+
+SUPPORTED = hasattr(socket, "AF_UNIX")
+
+
+def _uid():
+    return os.getuid() if hasattr(os, "getuid") else None
+
+
+def _runtime_dir():
+    """
+    $XDG_RUNTIME_DIR, else tempdir/intellihub-<uid>, created owner-only.
+
+    Raises:
+        RuntimeError: If the per-user directory exists but belongs to someone
+            else or is open to other users
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and os.path.isdir(runtime):
+        return runtime
+    uid = _uid()
+    directory = os.path.join(tempfile.gettempdir(), f"intellihub-{uid or 0}")
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    st = os.lstat(directory)
+    if not stat.S_ISDIR(st.st_mode) or (uid is not None and st.st_uid != uid) or st.st_mode & 0o077:
+        raise RuntimeError(f"{directory} is not a private directory of this user; refusing to use it")
+    return directory
+
+
+def socket_path():
+    """
+    Socket of the daemon serving this checkout's config/paths.json.
+
+    Override with the INTELLIHUB_SOCKET environment variable.
+
+    Raises:
+        RuntimeError: If the per-user socket directory is not private
+    """
+    override = os.environ.get("INTELLIHUB_SOCKET")
+    if override:
+        return override
+    digest = hashlib.sha1(str(CONFIG_PATH).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(_runtime_dir(), f"intellihub-{digest}.sock")
+
+
+def _owned(path):
+    """True when path belongs to this user."""
+    uid = _uid()
+    try:
+        return uid is None or os.lstat(path).st_uid == uid
+    except OSError:
+        return False
+
+
+def _trusted(sock, path):
+    """True when the daemon behind a connected socket runs as this user."""
+    uid = _uid()
+    if uid is None:
+        return True
+    if hasattr(socket, "SO_PEERCRED"):
+        # The peer process's credentials: cannot be faked by whoever owns the file.
+        credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", credentials)[1] == uid
+    return _owned(path)
+
+
+class DaemonError(Exception):
+    """A command failed inside the daemon; carries the original exception type name."""
+
+    def __init__(self, message, type_name):
+        super().__init__(message)
+        self.type_name = type_name
+
+
+class DaemonClient:
+    """Connection to a running daemon; one command per request() call."""
+
+    def __init__(self, sock):
+        self._sock = sock
+        self._reader = sock.makefile("r", encoding="utf-8")
+
+    @classmethod
+    def connect(cls, path=None):
+        """
+        Return a client, or None when no daemon of this user is listening.
+
+        A socket served by another user is never used, so nobody else can
+        answer this user's commands.
+        """
+        if not SUPPORTED:
+            return None
+        try:
+            path = path or socket_path()
+        except RuntimeError:
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(path)
+            if not _trusted(sock, path):
+                sock.close()
+                return None
+        except OSError:
+            sock.close()
+            return None
+        sock.settimeout(None)
+        return cls(sock)
+
+    def send(self, message):
+        self._sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("IntelliHub daemon closed the connection")
+        return json.loads(line)
+
+    def request(self, argv):
+        """
+        Run a CLI command in the daemon and return its result.
+
+        Raises:
+            DaemonError: If the command raised inside the daemon
+        """
+        reply = self.send({"argv": argv})
+        if not reply["ok"]:
+            raise DaemonError(reply["error"], reply.get("type", "Error"))
+        return reply["result"]
+
+    def close(self):
+        self._reader.close()
+        self._sock.close()
+
+
+def stop(path=None):
+    """Ask the daemon to shut down; return False if none was listening."""
+    client = DaemonClient.connect(path)
+    if client is None:
+        return False
+    try:
+        client.send({"shutdown": True})
+    finally:
+        client.close()
+    return True
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                reply = {"ok": False, "error": "Invalid JSON request", "type": "ValueError"}
+            else:
+                if message.get("shutdown"):
+                    self._write({"ok": True, "result": None})
+                    self.server.shutdown_requested()
+                    return
+                reply = self.server.run(message.get("argv", []))
+            self._write(reply)
+
+    def _write(self, reply):
+        self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+
+if SUPPORTED:
+
+    class _Server(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, path, execute):
+            self._execute = execute
+            # Owner-only socket: it exposes the whole capsule.
+            umask = os.umask(0o077)
+            try:
+                super().__init__(path, _Handler)
+            finally:
+                os.umask(umask)
+
+        def run(self, argv):
+            try:
+                return {"ok": True, "result": self._execute(argv)}
+            except Exception as e:
+                return {"ok": False, "error": str(e), "type": type(e).__name__}
+
+        def shutdown_requested(self):
+            # shutdown() blocks until serve_forever() returns, so not on
+            # the handler thread that serve_forever() is waiting for.
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+
+def serve(execute, path=None, ready=None):
+    """
+    Answer commands on the daemon socket until asked to shut down.
+
+    Args:
+        execute: Callable taking an argv list and returning a JSON-serializable
+            result (exceptions are reported to the client)
+        path: Socket path (socket_path() if omitted)
+        ready: Optional callable invoked with the path once listening
+
+    Raises:
+        RuntimeError: If Unix sockets are unsupported, a daemon is already
+            listening on the path, or the path belongs to another user
+    """
+    if not SUPPORTED:
+        raise RuntimeError("The CLI daemon needs Unix domain sockets, which this platform lacks")
+    path = path or socket_path()
+    client = DaemonClient.connect(path)
+    if client is not None:
+        client.close()
+        raise RuntimeError(f"An IntelliHub daemon is already listening on {path}")
+    if os.path.lexists(path):
+        if not _owned(path):
+            raise RuntimeError(f"{path} belongs to another user; refusing to replace it")
+        # Left behind by a daemon that did not exit cleanly.
+        os.unlink(path)
+
+    server = _Server(path, execute)
+    try:
+        if ready is not None:
+            ready(path)
+        server.serve_forever()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
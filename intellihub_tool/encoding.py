@@ -0,0 +1,335 @@
+"""
+Compact wire encoding of tool results.
+
+Text results are sent as they are. Anything else is serialized once, as
+compact JSON (no indentation, UTF-8 kept as is) in a single text block::
+
+    {"result": ...}
+
+The MCP SDK's default for a dict return would send the value twice, as
+structuredContent and again as an indented JSON string.
+
+Lists of objects that share their keys (search hits, list_files with sizes,
+similar passages, ...) are sent as a table: the keys once in "columns", one
+array per item in "rows", and string columns whose values mostly repeat (the
+"file" of search hits) replaced by indices into "strings"::
+
+    {"result": {"columns": ["file", "line", "snippet"],
+                "rows": [[0, 3, "The Lumen rises."], [0, 8, "Lumen again."]],
+                "strings": {"file": ["lore/lore_core.md"]}}}
+
+A list result whose encoding is larger than max_bytes is sent in pages. Each
+page is a complete result of its own, with the item count of the whole list
+and, except on the last page, a cursor::
+
+    {"result": {...}, "total": 5120, "next_cursor": "2048-5f0c3a9e41b27d86"}
+
+Calling the tool again with the same arguments plus "cursor" returns the next
+page. Cursors are stateless (an offset and a digest of the call and its full
+result), so any server worker can continue them. The full result is held for
+a few minutes so that later pages do not rerun the tool; once it is gone the
+tool runs again, and a cursor whose result has changed since is rejected.
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_RESULT_ENCODING = {
+    # "columnar" sends lists of objects as tables; "rows" keeps the objects
+    "layout": "columnar",
+    # Largest encoded result sent in one response; 0 never pages
+    "max_bytes": 256 * 1024,
+}
+
+LAYOUTS = ("columnar", "rows")
+
+# Seconds a paged result is held for its cursors, and how many are held
+CURSOR_TTL = 300.0
+MAX_HELD_RESULTS = 16
+
+# Share of max_bytes a page is planned to fill, as items vary in size
+PAGE_FILL = 0.9
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+_dumps_sorted = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), sort_keys=True).encode
+
+
+def parse_result_encoding(value):
+    """
+    Merge a "result_encoding" config value over DEFAULT_RESULT_ENCODING.
+
+    Args:
+        value: None for the defaults, or a dict overriding layout and/or
+            max_bytes
+
+    Returns:
+        The effective settings
+
+    Raises:
+        ValueError: If the value is malformed
+    """
+    settings = copy.deepcopy(DEFAULT_RESULT_ENCODING)
+    if value is None:
+        return settings
+    if not isinstance(value, dict):
+        raise ValueError("result_encoding must be an object")
+    for key, override in value.items():
+        if key == "layout":
+            if override not in LAYOUTS:
+                raise ValueError(f"result_encoding.layout must be one of {', '.join(LAYOUTS)}")
+        elif key == "max_bytes":
+            if isinstance(override, bool) or not isinstance(override, int) or override < 0:
+                raise ValueError("result_encoding.max_bytes must be an integer >= 0")
+        else:
+            raise ValueError(f"Unknown result_encoding entry '{key}': expected layout or max_bytes")
+        settings[key] = override
+    return settings
+
+
+def tabulate(items):
+    """
+    Return a list of objects as a table, or None when it is not one.
+
+    Args:
+        items: Tool result
+
+    Returns:
+        {"columns", "rows"} plus "strings" when a column was interned, or
+        None unless items holds at least two dicts with the same keys
+    """
+    if not isinstance(items, list) or len(items) < 2 or type(items[0]) is not dict:
+        return None
+    columns = list(items[0])
+    width = len(columns)
+    try:
+        if not all(type(item) is dict and len(item) == width for item in items):
+            return None
+        values = [[item[column] for item in items] for column in columns]
+    except KeyError:
+        return None
+
+    strings = {}
+    for position, column in enumerate(values):
+        if type(column[0]) is not str or not all(type(value) is str for value in column):
+            continue
+        index = {}
+        codes = [index.setdefault(value, len(index)) for value in column]
+        # Only when values repeat often enough to be worth an indirection
+        if len(index) * 2 <= len(column):
+            values[position] = codes
+            strings[columns[position]] = list(index)
+
+    table = {"columns": columns, "rows": list(zip(*values))}
+    if strings:
+        table["strings"] = strings
+    return table
+
+
+def encode(result, layout="columnar"):
+    """
+    Encode a result as the compact JSON text sent to the client.
+
+    Args:
+        result: JSON-serializable tool result
+        layout: "columnar" to send lists of objects as tables (see tabulate),
+            "rows" to send them as they are
+
+    Returns:
+        '{"result": ...}' without insignificant whitespace
+    """
+    return _dumps({"result": _shape(result, layout)})
+
+
+def _shape(result, layout):
+    if layout == "columnar":
+        table = tabulate(result)
+        if table is not None:
+            return table
+    return result
+
+
+def untabulate(table):
+    """Turn a table from tabulate() back into a list of objects."""
+    columns, strings = table["columns"], table.get("strings", {})
+    lookups = [strings.get(column) for column in columns]
+    return [
+        {
+            column: lookup[value] if lookup is not None else value
+            for column, lookup, value in zip(columns, lookups, row)
+        }
+        for row in table["rows"]
+    ]
+
+
+def _utf8_size(text):
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def _parse_cursor(cursor):
+    offset, _, digest = str(cursor).partition("-")
+    if not offset.isdigit() or len(digest) != 16:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return int(offset), digest
+
+
+class ResultEncoder:
+    """Encodes tool results and holds paged results for their cursors."""
+
+    def __init__(self, settings=None, clock=time.monotonic):
+        self.clock = clock
+        self._raw = object()
+        self._settings = None
+        self._held = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"results": 0, "paged": 0, "pages": 0, "reruns": 0, "bytes": 0}
+        self.configure(settings)
+
+    def configure(self, value):
+        """
+        Apply a "result_encoding" config value (see parse_result_encoding).
+
+        Raises:
+            ValueError: If the value is malformed
+        """
+        if value == self._raw:
+            return
+        settings = parse_result_encoding(value)
+        with self._lock:
+            self._raw = copy.deepcopy(value)
+            self._settings = settings
+
+    def stats(self):
+        """Results encoded, results split into pages, pages sent, tool reruns for a cursor, bytes sent."""
+        with self._lock:
+            return dict(self._counters, held=len(self._held))
+
+    def resume(self, tool, arguments, cursor):
+        """
+        Return the full result a cursor continues, while it is still held.
+
+        Args:
+            tool: Tool name
+            arguments: Tool arguments, without the cursor
+            cursor: next_cursor from the previous page
+
+        Returns:
+            The held result, or None when the tool has to run again
+
+        Raises:
+            ValueError: If the cursor is malformed or was issued for a
+                different call
+        """
+        _, digest = _parse_cursor(cursor)
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            held = self._held.get(digest)
+            if held is None:
+                self._counters["reruns"] += 1
+                return None
+        if held[1] != _call_key(tool, arguments):
+            raise ValueError("Cursor was issued for a different call; repeat the call that returned it")
+        return held[2]
+
+    def encode(self, tool, arguments, result, cursor=None):
+        """
+        Return the text sent for a tool result.
+
+        Args:
+            tool: Tool name
+            arguments: Tool arguments, without the cursor
+            result: What the tool returned
+            cursor: Cursor of the page to send, or None for the first
+
+        Returns:
+            The text itself for text results, otherwise compact JSON (see the
+            module docstring), one page of it when the result is too large
+
+        Raises:
+            ValueError: If the cursor does not belong to this result
+        """
+        settings = self._settings
+        layout, limit = settings["layout"], settings["max_bytes"]
+        if cursor is None:
+            text = result if isinstance(result, str) else encode(result, layout)
+            size = _utf8_size(text)
+            if not limit or size <= limit or not isinstance(result, list) or len(result) < 2:
+                self._count(results=1, bytes=size)
+                return text
+            offset, digest = 0, self._hold(tool, arguments, result, text)
+            self._count(results=1, paged=1)
+        else:
+            offset, digest = _parse_cursor(cursor)
+            size = self._held_size(digest, result)
+            if size is None:
+                # The tool ran again: the cursor must match what it returned this time.
+                text = result if isinstance(result, str) else encode(result, layout)
+                if not isinstance(result, list) or self._digest(tool, arguments, text) != digest:
+                    raise ValueError("Cursor is stale: the results changed; repeat the call without cursor")
+                size = _utf8_size(text)
+                self._hold(tool, arguments, result, text, digest)
+            if offset >= len(result):
+                raise ValueError(f"Invalid cursor: {cursor}")
+
+        # Plan the page from the average item size of the whole result, then
+        # check it: no item is encoded just to be measured.
+        per_item = size / len(result)
+        end = min(len(result), offset + max(1, int(limit * PAGE_FILL / per_item)))
+        while True:
+            page = result[offset:end]
+            payload = {"result": _shape(page, layout), "total": len(result)}
+            if end < len(result):
+                payload["next_cursor"] = f"{end}-{digest}"
+            text = _dumps(payload)
+            size = _utf8_size(text)
+            if size <= limit or end - offset == 1:
+                break
+            # Larger items than average; shrink the page.
+            end = offset + max(1, int((end - offset) * limit * PAGE_FILL / size))
+        self._count(pages=1, bytes=size)
+        return text
+
+    # ---- Held results ----
+
+    def _hold(self, tool, arguments, result, text, digest=None):
+        key = _call_key(tool, arguments)
+        if digest is None:
+            digest = self._digest(tool, arguments, text, key)
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            self._held[digest] = (now + CURSOR_TTL, key, result, _utf8_size(text))
+            self._held.move_to_end(digest)
+            while len(self._held) > MAX_HELD_RESULTS:
+                self._held.popitem(last=False)
+        return digest
+
+    def _held_size(self, digest, result):
+        """Encoded size of result when it is the one held for digest, else None."""
+        with self._lock:
+            held = self._held.get(digest)
+        return held[3] if held is not None and held[2] is result else None
+
+    def _expire(self, now):
+        while self._held and next(iter(self._held.values()))[0] <= now:
+            self._held.popitem(last=False)
+
+    def _digest(self, tool, arguments, text, key=None):
+        if key is None:
+            key = _call_key(tool, arguments)
+        h = hashlib.sha1(key.encode("utf-8"))
+        h.update(b"\0")
+        h.update(text.encode("utf-8"))
+        return h.hexdigest()[:16]
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self._counters[name] += amount
+
+
+def _call_key(tool, arguments):
+    return _dumps_sorted([tool, arguments or {}])
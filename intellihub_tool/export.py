@@ -0,0 +1,413 @@
+"""
+Whole-capsule export: a .tar.gz of every file plus a manifest of hashes, and
+delta bundles holding only what changed since an earlier manifest.
+
+Each file is its own gzip member (tar header, content and padding compressed
+together). Concatenated gzip members are a valid .tar.gz, so:
+
+* the cached archive of a corpus generation is built incrementally: members
+  of files whose hash did not change are copied byte for byte from the
+  previous archive, and only changed files are compressed again;
+* a delta bundle is a selection of byte ranges of the cached archive, so it
+  is never compressed or stored separately.
+
+Every bundle ends with ``.intellihub/manifest.json`` ({path: {"sha256",
+"size"}} plus the manifest hash); delta bundles also carry
+``.intellihub/delta.json`` listing the base hash and the removed paths.
+Manifests of recent generations are kept on disk, next to the index
+snapshots, so a client can ask for the changes since the manifest hash it
+last received, across restarts and from any worker.
+"""
+import gzip
+import hashlib
+import io
+import json
+import os
+import tarfile
+import threading
+
+from cancellation import check_cancelled
+from index import fingerprint
+
+EXPORT_DIR = "exports"
+MANIFEST_MEMBER = ".intellihub/manifest.json"
+DELTA_MEMBER = ".intellihub/delta.json"
+GZIP_LEVEL = 6
+# Manifests kept on disk as delta bases; archives are kept for the newest two
+KEEP_MANIFESTS = 32
+# Size of the reads that copy members and stream archives
+COPY_BLOCK = 1024 * 1024
+
+_END_MEMBER = gzip.compress(b"\0" * (2 * tarfile.BLOCKSIZE), GZIP_LEVEL, mtime=0)
+
+
+def manifest_hash(files):
+    """Hash a {path: {"sha256", "size"}} manifest; equal contents, equal hash."""
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        digest.update(f"{path}\0{files[path]['sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _member(name, data, mtime=0):
+    """One file as a gzip-compressed tar member."""
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = mtime
+    info.mode = 0o644
+    header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+    padding = b"\0" * (-len(data) % tarfile.BLOCKSIZE)
+    return gzip.compress(header + data + padding, GZIP_LEVEL, mtime=0)
+
+
+def _json_member(name, value):
+    return _member(name, json.dumps(value, indent=2, sort_keys=True).encode("utf-8"))
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def _normalize(data):
+    """Store text the way read_file() returns it, like the index snapshot does."""
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data
+    if "\r" in text:
+        return text.replace("\r\n", "\n").replace("\r", "\n").encode("utf-8")
+    return data
+
+
+class ExportArchive:
+    """The cached archive of one corpus generation (immutable)."""
+
+    def __init__(self, path, key, generation, files, chunks):
+        self.path = path
+        # Corpus fingerprint the archive was built from
+        self.key = key
+        self.generation = generation
+        # path -> {"sha256", "size"}
+        self.files = files
+        # path -> (offset, length) of the file's member in the archive
+        self.chunks = chunks
+        self.hash = manifest_hash(files)
+
+    def manifest(self, root_name):
+        return {
+            "root": root_name,
+            "generation": self.generation,
+            "manifest_hash": self.hash,
+            "files": self.files,
+        }
+
+    def ranges(self, paths):
+        """Byte ranges of the members of paths, adjacent ranges merged."""
+        ranges = []
+        for offset, length in sorted(self.chunks[path] for path in paths):
+            if ranges and ranges[-1][0] + ranges[-1][1] == offset:
+                ranges[-1][1] += length
+            else:
+                ranges.append([offset, length])
+        return ranges
+
+
+class Exporter:
+    """Builds, caches and serves the export archives of one knowledge root."""
+
+    def __init__(self, knowledge_root):
+        self.root = knowledge_root
+        self.dir = os.path.join(knowledge_root.index_dir, EXPORT_DIR)
+        self.builds = 0
+        self.members_copied = 0
+        self.members_compressed = 0
+        self._archive = None
+        # path -> (mtime_ns, size, sha256, exported length), so unchanged
+        # files are not reread
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    # ---- Sources ----
+    # The mapped index snapshot when there is one (no disk reads at all),
+    # else a walk of the root.
+
+    def _scan(self):
+        """Return (fingerprint, generation, {path: (mtime_ns, size)}, read(path))."""
+        snapshot = self.root.snapshot()
+        if snapshot is not None:
+            files = {
+                path: (entry["mtime_ns"], entry["size"])
+                for path, entry in snapshot.entries.items()
+                if entry["offset"] >= 0
+            }
+            return snapshot.fingerprint, snapshot.generation, files, lambda path: bytes(snapshot.read_bytes(path))
+
+        files = {}
+        real_root = self.root.real_path
+        for dirpath, _, names in os.walk(self.root.path):
+            for name in names:
+                check_cancelled()
+                full_path = os.path.join(dirpath, name)
+                real = os.path.realpath(full_path)
+                if not real.startswith(real_root + os.sep):
+                    continue
+                try:
+                    st = os.stat(real)
+                except OSError:
+                    continue
+                rel_path = os.path.relpath(full_path, self.root.path).replace("\\", "/")
+                files[rel_path] = (st.st_mtime_ns, st.st_size)
+
+        def read(path):
+            with open(os.path.join(self.root.path, path), "rb") as f:
+                return _normalize(f.read())
+
+        return fingerprint(files), None, files, read
+
+    # ---- Archives ----
+
+    def archive(self):
+        """
+        Return the ExportArchive of the current corpus, building it if needed.
+
+        Raises:
+            OSError: If the export directory cannot be written
+        """
+        key, generation, files, read = self._scan()
+        archive = self._archive
+        if archive is not None and archive.key == key:
+            return archive
+        with self._lock:
+            archive = self._archive
+            if archive is not None and archive.key == key:
+                return archive
+            archive = self._build(key, generation, files, read, archive)
+            self._archive = archive
+            return archive
+
+    def _build(self, key, generation, files, read, previous):
+        manifest = {}
+        for path in sorted(files):
+            check_cancelled()
+            mtime_ns, size = files[path]
+            cached = self._hashes.get(path)
+            if cached is None or cached[:2] != (mtime_ns, size):
+                try:
+                    data = read(path)
+                except OSError:
+                    continue
+                cached = self._hashes[path] = (mtime_ns, size, hashlib.sha256(data).hexdigest(), len(data))
+            # Sizes are of the exported bytes (newlines normalized), not the disk.
+            manifest[path] = {"sha256": cached[2], "size": cached[3]}
+        for path in set(self._hashes) - set(files):
+            del self._hashes[path]
+
+        digest = manifest_hash(manifest)
+        os.makedirs(self.dir, exist_ok=True)
+        dest = os.path.join(self.dir, f"{digest}.tar.gz")
+        table_path = os.path.join(self.dir, f"{digest}.json")
+
+        # Another worker (or an earlier run) may already have built it.
+        existing = self._load_archive(digest, key, generation)
+        if existing is not None:
+            return existing
+
+        if previous is None:
+            previous = self._newest_on_disk()
+        reusable = previous is not None and os.path.exists(previous.path)
+        tmp = f"{dest}.{os.getpid()}.tmp"
+        chunks = {}
+        try:
+            with open(tmp, "wb") as out, (open(previous.path, "rb") if reusable else io.BytesIO()) as old:
+                offset = 0
+                for path in sorted(manifest):
+                    check_cancelled()
+                    sha = manifest[path]["sha256"]
+                    if reusable and previous.files.get(path, {}).get("sha256") == sha:
+                        start, length = previous.chunks[path]
+                        old.seek(start)
+                        out.write(old.read(length))
+                        self.members_copied += 1
+                    else:
+                        # Read again rather than holding every changed file
+                        # in memory since hashing; from the snapshot this is
+                        # a page-cache hit.
+                        data = read(path)
+                        length = out.write(_member(path, data, files[path][0] // 1_000_000_000))
+                        self.members_compressed += 1
+                    chunks[path] = (offset, length)
+                    offset += length
+            os.replace(tmp, dest)
+        except BaseException:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+
+        table_tmp = f"{table_path}.{os.getpid()}.tmp"
+        with open(table_tmp, "w", encoding="utf-8") as f:
+            json.dump({"files": manifest, "chunks": chunks}, f, separators=(",", ":"))
+        os.replace(table_tmp, table_path)
+        self.builds += 1
+        self._prune(digest, previous.hash if previous is not None else None)
+        return ExportArchive(dest, key, generation, manifest, chunks)
+
+    def _load_archive(self, digest, key=None, generation=None):
+        """ExportArchive of a manifest hash already built on disk, or None."""
+        table = self._load_table(digest)
+        path = os.path.join(self.dir, f"{digest}.tar.gz")
+        if table is None or "chunks" not in table or not os.path.exists(path):
+            return None
+        chunks = {p: tuple(chunk) for p, chunk in table["chunks"].items()}
+        return ExportArchive(path, key, generation, table["files"], chunks)
+
+    def _newest_on_disk(self):
+        """Most recent archive left by another worker or an earlier run."""
+        try:
+            names = [n for n in os.listdir(self.dir) if n.endswith(".tar.gz")]
+        except OSError:
+            return None
+        names.sort(key=lambda n: _mtime(os.path.join(self.dir, n)), reverse=True)
+        for name in names:
+            archive = self._load_archive(name[: -len(".tar.gz")])
+            if archive is not None:
+                return archive
+        return None
+
+    def _load_table(self, digest):
+        if not all(c in "0123456789abcdef" for c in digest) or len(digest) != 64:
+            return None
+        try:
+            with open(os.path.join(self.dir, f"{digest}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _prune(self, current, previous):
+        """Keep the newest KEEP_MANIFESTS tables and the archives of current and previous."""
+        try:
+            names = os.listdir(self.dir)
+        except OSError:
+            return
+        tables = sorted(
+            (n for n in names if n.endswith(".json")),
+            key=lambda n: _mtime(os.path.join(self.dir, n)),
+            reverse=True,
+        )
+        stale = set(tables[KEEP_MANIFESTS:])
+        stale.update(
+            n for n in names if n.endswith(".tar.gz") and n[: -len(".tar.gz")] not in (current, previous)
+        )
+        for name in stale:
+            try:
+                os.remove(os.path.join(self.dir, name))
+            except OSError:
+                # Still open for streaming on Windows; next build retries.
+                pass
+
+    # ---- Bundles ----
+
+    def open(self, since=None):
+        """
+        Prepare a full archive, or a delta bundle against an earlier manifest.
+
+        Args:
+            since: Manifest hash the client already has. When it is unknown
+                (or expired) the full archive is returned instead.
+
+        Returns:
+            (info, chunks): info is {"root", "generation", "manifest_hash",
+            "base", "full", "files", "removed", "bytes"} and chunks an
+            iterator of the bundle's bytes. Close chunks when it is not
+            read to the end, to release the archive file.
+        """
+        archive = self.archive()
+        base = None
+        if since:
+            table = self._load_table(since)
+            base = table["files"] if table is not None else None
+
+        trailer = []
+        if base is None:
+            paths = sorted(archive.files)
+            removed = []
+        else:
+            paths = sorted(
+                path
+                for path, entry in archive.files.items()
+                if base.get(path, {}).get("sha256") != entry["sha256"]
+            )
+            removed = sorted(set(base) - set(archive.files))
+            trailer.append(
+                _json_member(
+                    DELTA_MEMBER,
+                    {"base": since, "manifest_hash": archive.hash, "changed": paths, "removed": removed},
+                )
+            )
+        trailer.append(_json_member(MANIFEST_MEMBER, archive.manifest(self.root.name)))
+        trailer.append(_END_MEMBER)
+
+        ranges = archive.ranges(paths)
+        info = {
+            "root": self.root.name,
+            "generation": archive.generation,
+            "manifest_hash": archive.hash,
+            "base": since if base is not None else None,
+            "full": base is None,
+            "files": len(paths),
+            "removed": removed,
+            "bytes": sum(length for _, length in ranges) + sum(len(m) for m in trailer),
+        }
+        # Opened now, so a build that prunes the file cannot pull it away
+        # before streaming starts.
+        return info, BundleStream(open(archive.path, "rb"), ranges, trailer)
+
+    def stats(self):
+        archive = self._archive
+        return {
+            "manifest_hash": archive.hash if archive else None,
+            "files": len(archive.files) if archive else 0,
+            "builds": self.builds,
+            "members_copied": self.members_copied,
+            "members_compressed": self.members_compressed,
+        }
+
+
+class BundleStream:
+    """
+    Iterator over a bundle's bytes that owns the open archive file.
+
+    close() releases the file whether or not iteration has started; a plain
+    generator that never started would skip its cleanup.
+    """
+
+    def __init__(self, f, ranges, trailer):
+        self._file = f
+        self._chunks = self._read(f, ranges, trailer)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._chunks)
+
+    def close(self):
+        self._chunks.close()
+        self._file.close()
+
+    @staticmethod
+    def _read(f, ranges, trailer):
+        with f:
+            for offset, length in ranges:
+                f.seek(offset)
+                while length > 0:
+                    block = f.read(min(length, COPY_BLOCK))
+                    if not block:
+                        raise OSError(f"Export archive truncated: {f.name}")
+                    length -= len(block)
+                    yield block
+        yield from trailer
@@ -0,0 +1,490 @@
+"""
+Shared, memory-mapped snapshot of the ai_context corpus.
+
+A snapshot file holds the raw content of every file followed by a JSON file
+table, so every server worker can mmap the same file read-only and share one
+copy of the capsule through the OS page cache. Rebuilds are elected through a
+lock file: only the process that creates the lock builds the next generation,
+then atomically swaps the ``current.json`` pointer. Everyone else keeps serving
+the previous generation (or the disk) until the pointer moves.
+
+Snapshot layout::
+
+    [file contents ...][header JSON][header length: uint64 LE][MAGIC]
+
+The header's file table also carries token estimates per file and per
+Markdown section (see tokens.py), each Markdown file's outgoing links (see
+links.py) and its front matter (see metadata.py), so sizes, the link graph and
+metadata filters need no content reads. Each Markdown file's content is
+followed by its line start offsets (see snippets.py), a native uint32 array
+that search() bisects in place.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from links import extract_links
+from metadata import parse_front_matter
+from snippets import line_starts
+from tokens import estimate_tokens, split_sections
+
+MAGIC = b"IHIDX006"
+TRAILER = struct.Struct("<Q")
+POINTER_NAME = "current.json"
+LOCK_NAME = "build.lock"
+
+# A build lock older than this is assumed to belong to a crashed process.
+LOCK_TIMEOUT = 300.0
+# How often a stale reader re-checks the pointer for a newer generation.
+POINTER_RECHECK = 0.25
+
+
+def fingerprint(files):
+    """
+    Hash a {relative_path: (mtime_ns, size)} scan into a corpus fingerprint.
+
+    Two processes that see the same files produce the same fingerprint, which
+    is how they agree on whether a snapshot is current.
+    """
+    digest = hashlib.sha1()
+    for path in sorted(files):
+        mtime_ns, size = files[path]
+        digest.update(f"{path}\0{mtime_ns}\0{size}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class IndexSnapshot:
+    """One immutable, read-only mapped generation of the corpus."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        end = len(self._mm) - len(MAGIC)
+        if self._mm[end:] != MAGIC:
+            raise ValueError(f"Not an IntelliHub index snapshot: {path}")
+        (header_len,) = TRAILER.unpack_from(self._mm, end - TRAILER.size)
+        header_start = end - TRAILER.size - header_len
+        header = json.loads(self._mm[header_start : end - TRAILER.size])
+
+        self.generation = header["generation"]
+        self.fingerprint = header["fingerprint"]
+        self.built_at = header["built_at"]
+        self.entries = header["files"]
+        self.paths = sorted(self.entries)
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def stats(self, path):
+        """Return the file table entry of path (size, tokens, sections, meta), or None."""
+        return self.entries.get(path)
+
+    def read_bytes(self, path):
+        """Return the stored bytes of a file, or None if it was not captured."""
+        entry = self.entries.get(path)
+        if entry is None or entry["offset"] < 0:
+            return None
+        return self._mm[entry["offset"] : entry["offset"] + entry["length"]]
+
+    def line_starts(self, path):
+        """Return the stored line start offsets of a Markdown file (uint32 view), or None."""
+        entry = self.entries.get(path)
+        if entry is None or "line_starts" not in entry:
+            return None
+        offset, count = entry["line_starts"]
+        return memoryview(self._mm)[offset : offset + 4 * count].cast("I")
+
+    def read_text(self, path):
+        """
+        Return the stored text of a file, or None if it was not captured.
+
+        Raises:
+            UnicodeDecodeError: If the file is not valid UTF-8
+        """
+        data = self.read_bytes(path)
+        if data is None:
+            return None
+        return data.decode("utf-8")
+
+    def iter_markdown(self):
+        """Yield (path, text) for every captured Markdown file."""
+        for path in self.paths:
+            if path.endswith(".md"):
+                text = self.read_text(path)
+                if text is not None:
+                    yield path, text
+
+
+class OverlaySnapshot:
+    """
+    A stale snapshot brought up to a newer scan of the corpus.
+
+    Files whose (mtime_ns, size) still match the scan are served from the
+    snapshot; files changed or added since are captured from the disk when
+    the overlay is made, and files removed since are left out. It has the
+    read API of IndexSnapshot, with the scan's fingerprint.
+    """
+
+    def __init__(self, base, root, files):
+        self.base = base
+        # The scan it was made for, to tell whether a newer one exists
+        self.files = files
+        self.generation = base.generation
+        self.fingerprint = fingerprint(files)
+        self.built_at = base.built_at
+        self.entries = {}
+        # path -> (stored bytes or None, line starts or None) of the files
+        # not served from base
+        self._captured = {}
+        root_abs = os.path.realpath(root)
+        for path, (mtime_ns, size) in files.items():
+            entry = base.entries.get(path)
+            if entry is not None and (entry["mtime_ns"], entry["size"]) == (mtime_ns, size):
+                self.entries[path] = entry
+                continue
+            entry = {"offset": -1, "length": 0, "mtime_ns": mtime_ns, "size": size}
+            data, starts = capture_file(root, root_abs, path, entry)
+            if data is not None:
+                entry["offset"] = 0
+                entry["length"] = len(data)
+            self._captured[path] = (data, starts)
+            self.entries[path] = entry
+        self.paths = sorted(self.entries)
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def stats(self, path):
+        return self.entries.get(path)
+
+    def read_bytes(self, path):
+        if path in self._captured:
+            return self._captured[path][0]
+        if path not in self.entries:
+            return None
+        return self.base.read_bytes(path)
+
+    def line_starts(self, path):
+        if path in self._captured:
+            return self._captured[path][1]
+        if path not in self.entries:
+            return None
+        return self.base.line_starts(path)
+
+    def read_text(self, path):
+        data = self.read_bytes(path)
+        if data is None:
+            return None
+        return data.decode("utf-8")
+
+    def iter_markdown(self):
+        for path in self.paths:
+            if path.endswith(".md"):
+                text = self.read_text(path)
+                if text is not None:
+                    yield path, text
+
+
+def capture_file(root, root_abs, path, entry):
+    """
+    Read one file the way a snapshot stores it.
+
+    Args:
+        root: ai_context directory
+        root_abs: Its real path
+        path: File path relative to root
+        entry: File table entry to add the derived fields to (sections,
+            tokens, links, meta)
+
+    Returns:
+        (data, starts): the bytes to store, or None when the file escapes
+        root or cannot be read, and the line start offsets of a Markdown
+        file (else None)
+    """
+    full_path = os.path.realpath(os.path.join(root, path))
+    if not full_path.startswith(root_abs + os.sep):
+        return None, None
+    try:
+        with open(full_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None, None
+    starts = None
+    try:
+        # Store text the way read_file() returns it (universal newlines).
+        text = data.decode("utf-8")
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+            data = text.encode("utf-8")
+        if path.endswith(".md"):
+            entry["sections"] = split_sections(text)
+            entry["tokens"] = sum(s["tokens"] for s in entry["sections"])
+            entry["links"] = extract_links(path, text)
+            metadata = parse_front_matter(text)
+            if metadata:
+                entry["meta"] = metadata
+            starts = line_starts(text)
+        else:
+            entry["tokens"] = estimate_tokens(text)
+    except UnicodeDecodeError:
+        pass
+    return data, starts
+
+
+def build_snapshot(root, dest, generation, files, progress=None):
+    """
+    Write a snapshot of root to dest.
+
+    Args:
+        root: ai_context directory
+        dest: Snapshot file to create (written via a temp file and renamed)
+        generation: Generation number recorded in the header
+        files: {relative_path: (mtime_ns, size)} scan the snapshot represents
+        progress: Optional callable invoked as progress(files_done, total)
+
+    Files whose real path escapes root (symlinks pointing outside) are listed
+    but their content is not captured.
+    """
+    root_abs = os.path.realpath(root)
+    entries = {}
+    tmp = f"{dest}.{os.getpid()}.tmp"
+
+    with open(tmp, "wb") as out:
+        offset = 0
+        for done, path in enumerate(sorted(files)):
+            if progress is not None:
+                progress(done, len(files))
+            mtime_ns, size = files[path]
+            entry = {"offset": -1, "length": 0, "mtime_ns": mtime_ns, "size": size}
+            entries[path] = entry
+            data, starts = capture_file(root, root_abs, path, entry)
+            if data is None:
+                continue
+            out.write(data)
+            entry["offset"] = offset
+            entry["length"] = len(data)
+            offset += len(data)
+            if starts is not None:
+                starts = starts.tobytes()
+                padding = -offset % 4
+                out.write(b"\0" * padding)
+                offset += padding
+                entry["line_starts"] = [offset, len(starts) // 4]
+                out.write(starts)
+                offset += len(starts)
+
+        header = json.dumps(
+            {
+                "generation": generation,
+                "fingerprint": fingerprint(files),
+                "built_at": time.time(),
+                "files": entries,
+            },
+            separators=(",", ":"),
+        ).encode("utf-8")
+        out.write(header)
+        out.write(TRAILER.pack(len(header)))
+        out.write(MAGIC)
+        out.flush()
+        os.fsync(out.fileno())
+
+    os.replace(tmp, dest)
+
+
+class SharedIndex:
+    """
+    Keep this process mapped onto the newest snapshot of the corpus.
+
+    The watcher supplies file scans; snapshot() returns the mapped generation
+    only while it matches the latest scan, and latest() returns it even when
+    the corpus has moved on and a rebuild is still pending.
+    """
+
+    def __init__(self, root, index_dir, watcher, build=True):
+        self.root = root
+        self.index_dir = index_dir
+        self.watcher = watcher
+        # False for read-only followers that only map what others build
+        self.build = build
+        self.builds = 0
+        # {"done", "total"} files of the build in progress, else None
+        self.progress = None
+        self._snapshot = None
+        self._wanted = None
+        self._checked_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    # ---- Lifecycle ----
+
+    def start(self):
+        """Map or build the current snapshot, then follow the watcher, in the background."""
+        self.watcher.add_listener(self.on_change)
+        thread = threading.Thread(target=self._run, name="intellihub-index", daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self):
+        self.refresh()
+        self.watcher.start()
+
+    def stop(self):
+        self.watcher.remove_listener(self.on_change)
+
+    def on_change(self, changes, generation):
+        self.refresh()
+
+    def refresh(self, files=None):
+        """
+        Bring the mapped snapshot up to date with the corpus.
+
+        Args:
+            files: {relative_path: (mtime_ns, size)} scan to index; defaults
+                to the watcher's latest scan
+        """
+        with self._refresh_lock:
+            os.makedirs(self.index_dir, exist_ok=True)
+            if files is None:
+                files = self.watcher.files()
+                if files is None:
+                    self.watcher.poll()
+                    files = self.watcher.files()
+            wanted = fingerprint(files)
+            self._wanted = wanted
+
+            if self._snapshot is not None and self._snapshot.fingerprint == wanted:
+                return
+            if self._map_pointer(wanted):
+                return
+            if not self.build or not self._acquire_build_lock():
+                # Another process is building; snapshot() picks it up later.
+                return
+            try:
+                # Re-check: the previous builder may have just finished.
+                if self._map_pointer(wanted):
+                    return
+                pointer = self._read_pointer()
+                generation = (pointer["generation"] if pointer else 0) + 1
+                dest = os.path.join(self.index_dir, f"snapshot-{generation}.bin")
+                self.progress = {"done": 0, "total": len(files)}
+                build_snapshot(self.root, dest, generation, files, self._report_progress)
+                self._write_pointer(
+                    {"generation": generation, "fingerprint": wanted, "file": os.path.basename(dest)}
+                )
+                self.builds += 1
+                self._map_pointer(wanted)
+                self._remove_old_snapshots(generation)
+            finally:
+                self.progress = None
+                self._release_build_lock()
+
+    def _report_progress(self, done, total):
+        self.progress = {"done": done, "total": total}
+
+    # ---- Reads ----
+
+    def snapshot(self):
+        """Return the mapped snapshot if it is current, else None."""
+        snap = self._snapshot
+        if snap is not None and snap.fingerprint == self._wanted:
+            return snap
+
+        now = time.monotonic()
+        if self._wanted is not None and now - self._checked_at >= POINTER_RECHECK:
+            self._checked_at = now
+            if self._map_pointer(self._wanted):
+                return self._snapshot
+        return None
+
+    def latest(self):
+        """
+        Return the last mapped snapshot, current or not (None before the first).
+
+        A stale one is still a complete, immutable generation: it keeps
+        serving pinned reads until the next one is published.
+        """
+        self.snapshot()  # maps a peer's build when one is due
+        return self._snapshot
+
+    def status(self):
+        snap = self._snapshot
+        return {
+            "generation": snap.generation if snap else None,
+            "current": snap is not None and snap.fingerprint == self._wanted,
+            "files": len(snap.paths) if snap else 0,
+            "builds": self.builds,
+            "building": self.progress,
+        }
+
+    # ---- Pointer and lock files ----
+
+    def _read_pointer(self):
+        try:
+            with open(os.path.join(self.index_dir, POINTER_NAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_pointer(self, pointer):
+        path = os.path.join(self.index_dir, POINTER_NAME)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(pointer, f)
+        os.replace(tmp, path)
+
+    def _map_pointer(self, wanted):
+        """Map the pointed-to snapshot if it matches wanted. Returns success."""
+        pointer = self._read_pointer()
+        if pointer is None or pointer.get("fingerprint") != wanted:
+            return False
+        if self._snapshot is not None and self._snapshot.generation == pointer["generation"]:
+            return True
+        try:
+            snap = IndexSnapshot(os.path.join(self.index_dir, pointer["file"]))
+        except (OSError, ValueError):
+            return False
+        # Readers still holding the previous generation keep its mapping
+        # alive; it is unmapped when the last reference goes away.
+        self._snapshot = snap
+        return True
+
+    def _acquire_build_lock(self):
+        path = os.path.join(self.index_dir, LOCK_NAME)
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(path) > LOCK_TIMEOUT:
+                        os.remove(path)
+                        continue
+                except OSError:
+                    continue
+                return False
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def _release_build_lock(self):
+        try:
+            os.remove(os.path.join(self.index_dir, LOCK_NAME))
+        except OSError:
+            pass
+
+    def _remove_old_snapshots(self, generation):
+        # Keep the previous generation for workers that have not swapped yet.
+        for name in os.listdir(self.index_dir):
+            if not (name.startswith("snapshot-") and name.endswith(".bin")):
+                continue
+            try:
+                if int(name[len("snapshot-") : -len(".bin")]) < generation - 1:
+                    os.remove(os.path.join(self.index_dir, name))
+            except (ValueError, OSError):
+                # Still mapped on platforms that forbid deleting open files.
+                pass
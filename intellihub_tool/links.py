@@ -0,0 +1,173 @@
+"""
+Markdown link graph of an ai_context capsule.
+
+Each Markdown file's outgoing links are parsed once (at index build time when
+a snapshot is available) and kept in a graph with incoming edges, so related
+files, broken links and orphans are answered without re-reading the corpus.
+"""
+import posixpath
+import re
+from collections import deque
+from urllib.parse import unquote
+
+_INLINE = re.compile(r"!?\[[^\]]*\]\(\s*<?([^)\s>]+)>?(?:\s+[\"'(][^)]*)?\)")
+_REFERENCE = re.compile(r"^\s{0,3}\[[^\]]+\]:\s*<?(\S+?)>?(?:\s+.*)?$", re.MULTILINE)
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_SCHEME = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:")
+
+# Entry points that are not expected to be linked from anywhere
+ROOT_DOCUMENTS = {"00_README.md"}
+
+
+def extract_links(path, text):
+    """
+    Return the sorted relative paths that the Markdown file at path links to.
+
+    External URLs, in-page anchors and links inside code fences are ignored.
+    Targets are resolved against the file's directory ("/" means the capsule
+    root); links that climb out of the capsule are dropped.
+    """
+    prose = []
+    in_fence = False
+    for line in text.splitlines():
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            prose.append(line)
+    prose = "\n".join(prose)
+
+    targets = set()
+    for match in list(_INLINE.finditer(prose)) + list(_REFERENCE.finditer(prose)):
+        target = match.group(1)
+        if target.startswith(("#", "//")) or _SCHEME.match(target):
+            continue
+        target = unquote(target.split("#", 1)[0].split("?", 1)[0])
+        if not target:
+            continue
+        if target.startswith("/"):
+            resolved = posixpath.normpath(target.lstrip("/"))
+        else:
+            resolved = posixpath.normpath(posixpath.join(posixpath.dirname(path), target))
+        if resolved == ".." or resolved.startswith("../"):
+            continue
+        targets.add(resolved)
+    return sorted(targets)
+
+
+class LinkGraph:
+    """
+    Outgoing and incoming link edges between the files of one capsule.
+
+    Versions are copy-on-write: copy() returns a new version that shares the
+    edge sets of this one and copies each set only when it first changes it.
+    A version that has been handed to readers is never changed again, so
+    they read it without locks.
+    """
+
+    def __init__(self):
+        self.files = set()
+        self.outgoing = {}
+        self.incoming = {}
+        # Targets whose incoming set belongs to this version alone
+        self._owned = set()
+
+    def copy(self):
+        """Return a new version to apply changes to; this one stays as it is."""
+        graph = LinkGraph()
+        graph.files = set(self.files)
+        graph.outgoing = dict(self.outgoing)
+        graph.incoming = dict(self.incoming)
+        return graph
+
+    def _sources(self, target):
+        """The incoming set of target, copied first if shared with another version."""
+        if target in self._owned:
+            return self.incoming.setdefault(target, set())
+        self._owned.add(target)
+        sources = self.incoming[target] = set(self.incoming.get(target, ()))
+        return sources
+
+    def set_links(self, path, targets):
+        """Replace the outgoing links of path."""
+        self.files.add(path)
+        for target in self.outgoing.pop(path, ()):
+            if target in self.incoming:
+                sources = self._sources(target)
+                sources.discard(path)
+                if not sources:
+                    del self.incoming[target]
+        if targets:
+            self.outgoing[path] = set(targets)
+            for target in targets:
+                self._sources(target).add(path)
+
+    def add_file(self, path):
+        """Record a file that has no links of its own (e.g. not Markdown)."""
+        self.files.add(path)
+
+    def remove_file(self, path):
+        self.set_links(path, ())
+        self.files.discard(path)
+
+    def edge_count(self):
+        return sum(len(targets) for targets in self.outgoing.values())
+
+    def related(self, path, depth=1):
+        """
+        Return files within depth link hops of path, following edges both ways.
+
+        Returns:
+            List of {"path", "distance", "links_to", "linked_from"} dicts sorted
+            by distance then path; links_to/linked_from tell whether the file
+            is directly linked from or to path.
+        """
+        outgoing = self.outgoing.get(path, set())
+        incoming = self.incoming.get(path, set())
+        distances = {path: 0}
+        queue = deque([path])
+        while queue:
+            current = queue.popleft()
+            if distances[current] >= depth:
+                continue
+            neighbours = self.outgoing.get(current, set()) | self.incoming.get(current, set())
+            for neighbour in neighbours:
+                if neighbour not in distances and neighbour in self.files:
+                    distances[neighbour] = distances[current] + 1
+                    queue.append(neighbour)
+
+        return [
+            {
+                "path": other,
+                "distance": distance,
+                "links_to": other in outgoing,
+                "linked_from": other in incoming,
+            }
+            for other, distance in sorted(distances.items(), key=lambda item: (item[1], item[0]))
+            if other != path
+        ]
+
+    def broken(self):
+        """Return [{"source", "target"}] for links to files that do not exist."""
+        # Links to a directory (e.g. "schemas/") count as valid.
+        directories = set()
+        for path in self.files:
+            parent = posixpath.dirname(path)
+            while parent and parent not in directories:
+                directories.add(parent)
+                parent = posixpath.dirname(parent)
+        return [
+            {"source": source, "target": target}
+            for source in sorted(self.outgoing)
+            for target in sorted(self.outgoing[source])
+            if target not in self.files and target not in directories and target != "."
+        ]
+
+    def orphans(self):
+        """Return Markdown files no other file links to (root documents excepted)."""
+        return sorted(
+            path
+            for path in self.files
+            if path.endswith(".md")
+            and path not in ROOT_DOCUMENTS
+            and not (self.incoming.get(path, set()) - {path})
+        )
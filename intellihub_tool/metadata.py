@@ -0,0 +1,197 @@
+"""
+Front-matter metadata of Markdown files and a table to filter files by it.
+
+Front matter is a block of ``key: value`` lines between ``---`` fences at the
+very top of a file::
+
+    ---
+    module: mon_forge
+    status: canonical
+    tags: [lore, mutagens]
+    ---
+
+Only that flat subset of YAML is understood: scalar values, ``[a, b]`` lists
+and ``- item`` lists. Keys and values are compared case-insensitively.
+"""
+import re
+
+_FENCE = re.compile(r"^---\s*$")
+_CLOSE = re.compile(r"^(---|\.\.\.)\s*$")
+_FIELD = re.compile(r"^([A-Za-z0-9_-]+)\s*:\s*(.*?)\s*$")
+_ITEM = re.compile(r"^\s*-\s+(.*?)\s*$")
+
+# Front matter longer than this is assumed not to be front matter.
+MAX_FRONT_MATTER_LINES = 100
+
+
+def _scalar(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def parse_front_matter(text):
+    """
+    Return the front matter of Markdown text as a dict.
+
+    Values are strings, or lists of strings for list fields. Keys are
+    lowercased. Text without a front matter block returns {}.
+    """
+    lines = text.splitlines()[: MAX_FRONT_MATTER_LINES + 2]
+    if not lines or not _FENCE.match(lines[0]):
+        return {}
+
+    metadata = {}
+    key = None
+    for line in lines[1:]:
+        if _CLOSE.match(line):
+            return metadata
+        item = _ITEM.match(line)
+        if item and key is not None:
+            if not isinstance(metadata[key], list):
+                metadata[key] = []
+            metadata[key].append(_scalar(item.group(1)))
+            continue
+        field = _FIELD.match(line)
+        if field is None:
+            key = None
+            continue
+        key, value = field.group(1).lower(), field.group(2)
+        if value.startswith("[") and value.endswith("]"):
+            metadata[key] = [_scalar(v.strip()) for v in value[1:-1].split(",") if v.strip()]
+        else:
+            metadata[key] = _scalar(value)
+        if value:
+            # Only a key with no value of its own starts a "- item" list;
+            # items after a scalar are malformed and ignored.
+            key = None
+    # No closing fence: a horizontal rule, not front matter.
+    return {}
+
+
+def normalize_filters(filters):
+    """
+    Validate filters and return them as {key: set of lowercased values}.
+
+    Args:
+        filters: {key: value} or {key: [values]} dict (a file matches a key
+            when any of its values equals any of the given ones), or a list
+            of "key=value" strings
+
+    Raises:
+        ValueError: If filters is not in one of those shapes
+    """
+    if isinstance(filters, (list, tuple)):
+        pairs = {}
+        for item in filters:
+            key, sep, value = str(item).partition("=")
+            if not sep or not key.strip():
+                raise ValueError(f"Invalid filter {item!r}: expected key=value")
+            pairs.setdefault(key.strip(), []).append(value.strip())
+        filters = pairs
+    if not isinstance(filters, dict):
+        raise ValueError("filters must be an object of field: value pairs")
+
+    normalized = {}
+    for key, values in filters.items():
+        if isinstance(values, str):
+            values = [values]
+        if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+            raise ValueError(f"Filter {key!r} must be a string or a list of strings")
+        normalized[str(key).lower()] = {v.lower() for v in values}
+    return normalized
+
+
+class MetadataTable:
+    """
+    Columnar front-matter table of one capsule.
+
+    Each column (front-matter key) maps a lowercased value to the set of
+    files carrying it, so a filter is a few set intersections and never
+    touches file contents.
+
+    Versions are copy-on-write, like LinkGraph: copy() shares columns and
+    cells, which are copied when first changed, and a version handed to
+    readers is never changed again.
+    """
+
+    def __init__(self):
+        # key -> value -> set of paths
+        self.columns = {}
+        # path -> its front matter, to undo a file's cells on update
+        self._rows = {}
+        # Columns and (key, value) cells that belong to this version alone
+        self._owned = set()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def copy(self):
+        """Return a new version to apply changes to; this one stays as it is."""
+        table = MetadataTable()
+        table.columns = dict(self.columns)
+        table._rows = dict(self._rows)
+        return table
+
+    def _column(self, key):
+        """Column key, copied first if shared with another version."""
+        if key in self._owned:
+            return self.columns.setdefault(key, {})
+        self._owned.add(key)
+        column = self.columns[key] = dict(self.columns.get(key, ()))
+        return column
+
+    def _cell(self, key, value):
+        """Paths of one value of column key, copied first if shared."""
+        column = self._column(key)
+        if (key, value) in self._owned:
+            return column.setdefault(value, set())
+        self._owned.add((key, value))
+        paths = column[value] = set(column.get(value, ()))
+        return paths
+
+    def set_file(self, path, metadata):
+        """Replace the front matter recorded for path."""
+        self.remove_file(path)
+        if not metadata:
+            return
+        self._rows[path] = metadata
+        for key, values in metadata.items():
+            for value in values if isinstance(values, list) else [values]:
+                self._cell(key, value.lower()).add(path)
+
+    def remove_file(self, path):
+        metadata = self._rows.pop(path, None)
+        if metadata is None:
+            return
+        for key, values in metadata.items():
+            for value in values if isinstance(values, list) else [values]:
+                if value.lower() in self.columns.get(key, ()):
+                    paths = self._cell(key, value.lower())
+                    paths.discard(path)
+                    if not paths:
+                        del self.columns[key][value.lower()]
+            if not self.columns.get(key, True):
+                del self.columns[key]
+
+    def get(self, path):
+        """Front matter of path, or {}."""
+        return self._rows.get(path, {})
+
+    def select(self, filters):
+        """
+        Return the set of files matching every filter.
+
+        Args:
+            filters: Output of normalize_filters()
+        """
+        matched = None
+        for key, values in filters.items():
+            column = self.columns.get(key, {})
+            paths = set()
+            for value in values:
+                paths |= column.get(value, set())
+            matched = paths if matched is None else matched & paths
+            if not matched:
+                return set()
+        return set(self._rows) if matched is None else matched
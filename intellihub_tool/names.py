@@ -0,0 +1,68 @@
+"""
+Name index for fuzzy lookups of schemas and module purposes.
+
+Names are matched on a normalized form (lowercase, letters and digits only),
+so "MonForge", "mon-forge" and "mon_forge" are the same name. Anything else is
+ranked by trigram overlap; a lookup only touches the posting lists of the
+query's trigrams, not every name in the directory.
+"""
+import re
+
+_NOT_ALNUM = re.compile(r"[^a-z0-9]")
+
+
+def normalize(name):
+    """Lowercase a name and drop everything but letters and digits."""
+    return _NOT_ALNUM.sub("", name.lower())
+
+
+def trigrams(name):
+    """Return the set of trigrams of a normalized name, padded at both ends."""
+    padded = f"  {normalize(name)} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """Normalized-name and trigram lookup over a fixed set of names."""
+
+    def __init__(self, names):
+        self.names = sorted(names)
+        self._normalized = {}
+        self._trigrams = {}
+        self._postings = {}
+        for name in self.names:
+            self._normalized.setdefault(normalize(name), []).append(name)
+            grams = trigrams(name)
+            self._trigrams[name] = grams
+            for gram in grams:
+                self._postings.setdefault(gram, set()).add(name)
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, query, limit=5):
+        """
+        Rank names by similarity to query.
+
+        Returns:
+            Up to limit (name, score) pairs, best first. Names equal to the
+            query after normalization score 1.0; others score the Dice
+            coefficient of their trigram sets.
+        """
+        exact = self._normalized.get(normalize(query), [])
+        ranked = [(name, 1.0) for name in exact]
+
+        grams = trigrams(query)
+        shared = {}
+        for gram in grams:
+            for name in self._postings.get(gram, ()):
+                shared[name] = shared.get(name, 0) + 1
+
+        scored = [
+            (name, 2 * count / (len(grams) + len(self._trigrams[name])))
+            for name, count in shared.items()
+            if name not in exact
+        ]
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        ranked.extend(scored)
+        return [(name, round(score, 3)) for name, score in ranked[:limit]]
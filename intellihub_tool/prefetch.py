@@ -0,0 +1,157 @@
+"""
+Background prefetch of the files an agent is likely to read next.
+
+After each read_file() the prefetcher ranks candidates by how often they
+followed the file in earlier reads of the same reader (MCP session) and by
+whether the file links to them, and a single low-priority thread loads the
+best few into the root's content cache.
+"""
+import contextvars
+import queue
+import threading
+from collections import Counter, OrderedDict
+
+# Files warmed after each read
+PREFETCH_LIMIT = 3
+# Pause before each background load so foreground reads go first
+PREFETCH_DELAY = 0.05
+# An observed "A then B" read counts this many times more than a link A -> B
+SEQUENCE_WEIGHT = 2
+# Successors remembered per file
+MAX_SUCCESSORS = 20
+QUEUE_SIZE = 64
+# Readers whose last read is remembered (least recently used are forgotten first)
+MAX_READERS = 1024
+
+# Who is reading: the server sets the MCP session of the call being served,
+# so that the sequences of concurrent sessions are not interleaved. Reads
+# outside any session (CLI, tests) share one sequence.
+READER = contextvars.ContextVar("intellihub_reader", default=None)
+
+
+class Prefetcher:
+    """Predict and warm the next reads of one knowledge root."""
+
+    def __init__(self, cache, link_graph, limit=PREFETCH_LIMIT, delay=PREFETCH_DELAY):
+        """
+        Args:
+            cache: The root's ContentCache
+            link_graph: Callable returning the root's LinkGraph, or None
+                while it would have to be built from the disk
+            limit: Files to warm after each read
+            delay: Seconds to wait before each background load
+        """
+        self.cache = cache
+        self.link_graph = link_graph
+        self.limit = limit
+        self.delay = delay
+        self.reads = 0
+        self.prefetched = 0
+        self.hits = 0
+        self._successors = {}
+        # reader -> path it read last
+        self._last = OrderedDict()
+        self._warm = set()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = None
+        self._stop = threading.Event()
+
+    def on_read(self, path, cached, load):
+        """
+        Record a served read and queue predictions for warming.
+
+        Args:
+            path: Relative path that was just read
+            cached: Whether the content cache served the read
+            load: Callable(path) that reads a file into the content cache
+        """
+        with self._lock:
+            self.reads += 1
+            if path in self._warm:
+                # Only a prefetch that survived in the cache until now counts.
+                self._warm.discard(path)
+                if cached:
+                    self.hits += 1
+            reader = READER.get()
+            last = self._last.pop(reader, None)
+            if last is not None and last != path:
+                successors = self._successors.setdefault(last, Counter())
+                successors[path] += 1
+                if len(successors) > MAX_SUCCESSORS:
+                    del successors[min(successors, key=successors.get)]
+            self._last[reader] = path
+            if len(self._last) > MAX_READERS:
+                self._last.popitem(last=False)
+
+        # Predicting and loading both happen on the background thread.
+        try:
+            self._queue.put_nowait((path, load))
+        except queue.Full:
+            return
+        self._ensure_thread()
+
+    def predict(self, path):
+        """Return up to limit files likely to be read after path, best first."""
+        scores = Counter()
+        with self._lock:
+            for successor, count in self._successors.get(path, Counter()).items():
+                scores[successor] += count * SEQUENCE_WEIGHT
+        graph = self.link_graph()
+        if graph is not None:
+            for target in graph.outgoing.get(path, ()):
+                if target in graph.files:
+                    scores[target] += 1
+        ranked = sorted(scores, key=lambda candidate: (-scores[candidate], candidate))
+        return [c for c in ranked if c != path and c not in self.cache][: self.limit]
+
+    def stats(self):
+        return {
+            "reads": self.reads,
+            "prefetched": self.prefetched,
+            "hits": self.hits,
+            # Share of prefetched files that were read before being evicted or changed
+            "hit_rate": round(self.hits / self.prefetched, 3) if self.prefetched else None,
+            # Share of reads that a prefetch had already warmed
+            "coverage": round(self.hits / self.reads, 3) if self.reads else None,
+        }
+
+    def forget(self, paths):
+        """Stop counting paths as warm, e.g. after they changed on disk."""
+        with self._lock:
+            self._warm.difference_update(paths)
+
+    def stop(self):
+        self._stop.set()
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="intellihub-prefetch", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                read_path, load = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            for path in self.predict(read_path):
+                if self._stop.wait(self.delay):
+                    return
+                if path in self.cache:
+                    continue
+                try:
+                    load(path)
+                except (OSError, ValueError):
+                    # Vanished, escaped the root or not text; nothing to warm.
+                    continue
+                with self._lock:
+                    self.prefetched += 1
+                    self._warm.add(path)
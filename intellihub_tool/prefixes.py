@@ -0,0 +1,48 @@
+"""
+Sorted term dictionary for prefix autocomplete.
+
+Terms are kept in one sorted list searched with bisect, with document
+frequencies in a parallel list. Short prefixes match a large slice of the
+dictionary, so their best-ranked terms are computed once and remembered.
+"""
+import heapq
+from bisect import bisect_left
+
+# Prefixes up to this length have their top terms memoized
+MEMO_PREFIX_CHARS = 2
+# Most suggestions one call can return
+MAX_SUGGESTIONS = 100
+
+
+class PrefixIndex:
+    """Autocomplete over {term: document frequency}."""
+
+    def __init__(self, frequencies):
+        self.terms = sorted(frequencies)
+        self.frequencies = [frequencies[t] for t in self.terms]
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.terms)
+
+    def suggest(self, prefix, limit=10):
+        """
+        Return up to limit {"term", "df"} dicts starting with prefix.
+
+        Terms found in more files come first; ties are alphabetical.
+        """
+        prefix = prefix.lower()
+        if len(prefix) <= MEMO_PREFIX_CHARS:
+            ranked = self._memo.get(prefix)
+            if ranked is None:
+                ranked = self._memo[prefix] = self._rank(prefix, MAX_SUGGESTIONS)
+            return ranked[:limit]
+        return self._rank(prefix, limit)
+
+    def _rank(self, prefix, limit):
+        start = bisect_left(self.terms, prefix)
+        end = bisect_left(self.terms, prefix + "\uffff", lo=start)
+        best = heapq.nsmallest(
+            limit, range(start, end), key=lambda i: (-self.frequencies[i], self.terms[i])
+        )
+        return [{"term": self.terms[i], "df": self.frequencies[i]} for i in best]
@@ -0,0 +1,655 @@
+"""
+Knowledge roots: one ai_context capsule each, with its own watcher, shared
+index and memory-budgeted content cache.
+
+Reads are snapshot-isolated. Index snapshots are immutable generations, and
+the derived indexes are copy-on-write versions published together with the
+snapshot they were built from, in one tuple replaced by one reference swap.
+Inside pinned() every root is read through a RootView, taken on its first
+read, so a call sees one generation from start to end however the corpus
+changes meanwhile, and takes no locks to do so.
+"""
+import contextlib
+import contextvars
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import Counter, OrderedDict
+
+from cancellation import check_cancelled
+from index import OverlaySnapshot, SharedIndex
+from links import LinkGraph, extract_links
+from metadata import MetadataTable, parse_front_matter
+from names import NameIndex
+from prefetch import Prefetcher
+from watcher import CorpusWatcher
+
+DEFAULT_MEMORY_BUDGET_MB = 64
+WATCH_INTERVAL = 1.0
+# Validated read_file paths remembered per root.
+PATH_CACHE_SIZE = 4096
+# Share of the memory budget that warm-up fills, leaving room for later reads
+WARM_CACHE_FRACTION = 0.5
+# How often warm-up checks whether the shared index is mapped
+WARMUP_POLL = 0.05
+
+
+class ContentCache:
+    """
+    Least-recently-used cache of decoded file contents bounded by bytes.
+
+    Each entry may carry the version of the file it holds, the (mtime_ns,
+    size) recorded for it in an index snapshot. A read pinned to a snapshot
+    passes that snapshot's version and never gets text of another generation.
+    """
+
+    def __init__(self, budget_bytes):
+        self.budget = budget_bytes
+        self.used = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, version=None):
+        """Return cached text, or None; with a version, only text of that version."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or (version is not None and entry[1] != version):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, path, text, version=None):
+        size = sys.getsizeof(text)
+        if size > self.budget:
+            return
+        with self._lock:
+            previous = self._entries.pop(path, None)
+            if previous is not None:
+                self.used -= sys.getsizeof(previous[0])
+            self._entries[path] = (text, version)
+            self.used += size
+            while self.used > self.budget:
+                _, evicted = self._entries.popitem(last=False)
+                self.used -= sys.getsizeof(evicted[0])
+
+    def __contains__(self, path):
+        return path in self._entries
+
+    def peek(self, path, version=None):
+        """Like get(), without counting a hit or miss or refreshing recency."""
+        entry = self._entries.get(path)
+        if entry is None or (version is not None and entry[1] != version):
+            return None
+        return entry[0]
+
+    def invalidate(self, paths=None):
+        """Drop the given paths, or everything when paths is None."""
+        with self._lock:
+            if paths is None:
+                self._entries.clear()
+                self.used = 0
+                return
+            for path in paths:
+                entry = self._entries.pop(path, None)
+                if entry is not None:
+                    self.used -= sys.getsizeof(entry[0])
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "used_bytes": self.used,
+            "budget_bytes": self.budget,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class PathCache:
+    """
+    Least-recently-used map of requested paths to validated file locations.
+
+    Entries are (resolved absolute path, path relative to the root) for paths
+    that passed read_file()'s traversal and is-a-file checks. Storing the
+    resolved path means a hit never re-follows symlinks.
+    """
+
+    def __init__(self, max_entries=PATH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, path):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None:
+                self._entries.move_to_end(path)
+            return entry
+
+    def put(self, path, entry):
+        with self._lock:
+            self._entries[path] = entry
+            self._entries.move_to_end(path)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def file_version(snapshot, path):
+    """The (mtime_ns, size) snapshot recorded for path, or None."""
+    entry = snapshot.entries.get(path) if snapshot is not None else None
+    return (entry["mtime_ns"], entry["size"]) if entry is not None else None
+
+
+# ---- Pinned views ----
+
+# {root: RootView} of the pinned() block running in this context, else None
+_VIEWS = contextvars.ContextVar("intellihub_views", default=None)
+
+
+class RootView:
+    """
+    A root as one call (or session) sees it: the last published index
+    snapshot and the derived indexes built from that same snapshot.
+
+    Both are immutable, so reads through a view need no locks. Nothing is
+    released explicitly: a generation stays mapped, and superseded derived
+    indexes stay in memory, exactly as long as some view refers to them.
+    """
+
+    __slots__ = ("snapshot", "stale", "derived", "taken_at", "__weakref__")
+
+    def __init__(self, snapshot, stale, derived):
+        # None before the first snapshot is mapped; reads then go to the disk
+        self.snapshot = snapshot
+        # Whether a rebuild was pending when the view was taken; the snapshot
+        # is then an OverlaySnapshot with the files changed since read from
+        # the disk
+        self.stale = stale
+        # name -> LinkGraph / VectorIndex / MetadataTable of this snapshot
+        self.derived = derived
+        self.taken_at = time.monotonic()
+
+
+@contextlib.contextmanager
+def pinned(views=None):
+    """
+    Pin every root to one view for the duration of the block.
+
+    A root's view is taken on its first read inside the block; every later
+    read in the block sees the same generation. Blocks nest: an inner block
+    keeps the outer one's views.
+
+    Args:
+        views: {root: RootView} dict to pin into and keep views in, e.g. one
+            per MCP session so that views outlive a single call; None for a
+            fresh one (unless a block is already active)
+    """
+    if views is None and _VIEWS.get() is not None:
+        yield
+        return
+    token = _VIEWS.set({} if views is None else views)
+    try:
+        yield
+    finally:
+        _VIEWS.reset(token)
+
+
+class KnowledgeRoot:
+    """
+    One named ai_context directory.
+
+    Until start() is called the root is passive: tools read the disk directly
+    and neither contents nor validated paths are cached, because without a watcher there is no way to tell
+    when cached content goes stale.
+    """
+
+    def __init__(
+        self,
+        name,
+        path,
+        index_dir,
+        memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB,
+        shards=1,
+        watch_interval=WATCH_INTERVAL,
+    ):
+        self.name = name
+        self.path = path
+        # Resolved once; read_file() checks targets against it
+        self.real_path = os.path.realpath(path)
+        self.index_dir = index_dir
+        self.memory_budget_mb = memory_budget_mb
+        # More than 1 splits the index across worker processes (see shards.py)
+        self.shards = shards
+        self.watcher = CorpusWatcher(path, interval=watch_interval)
+        self.cache = ContentCache(int(memory_budget_mb * 1024 * 1024))
+        self.paths = PathCache()
+        self.prefetcher = Prefetcher(self.cache, self._indexed_link_graph)
+        self.index = None
+        # (directory, suffix) -> (directory mtime_ns, NameIndex)
+        self._name_indexes = {}
+        # (index snapshot, {name: link graph / vector index / metadata table
+        # built from it}); replaced, never modified (see "Derived indexes")
+        self._published = (None, {})
+        self._derived_lock = threading.Lock()
+        # Views taken inside pinned() blocks that are still alive
+        self._views = weakref.WeakSet()
+        self._exporter = None
+        self.warm_cache_fraction = WARM_CACHE_FRACTION
+        self._warmup = {"phase": "idle", "derived": [], "cached_files": 0, "seconds": None}
+        self._stopping = threading.Event()
+
+    def settings(self):
+        """Values that, when changed in config, require a fresh root."""
+        return (self.path, self.index_dir, self.memory_budget_mb, self.shards)
+
+    @property
+    def started(self):
+        """True once the watcher has a baseline, so later changes are seen."""
+        return self.index is not None and self.watcher.files() is not None
+
+    def start(self):
+        """Map or build the shared index and follow the corpus in the background."""
+        if self.index is not None:
+            return
+        self.watcher.add_listener(self._on_change)
+        if self.shards > 1:
+            # Imported here: multiprocessing is only needed by sharded roots.
+            from shards import ShardedIndex
+
+            self.index = ShardedIndex(self.path, self.index_dir, self.watcher, self.shards)
+        else:
+            self.index = SharedIndex(self.path, self.index_dir, self.watcher)
+        self.index.start()
+        threading.Thread(target=self._warm_up, name="intellihub-warmup", daemon=True).start()
+
+    def stop(self):
+        self._stopping.set()
+        self.prefetcher.stop()
+        self.watcher.stop()
+        if self.index is not None:
+            self.index.stop()
+
+    @property
+    def sharded(self):
+        """True once start() has handed the index to shard workers."""
+        return self.shards > 1 and self.index is not None
+
+    # ---- Warm-up ----
+    # Tools work from the first second (reading the disk while the index is
+    # missing); warm-up only decides when they are fast. Phases: index (wait
+    # for the snapshot to be mapped), derived (build the metadata table, link
+    # graph and vector index), cache (prefill the content cache), ready.
+
+    @property
+    def ready(self):
+        return self._warmup["phase"] == "ready"
+
+    def warmup_status(self):
+        """Warm-up phase, derived indexes built so far and files prefilled."""
+        status = dict(self._warmup, derived=list(self._warmup["derived"]))
+        status["corpus_generation"] = self.watcher.generation
+        return status
+
+    def _warm_up(self):
+        began = time.monotonic()
+        warmup = self._warmup
+        try:
+            warmup["phase"] = "index"
+            while self.snapshot() is None or not self.started:
+                if self._stopping.wait(WARMUP_POLL):
+                    return
+            warmup["phase"] = "derived"
+            for name, build in (
+                ("metadata", self.metadata),
+                ("links", self.link_graph),
+                ("vectors", self.vector_index),
+            ):
+                if self._stopping.is_set():
+                    return
+                build()
+                warmup["derived"].append(name)
+            warmup["phase"] = "cache"
+            self._prefill_cache()
+            warmup["seconds"] = round(time.monotonic() - began, 3)
+            warmup["phase"] = "ready"
+        except Exception as e:
+            warmup["phase"] = "failed"
+            warmup["error"] = str(e)
+
+    def _prefill_cache(self):
+        """Load files from the snapshot until warm_cache_fraction of the budget is used."""
+        snapshot = self.snapshot()
+        if snapshot is None:
+            return
+        limit = self.cache.budget * self.warm_cache_fraction
+        for path in snapshot.paths:
+            if self._stopping.is_set():
+                return
+            try:
+                text = snapshot.read_text(path)
+            except UnicodeDecodeError:
+                continue
+            if text is None:
+                continue
+            if self.cache.used + sys.getsizeof(text) > limit:
+                break
+            self.cache.put(path, text, file_version(snapshot, path))
+            self._warmup["cached_files"] += 1
+
+    def snapshot(self):
+        """
+        Return the current index snapshot, or None to fall back to the disk.
+
+        Inside pinned() this is the snapshot of the root's view.
+        """
+        views = _VIEWS.get()
+        if views is not None:
+            return self.view().snapshot
+        if self.index is None:
+            return None
+        return self.index.snapshot()
+
+    def view(self):
+        """
+        Return the pinned view of this root, or a fresh one outside pinned().
+
+        While a rebuild is pending, a view pins the previous generation for
+        the files unchanged since it was built, and the disk's version of
+        the files changed since (see OverlaySnapshot).
+        """
+        views = _VIEWS.get()
+        view = views.get(self) if views is not None else None
+        if view is None:
+            snapshot, derived = self._publish_latest()
+            view = RootView(snapshot, isinstance(snapshot, OverlaySnapshot), derived)
+            if views is not None:
+                views[self] = view
+                self._views.add(view)
+        return view
+
+    def pins(self):
+        """Live pinned views, the snapshot generations they hold and how many are stale."""
+        views = list(self._views)
+        held = Counter(v.snapshot.generation for v in views if v.snapshot is not None)
+        return {
+            "views": len(views),
+            "generations": {str(g): n for g, n in sorted(held.items())},
+            "stale": sum(v.stale for v in views),
+        }
+
+    def name_index(self, directory, suffix):
+        """
+        Return the NameIndex of the files directly in directory ending in suffix.
+
+        Names are the file names without the suffix. The index is rebuilt only
+        when the directory's mtime moves, i.e. when files come or go, so a
+        lookup costs one stat call.
+        """
+        path = os.path.join(self.path, directory)
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return NameIndex([])
+
+        cached = self._name_indexes.get((directory, suffix))
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+
+        names = [
+            entry.name[: -len(suffix)]
+            for entry in os.scandir(path)
+            if entry.name.endswith(suffix) and entry.is_file()
+        ]
+        index = NameIndex(names)
+        self._name_indexes[(directory, suffix)] = (mtime_ns, index)
+        return index
+
+    def exporter(self):
+        """Return the root's Exporter of archives and delta bundles."""
+        if self._exporter is None:
+            # Imported here: tarfile and gzip are only needed once a client
+            # mirrors the capsule.
+            from export import Exporter
+
+            with self._derived_lock:
+                if self._exporter is None:
+                    self._exporter = Exporter(self)
+        return self._exporter
+
+    # ---- Derived indexes ----
+    # The link graph, vector index and metadata table are built from an
+    # index snapshot on first use and published with it. When the index
+    # maps the next snapshot, copies are patched for the files whose entries
+    # differ between the two snapshots, from the new snapshot's own file
+    # table, and published with it in one swap; readers never see a
+    # half-applied update or indexes of another generation. Without a
+    # snapshot (a passive root, or before the first build) they are built
+    # from the disk on every call (once per pinned() block).
+
+    def link_graph(self):
+        """Return the capsule's LinkGraph (from the snapshot's stored links when current)."""
+        return self._derived("links", self._build_link_graph)
+
+    def vector_index(self):
+        """Return the capsule's TF-IDF VectorIndex over Markdown passages."""
+        return self._derived("vectors", self._build_vector_index)
+
+    def metadata(self):
+        """Return the capsule's front-matter MetadataTable."""
+        return self._derived("metadata", self._build_metadata)
+
+    def _indexed_link_graph(self):
+        """The link graph once a snapshot is mapped, else None (it would walk the disk)."""
+        if self.index is None or self.index.latest() is None:
+            return None
+        return self.link_graph()
+
+    def _derived(self, name, build):
+        view = self.view()
+        index = view.derived.get(name)
+        if index is not None:
+            return index
+        snapshot = view.snapshot
+        if snapshot is None:
+            index = build(None)
+        else:
+            with self._derived_lock:
+                published, derived = self._published
+                index = derived.get(name) if published is snapshot else None
+                if index is None:
+                    index = build(snapshot)
+                    # Only for the latest snapshot; a view pinned to an
+                    # older one keeps its build to itself.
+                    if published is snapshot:
+                        self._published = (snapshot, {**derived, name: index})
+        # The rest of the view's reads use the same version.
+        view.derived = {**view.derived, name: index}
+        return index
+
+    def _publish_latest(self):
+        """
+        Return (snapshot, derived indexes) for the index's latest snapshot,
+        publishing patched derived indexes first when it is new.
+
+        A stale snapshot is published as an OverlaySnapshot of the watcher's
+        latest scan.
+        """
+        if self.index is None:
+            return None, {}
+        published = self._published
+        if self._is_published(published[0]):
+            return published
+        with self._derived_lock:
+            # Re-read under the lock: the index and the scan only move
+            # forward, so what is published here is never older than before.
+            previous, derived = self._published
+            if self._is_published(previous):
+                return self._published
+            snapshot = self.index.latest()
+            if snapshot is None:
+                return None, {}
+            files = self.watcher.files()
+            if files is not None and self.index.snapshot() is not snapshot:
+                snapshot = OverlaySnapshot(snapshot, self.path, files)
+            if derived:
+                removed = previous.entries.keys() - snapshot.entries.keys()
+                changed = [
+                    path
+                    for path, entry in snapshot.entries.items()
+                    if file_version(previous, path) != (entry["mtime_ns"], entry["size"])
+                ]
+                derived = {
+                    name: _patch(index, snapshot, removed, changed, *DERIVED_PATCHES[name])
+                    for name, index in derived.items()
+                }
+            self._published = (snapshot, derived)
+            return self._published
+
+    def _is_published(self, published):
+        """Whether published is the index's latest snapshot, or its overlay of the latest scan."""
+        snapshot = self.index.latest()
+        if published is None or snapshot is None:
+            return published is snapshot
+        if isinstance(published, OverlaySnapshot):
+            return (
+                published.base is snapshot
+                and published.files is self.watcher.files()
+                and self.index.snapshot() is not snapshot
+            )
+        return published is snapshot and (
+            self.index.snapshot() is snapshot or self.watcher.files() is None
+        )
+
+    def _build_link_graph(self, snapshot):
+        graph = LinkGraph()
+        if snapshot is not None:
+            for path in snapshot.paths:
+                check_cancelled()
+                _patch_links(graph, snapshot, path)
+        else:
+            for path in self._walk():
+                _update_links(graph, path, self._read_markdown(path))
+        return graph
+
+    def _build_metadata(self, snapshot):
+        table = MetadataTable()
+        if snapshot is not None:
+            for path in snapshot.paths:
+                check_cancelled()
+                _patch_metadata(table, snapshot, path)
+        else:
+            for path in self._walk():
+                _update_metadata(table, path, self._read_markdown(path))
+        return table
+
+    def _build_vector_index(self, snapshot):
+        # Imported here so NumPy stays off the stdio cold-start path.
+        from vectors import VectorIndex
+
+        vectors = VectorIndex()
+        if snapshot is not None:
+            for path, text in snapshot.iter_markdown():
+                check_cancelled()
+                vectors.set_file(path, text)
+        else:
+            for path in self._walk():
+                _update_vectors(vectors, path, self._read_markdown(path))
+        return vectors
+
+    def _walk(self):
+        for dirpath, _, files in os.walk(self.path):
+            for f in files:
+                check_cancelled()
+                rel_path = os.path.relpath(os.path.join(dirpath, f), self.path)
+                yield rel_path.replace("\\", "/")
+
+    def _read_markdown(self, path):
+        """Text of a Markdown file inside the root, or None for anything else."""
+        if not path.endswith(".md"):
+            return None
+        full_path = os.path.realpath(os.path.join(self.path, path))
+        if not full_path.startswith(self.real_path + os.sep):
+            return None
+        try:
+            with open(full_path, "r", encoding="utf-8") as f:
+                return f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+
+    def _on_change(self, changes, generation):
+        changed = changes["added"] | changes["modified"] | changes["removed"]
+        self.cache.invalidate(changed)
+        self.prefetcher.forget(changed)
+        # Any change may retarget a symlink or replace a directory, so drop
+        # every validated path rather than guessing which ones it affects.
+        self.paths.clear()
+
+
+def _update_links(graph, path, text):
+    if text is None:
+        graph.add_file(path)
+    else:
+        graph.set_links(path, extract_links(path, text))
+
+
+def _update_vectors(vectors, path, text):
+    if text is None:
+        vectors.remove_file(path)
+    else:
+        vectors.set_file(path, text)
+
+
+def _update_metadata(table, path, text):
+    table.set_file(path, parse_front_matter(text) if text is not None else None)
+
+
+def _patch_links(graph, snapshot, path):
+    links = snapshot.entries[path].get("links")
+    if links is None:
+        graph.add_file(path)
+    else:
+        graph.set_links(path, links)
+
+
+def _patch_vectors(vectors, snapshot, path):
+    text = snapshot.read_text(path) if path.endswith(".md") else None
+    _update_vectors(vectors, path, text)
+
+
+def _patch_metadata(table, snapshot, path):
+    table.set_file(path, snapshot.entries[path].get("meta"))
+
+
+# Derived index name -> (patch(index, snapshot, path) from the snapshot's
+# entry of path, remove(index, path))
+DERIVED_PATCHES = {
+    "links": (_patch_links, LinkGraph.remove_file),
+    "vectors": (_patch_vectors, lambda vectors, path: vectors.remove_file(path)),
+    "metadata": (_patch_metadata, MetadataTable.remove_file),
+}
+
+
+def _patch(index, snapshot, removed, changed, patch, remove):
+    """A copy of index with removed and changed paths brought up to snapshot."""
+    index = index.copy()
+    for path in removed:
+        remove(index, path)
+    for path in changed:
+        check_cancelled()
+        try:
+            patch(index, snapshot, path)
+        except UnicodeDecodeError:
+            remove(index, path)
+    return index
@@ -0,0 +1,301 @@
+"""
+Per-session and per-client rate limits, and fair scheduling of tool calls.
+
+Every tool call first passes two token buckets, one for its MCP session and
+one for its client (remote address, or client name when there is none), with
+separate budgets for heavy tools (full-corpus scans) and cheap ones. A call
+that would have a token within max_wait seconds is throttled (delayed); a call
+that would wait longer is rejected with RateLimitError.
+
+Admitted calls then queue for one of a fixed number of worker slots. Waiting
+calls are granted slots round-robin by session, so one session looping on a
+tool cannot push everyone else to the back of the thread pool's queue.
+"""
+import contextlib
+import copy
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+
+# Tools that scan the whole capsule; everything else is cheap.
+HEAVY_TOOLS = frozenset({"search", "similar", "diagnose", "export_snapshot"})
+
+DEFAULT_RATE_LIMITS = {
+    "heavy": {"session": {"rate": 2.0, "burst": 5}, "client": {"rate": 5.0, "burst": 10}},
+    "cheap": {"session": {"rate": 20.0, "burst": 40}, "client": {"rate": 50.0, "burst": 100}},
+    # Longest a call is delayed before it is rejected instead
+    "max_wait": 2.0,
+}
+
+# Client buckets remembered (least recently used are forgotten first)
+MAX_TRACKED_CLIENTS = 4096
+
+# Same default size as asyncio's default thread pool executor
+DEFAULT_SLOTS = min(32, (os.cpu_count() or 1) + 4)
+
+
+class RateLimitError(Exception):
+    """A tool call exceeded its rate limit."""
+
+
+def parse_rate_limits(value):
+    """
+    Merge a "rate_limits" config value over DEFAULT_RATE_LIMITS.
+
+    Args:
+        value: None for the defaults, False to disable limits, or a dict
+            overriding any of the defaults. A rate of 0 lifts that limit.
+
+    Returns:
+        The effective limits dict, or None when limits are disabled
+
+    Raises:
+        ValueError: If the value is malformed
+    """
+    if value is False:
+        return None
+    limits = copy.deepcopy(DEFAULT_RATE_LIMITS)
+    if value is None:
+        return limits
+    if not isinstance(value, dict):
+        raise ValueError("rate_limits must be an object or false")
+
+    for key, override in value.items():
+        if key == "max_wait":
+            if not isinstance(override, (int, float)) or override < 0:
+                raise ValueError("rate_limits.max_wait must be a number >= 0")
+            limits["max_wait"] = float(override)
+            continue
+        if key not in ("heavy", "cheap") or not isinstance(override, dict):
+            raise ValueError(f"Unknown rate_limits entry '{key}': expected heavy, cheap or max_wait")
+        for scope, bucket in override.items():
+            if scope not in ("session", "client") or not isinstance(bucket, dict):
+                raise ValueError(f"rate_limits.{key}.{scope}: expected session or client object")
+            for field, number in bucket.items():
+                if field not in ("rate", "burst") or not isinstance(number, (int, float)) or number < 0:
+                    raise ValueError(f"rate_limits.{key}.{scope}.{field} must be rate or burst >= 0")
+                limits[key][scope][field] = number
+            if limits[key][scope]["rate"] and limits[key][scope]["burst"] < 1:
+                raise ValueError(f"rate_limits.{key}.{scope}.burst must be at least 1")
+    return limits
+
+
+class TokenBucket:
+    """Classic token bucket; tokens may go negative to reserve future capacity."""
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = now
+
+    def wait_time(self, now):
+        """Seconds until one token is available."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """Token buckets per (session, tool class) and per (client, tool class)."""
+
+    def __init__(self, limits=None, clock=time.monotonic):
+        self.clock = clock
+        self._raw = object()
+        self._limits = None
+        self._sessions = weakref.WeakKeyDictionary()
+        self._clients = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._limited_clients = OrderedDict()
+        self.configure(limits)
+
+    def configure(self, value):
+        """
+        Apply a "rate_limits" config value (see parse_rate_limits).
+
+        Buckets are reset only when the value actually changes.
+
+        Raises:
+            ValueError: If the value is malformed
+        """
+        if value == self._raw:
+            return
+        limits = parse_rate_limits(value)
+        with self._lock:
+            self._raw = copy.deepcopy(value)
+            self._limits = limits
+            self._sessions = weakref.WeakKeyDictionary()
+            self._clients.clear()
+
+    def admit(self, tool, session, client):
+        """
+        Charge one call of tool to session and client.
+
+        Args:
+            tool: Tool name
+            session: Session object (weakly referenced), or None
+            client: Client identifier string
+
+        Returns:
+            Seconds the caller should wait before running the call (0 when
+            within budget)
+
+        Raises:
+            RateLimitError: If the call would have to wait longer than max_wait
+        """
+        kind = "heavy" if tool in HEAVY_TOOLS else "cheap"
+        with self._lock:
+            counters = self._counters.setdefault(
+                kind, {"admitted": 0, "throttled": 0, "rejected": 0, "throttle_seconds": 0.0}
+            )
+            limits = self._limits
+            if limits is None:
+                counters["admitted"] += 1
+                return 0.0
+
+            now = self.clock()
+            buckets = []
+            if session is not None:
+                session_buckets = self._sessions.setdefault(session, {})
+                bucket = self._bucket(session_buckets, kind, limits[kind]["session"], now)
+                if bucket is not None:
+                    buckets.append(("session", bucket))
+            client_buckets = self._clients.setdefault(client, {})
+            self._clients.move_to_end(client)
+            if len(self._clients) > MAX_TRACKED_CLIENTS:
+                self._clients.popitem(last=False)
+            bucket = self._bucket(client_buckets, kind, limits[kind]["client"], now)
+            if bucket is not None:
+                buckets.append(("client", bucket))
+
+            waits = [(b.wait_time(now), scope) for scope, b in buckets]
+            wait, scope = max(waits, default=(0.0, None))
+            if wait > limits["max_wait"]:
+                counters["rejected"] += 1
+                self._count_client(client, "rejected")
+                tools = f" ({', '.join(sorted(HEAVY_TOOLS))})" if kind == "heavy" else ""
+                raise RateLimitError(
+                    f"Rate limit exceeded for {kind} tools{tools} for this {scope}; "
+                    f"retry in {wait:.1f} s"
+                )
+            for _, b in buckets:
+                b.take()
+            counters["admitted"] += 1
+            if wait > 0:
+                counters["throttled"] += 1
+                counters["throttle_seconds"] += wait
+                self._count_client(client, "throttled")
+            return wait
+
+    @staticmethod
+    def _bucket(buckets, kind, limit, now):
+        if not limit["rate"]:
+            return None
+        bucket = buckets.get(kind)
+        if bucket is None:
+            bucket = buckets[kind] = TokenBucket(limit["rate"], limit["burst"], now)
+        return bucket
+
+    def _count_client(self, client, event):
+        counts = self._limited_clients.setdefault(client, {"throttled": 0, "rejected": 0})
+        counts[event] += 1
+        self._limited_clients.move_to_end(client)
+        if len(self._limited_clients) > MAX_TRACKED_CLIENTS:
+            self._limited_clients.popitem(last=False)
+
+    def stats(self):
+        """Limits in effect, per-class counters and the clients that hit a limit."""
+        with self._lock:
+            return {
+                "enabled": self._limits is not None,
+                "limits": copy.deepcopy(self._limits),
+                "calls": copy.deepcopy(self._counters),
+                "sessions": len(self._sessions),
+                "clients": len(self._clients),
+                "limited_clients": copy.deepcopy(dict(self._limited_clients)),
+            }
+
+
+class FairScheduler:
+    """
+    Bounded worker slots granted round-robin across sessions.
+
+    Runs on the event loop: acquire() and release() are not thread-safe and
+    must be called from the loop's thread.
+    """
+
+    def __init__(self, slots=DEFAULT_SLOTS):
+        self.slots = slots
+        self.running = 0
+        self.waited = 0
+        self.max_queued = 0
+        # key -> waiting futures, in round-robin order of keys
+        self._queues = OrderedDict()
+
+    @property
+    def queued(self):
+        return sum(len(q) for q in self._queues.values())
+
+    async def acquire(self, key):
+        # Imported here: tool.py imports this module for parse_rate_limits(),
+        # and the CLI should not pay for asyncio.
+        import asyncio
+
+        if self.running < self.slots and not self._queues:
+            self.running += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(key, deque()).append(future)
+        self.waited += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before the cancellation.
+                self.release()
+            else:
+                queue = self._queues.get(key)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._queues[key]
+            raise
+
+    def release(self):
+        """Hand the slot to the next session in turn, or free it."""
+        while self._queues:
+            key, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(key)
+            else:
+                del self._queues[key]
+            if not future.done():
+                future.set_result(None)
+                return
+        self.running -= 1
+
+    @contextlib.asynccontextmanager
+    async def slot(self, key):
+        await self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        return {
+            "slots": self.slots,
+            "running": self.running,
+            "queued": self.queued,
+            "sessions_waiting": len(self._queues),
+            "max_queued": self.max_queued,
+            "waited": self.waited,
+        }
@@ -0,0 +1,136 @@
+"""
+Benchmark bytes on the wire and serialization time of large tool results.
+
+Each result is sent as a complete JSON-RPC response, serialized the way the
+MCP SDK's transports do it, in two ways:
+
+- before: call_tool_handler returned {"result": ...}; the SDK sent it as
+  structuredContent and again as a json.dumps(indent=2) text block
+- after: encoding.ResultEncoder, one compact text block (tables for hit lists),
+  in pages of at most --max-bytes
+
+Times cover the handler's encoding plus the transport's serialization of the
+response; for paged results they add up every page.
+
+Usage (from intellihub_tool/):
+    python scripts/bench_encoding.py --hits 20000
+    python scripts/bench_encoding.py --query lumen --max-bytes 0   # configured capsule
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcp import types  # noqa: E402
+
+from encoding import ResultEncoder  # noqa: E402
+
+WORDS = "lumen storm mutagen forge seed canonical draft schema module lore glyph tamer".split()
+
+
+def synthetic_results(hits, files, seed):
+    """Search hits (plain and with context) and a sized file listing."""
+    rng = random.Random(seed)
+    paths = [f"lore/{rng.choice(WORDS)}_{i:05d}.md" for i in range(files)]
+
+    def line():
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 14)))
+
+    plain = [
+        {"file": paths[i * files // hits], "line": i % 400 + 1, "snippet": line().capitalize()}
+        for i in range(hits)
+    ]
+    windows = [
+        {
+            **hit,
+            "start_line": hit["line"],
+            "end_line": hit["line"] + 4,
+            "matches": [hit["line"] + 2],
+            "context": "\n".join(line() for _ in range(5)),
+        }
+        for hit in plain[: hits // 4]
+    ]
+    listing = [{"path": p, "bytes": rng.randint(200, 90000), "tokens": rng.randint(50, 22000)} for p in paths]
+    return [
+        (f"search, {hits} hits", "search", plain),
+        (f"search -C 2, {len(windows)} windows", "search", windows),
+        (f"list_files sizes, {files} files", "list_files", listing),
+    ]
+
+
+def wire(content, structured=None):
+    """The JSON-RPC response as a transport writes it."""
+    result = types.ServerResult(types.CallToolResult(content=content, structuredContent=structured, isError=False))
+    message = types.JSONRPCMessage(
+        types.JSONRPCResponse(jsonrpc="2.0", id=1, result=result.model_dump(by_alias=True, mode="json", exclude_none=True))
+    )
+    return message.model_dump_json(by_alias=True, exclude_none=True)
+
+
+def before(tool, result):
+    structured = {"result": result}
+    text = json.dumps(structured, indent=2)
+    return [wire([types.TextContent(type="text", text=text)], structured)]
+
+
+def after(encoder, tool, result):
+    arguments = {"bench": tool}
+    text = encoder.encode(tool, arguments, result)
+    messages = [wire([types.TextContent(type="text", text=text)])]
+    # next_cursor is the last key of a page; no need to parse the whole page
+    while '"next_cursor":"' in text[-64:]:
+        cursor = text[text.rindex('"next_cursor":"') + 15 : -2]
+        # Later pages are served from the held result, as in the server.
+        text = encoder.encode(tool, arguments, encoder.resume(tool, arguments, cursor), cursor)
+        messages.append(wire([types.TextContent(type="text", text=text)]))
+    return messages
+
+
+def measure(func, repeat):
+    """Median milliseconds and the messages of the last run."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        messages = func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark tool result encoding on the wire")
+    parser.add_argument("--hits", type=int, default=20000, help="Synthetic search hits")
+    parser.add_argument("--files", type=int, default=2000, help="Synthetic files the hits are spread over")
+    parser.add_argument("--query", help="Also encode this search on the configured capsule")
+    parser.add_argument("--max-bytes", type=int, default=256 * 1024, help="Page size after (0 never pages)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per variant; the median is reported")
+    parser.add_argument("--seed", type=int, default=49)
+    args = parser.parse_args()
+
+    cases = synthetic_results(args.hits, args.files, args.seed)
+    if args.query:
+        import tool
+
+        cases.append((f"search '{args.query}' on the capsule", "search", tool.search(args.query)))
+
+    print(f"{'result':36} {'before':>24} {'after':>24} {'':>8} {'bytes':>6} {'time':>6}")
+    for label, tool_name, result in cases:
+        encoder = ResultEncoder({"max_bytes": args.max_bytes})
+        old_ms, old = measure(lambda: before(tool_name, result), args.repeat)
+        new_ms, new = measure(lambda: after(encoder, tool_name, result), args.repeat)
+        old_bytes = sum(len(m.encode("utf-8")) for m in old)
+        new_bytes = sum(len(m.encode("utf-8")) for m in new)
+        pages = f"{len(new)} page{'s' if len(new) > 1 else ''}"
+        print(
+            f"{label:36} {old_bytes / 1024:9.1f} KiB {old_ms:7.1f} ms "
+            f"{new_bytes / 1024:9.1f} KiB {new_ms:7.1f} ms {pages:>8} "
+            f"{(new_bytes - old_bytes) / old_bytes:+6.0%} {(new_ms - old_ms) / old_ms:+6.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Micro-benchmark of read_file()'s per-call path validation.
+
+Compares the original checks (realpath of target and root, exists, isfile)
+with the current ones: an uncached validation against the pre-resolved root,
+and a hit in the root's validated-path cache. Only validation is timed, not
+the read itself.
+
+Usage (from intellihub_tool/):
+    python scripts/bench_read_path.py --calls 20000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from roots import KnowledgeRoot  # noqa: E402
+import tool  # noqa: E402
+
+
+def legacy_validate(ai_context, path):
+    """read_file()'s checks before the validated-path cache."""
+    full_path = os.path.realpath(os.path.join(ai_context, path))
+    ai_context_abs = os.path.realpath(ai_context)
+    if not (full_path == ai_context_abs or full_path.startswith(ai_context_abs + os.sep)):
+        raise ValueError(path)
+    if not os.path.exists(full_path):
+        raise FileNotFoundError(path)
+    if not os.path.isfile(full_path):
+        raise ValueError(path)
+    return full_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark read_file path validation")
+    parser.add_argument("--calls", type=int, default=20000, help="Validations per variant")
+    parser.add_argument("--depth", type=int, default=3, help="Directory depth of the target file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        rel_dir = os.path.join(*[f"level{i}" for i in range(args.depth)])
+        os.makedirs(os.path.join(ai_context, rel_dir))
+        path = os.path.join(rel_dir, "notes.md").replace(os.sep, "/")
+        with open(os.path.join(ai_context, path), "w", encoding="utf-8") as f:
+            f.write("# Notes\n")
+
+        root = KnowledgeRoot("bench", ai_context, os.path.join(tmpdir, "index"))
+        cold = KnowledgeRoot("bench", ai_context, os.path.join(tmpdir, "index"))
+        # Mark the root as watched without starting threads, so hits are cached.
+        root.index = object()
+        root.watcher.poll()
+
+        variants = [
+            ("before (realpath x2 + exists + isfile)", lambda: legacy_validate(ai_context, path)),
+            ("after, uncached", lambda: tool._resolve_path(cold, path)),
+            ("after, cached", lambda: tool._resolve_path(root, path)),
+        ]
+
+        print(f"Per-call validation of '{path}' ({args.calls} calls each):")
+        for label, func in variants:
+            func()
+            seconds = min(timeit.repeat(func, number=args.calls, repeat=3))
+            print(f"  {label:40} {seconds / args.calls * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
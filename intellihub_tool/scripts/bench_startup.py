@@ -0,0 +1,130 @@
+"""
+Measure stdio server cold start: module import time and time from spawn to
+the first tools/list response. Exits non-zero when a median exceeds its
+budget, so the numbers can be tracked in CI.
+
+Usage (from intellihub_tool/):
+    python scripts/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Budgets in milliseconds. Most of the import cost is the mcp package itself;
+# raise these only together with a note on what made startup slower.
+IMPORT_BUDGET_MS = 1500
+FIRST_LIST_BUDGET_MS = 2500
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import stdio_server; "
+    "print((time.perf_counter() - t) * 1000)"
+)
+
+
+def measure_import():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=TOOL_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def send(proc, message):
+    proc.stdin.write(json.dumps(message) + "\n")
+    proc.stdin.flush()
+
+
+def read_response(proc, request_id):
+    while True:
+        line = proc.stdout.readline()
+        if not line:
+            raise RuntimeError("stdio server exited before responding")
+        message = json.loads(line)
+        if message.get("id") == request_id:
+            return message
+
+
+def measure_first_list():
+    """Return (ms to initialize response, ms to first tools/list response)."""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "stdio_server.py"],
+        cwd=TOOL_DIR,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        send(proc, {
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "initialize",
+            "params": {
+                "protocolVersion": "2025-06-18",
+                "clientInfo": {"name": "bench-startup", "version": "0.0.1"},
+                "capabilities": {},
+            },
+        })
+        read_response(proc, 1)
+        initialized = time.perf_counter()
+        send(proc, {"jsonrpc": "2.0", "method": "notifications/initialized"})
+        send(proc, {"jsonrpc": "2.0", "id": 2, "method": "tools/list"})
+        read_response(proc, 2)
+        listed = time.perf_counter()
+    finally:
+        proc.stdin.close()
+        proc.terminate()
+        proc.wait()
+    return (initialized - start) * 1000, (listed - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark stdio server startup")
+    parser.add_argument("--runs", type=int, default=5, help="Cold starts to measure")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--first-list-budget-ms", type=float, default=FIRST_LIST_BUDGET_MS)
+    parser.add_argument("--json", action="store_true", help="Print a JSON report")
+    args = parser.parse_args()
+
+    imports = [measure_import() for _ in range(args.runs)]
+    starts = [measure_first_list() for _ in range(args.runs)]
+
+    report = {
+        "runs": args.runs,
+        "import_ms": statistics.median(imports),
+        "initialize_ms": statistics.median(s[0] for s in starts),
+        "first_tools_list_ms": statistics.median(s[1] for s in starts),
+        "budgets": {
+            "import_ms": args.import_budget_ms,
+            "first_tools_list_ms": args.first_list_budget_ms,
+        },
+    }
+    report["within_budget"] = (
+        report["import_ms"] <= args.import_budget_ms
+        and report["first_tools_list_ms"] <= args.first_list_budget_ms
+    )
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"Median of {args.runs} cold starts:")
+        print(f"  import stdio_server      {report['import_ms']:8.1f} ms  (budget {args.import_budget_ms:.0f})")
+        print(f"  initialize response      {report['initialize_ms']:8.1f} ms")
+        print(f"  first tools/list         {report['first_tools_list_ms']:8.1f} ms  (budget {args.first_list_budget_ms:.0f})")
+        print("Within budget" if report["within_budget"] else "OVER BUDGET")
+
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
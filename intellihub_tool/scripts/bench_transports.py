@@ -0,0 +1,170 @@
+"""
+Compare connection cost and per-call latency of the WebSocket and
+streamable HTTP transports against a running IntelliHub MCP server.
+
+Usage (from intellihub_tool/, with server.py running):
+    python scripts/bench_transports.py --host 127.0.0.1 --port 8000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+import websockets
+
+PROTOCOL_VERSION = "2025-06-18"
+
+INIT = {
+    "jsonrpc": "2.0",
+    "id": 0,
+    "method": "initialize",
+    "params": {
+        "protocolVersion": PROTOCOL_VERSION,
+        "clientInfo": {"name": "bench-transports", "version": "0.0.1"},
+        "capabilities": {},
+    },
+}
+INITIALIZED = {"jsonrpc": "2.0", "method": "notifications/initialized"}
+
+
+def tool_call(request_id, tool, arguments):
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "tools/call",
+        "params": {"name": tool, "arguments": arguments},
+    }
+
+
+def summarize(samples):
+    """Return mean/p50/p95/max in milliseconds for a list of second durations."""
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "mean": statistics.fmean(ms),
+        "p50": ms[len(ms) // 2],
+        "p95": ms[min(len(ms) - 1, int(len(ms) * 0.95))],
+        "max": ms[-1],
+    }
+
+
+# ---- WebSocket ----
+
+
+async def ws_connect(uri):
+    ws = await websockets.connect(uri, subprotocols=["mcp"])
+    await ws.send(json.dumps(INIT))
+    await ws.recv()
+    await ws.send(json.dumps(INITIALIZED))
+    return ws
+
+
+async def bench_websocket(uri, connections, calls, tool, arguments):
+    connect = []
+    for _ in range(connections):
+        start = time.perf_counter()
+        ws = await ws_connect(uri)
+        connect.append(time.perf_counter() - start)
+        await ws.close()
+
+    latency = []
+    ws = await ws_connect(uri)
+    try:
+        for i in range(1, calls + 1):
+            start = time.perf_counter()
+            await ws.send(json.dumps(tool_call(i, tool, arguments)))
+            await ws.recv()
+            latency.append(time.perf_counter() - start)
+    finally:
+        await ws.close()
+    return connect, latency
+
+
+# ---- Streamable HTTP ----
+
+
+def sse_payload(response):
+    """Extract the JSON-RPC message from a JSON or single-event SSE response."""
+    if response.headers.get("content-type", "").startswith("application/json"):
+        return response.json()
+    for line in response.text.splitlines():
+        if line.startswith("data:"):
+            return json.loads(line[5:])
+    raise RuntimeError(f"No JSON-RPC message in response: {response.text[:200]}")
+
+
+async def http_connect(client, url):
+    headers = {"Accept": "application/json, text/event-stream"}
+    response = await client.post(url, json=INIT, headers=headers)
+    response.raise_for_status()
+    sse_payload(response)
+    headers["Mcp-Session-Id"] = response.headers["mcp-session-id"]
+    headers["Mcp-Protocol-Version"] = PROTOCOL_VERSION
+    await client.post(url, json=INITIALIZED, headers=headers)
+    return headers
+
+
+async def bench_http(url, connections, calls, tool, arguments):
+    connect = []
+    async with httpx.AsyncClient(timeout=30) as client:
+        for _ in range(connections):
+            start = time.perf_counter()
+            headers = await http_connect(client, url)
+            connect.append(time.perf_counter() - start)
+            await client.delete(url, headers=headers)
+
+        latency = []
+        headers = await http_connect(client, url)
+        try:
+            for i in range(1, calls + 1):
+                start = time.perf_counter()
+                response = await client.post(
+                    url, json=tool_call(i, tool, arguments), headers=headers
+                )
+                sse_payload(response)
+                latency.append(time.perf_counter() - start)
+        finally:
+            await client.delete(url, headers=headers)
+    return connect, latency
+
+
+async def main(args):
+    arguments = json.loads(args.arguments)
+    results = {
+        "websocket": await bench_websocket(
+            f"ws://{args.host}:{args.port}{args.path}",
+            args.connections, args.calls, args.tool, arguments,
+        ),
+        "http": await bench_http(
+            f"http://{args.host}:{args.port}{args.path}",
+            args.connections, args.calls, args.tool, arguments,
+        ),
+    }
+
+    print(f"{args.connections} connections, {args.calls} x {args.tool}() per transport")
+    print(f"{'transport':<10} {'phase':<8} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}  (ms)")
+    for transport, (connect, latency) in results.items():
+        for phase, samples in (("connect", connect), ("call", latency)):
+            s = summarize(samples)
+            print(
+                f"{transport:<10} {phase:<8} {s['mean']:8.2f} {s['p50']:8.2f} "
+                f"{s['p95']:8.2f} {s['max']:8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MCP transports")
+    parser.add_argument("--host", default="127.0.0.1", help="Host of the MCP server")
+    parser.add_argument("--port", type=int, default=8000, help="Port of the MCP server")
+    parser.add_argument("--path", default="/mcp", help="MCP endpoint path (default: /mcp)")
+    parser.add_argument("--connections", type=int, default=50, help="Connections to open per transport")
+    parser.add_argument("--calls", type=int, default=200, help="Tool calls per transport")
+    parser.add_argument("--tool", default="list_files", help="Tool to call")
+    parser.add_argument("--arguments", default="{}", help="Tool arguments as JSON")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
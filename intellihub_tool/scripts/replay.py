@@ -0,0 +1,339 @@
+"""
+Replay tool calls recorded from real traffic (server.py --record) against a
+local IntelliHub MCP server, then report latency distributions per tool and,
+optionally, the differences from a previous replay.
+
+Calls are issued open-loop at their recorded offsets (divided by --speed), so
+hot files and repeated searches arrive as they did in production. Each
+recorded session gets its own WebSocket connection; over stdio everything
+shares the one session of the spawned stdio_server.py. With --speed 0 calls
+are sent back to back, each after the previous one returned.
+
+Replays faster than the original traffic run into the server's rate limits;
+set "rate_limits": false in config/paths.json on the server under test.
+
+Usage (from intellihub_tool/):
+    python server.py --record logs/requests.jsonl        # capture traffic
+    python scripts/replay.py logs/requests.jsonl --ws ws://127.0.0.1:8000/mcp --out before.json
+    python scripts/replay.py logs/requests.jsonl --stdio --speed 4 --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROTOCOL_VERSION = "2025-06-18"
+
+# Largest JSON-RPC line accepted from the stdio server
+STDIO_LINE_LIMIT = 64 * 1024 * 1024
+
+
+def load_recordings(paths):
+    """
+    Read recorded calls, ordered by arrival.
+
+    Several files (one per worker with --workers > 1) are merged by
+    timestamp and their offsets recomputed against the earliest call.
+    """
+    calls = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            calls.extend(json.loads(line) for line in f if line.strip())
+    if len(paths) > 1:
+        stamps = [datetime.fromisoformat(c["ts"].replace("Z", "+00:00")).timestamp() for c in calls]
+        first = min(stamps, default=0.0)
+        for call, stamp in zip(calls, stamps):
+            call["t"] = stamp - first
+    calls.sort(key=lambda c: c["t"])
+    return calls
+
+
+def percentile(sorted_ms, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_ms:
+        return None
+    return sorted_ms[min(len(sorted_ms) - 1, int(len(sorted_ms) * fraction))]
+
+
+def summarize(results):
+    """Per-tool (and overall "*") count, errors and latency distribution in ms."""
+    groups = {"*": results}
+    for result in results:
+        groups.setdefault(result["tool"], []).append(result)
+    summary = {}
+    for tool, group in sorted(groups.items()):
+        ms = sorted(r["latency_ms"] for r in group)
+        summary[tool] = {
+            "count": len(group),
+            "errors": sum(r["status"] != "ok" for r in group),
+            "mean": round(sum(ms) / len(ms), 3),
+            "p50": percentile(ms, 0.50),
+            "p90": percentile(ms, 0.90),
+            "p99": percentile(ms, 0.99),
+            "max": ms[-1],
+        }
+    return summary
+
+
+# ---- JSON-RPC connections ----
+
+
+class Connection:
+    """One initialized MCP session; calls may overlap and are matched by id."""
+
+    def __init__(self, send):
+        self._send = send
+        self._pending = {}
+        self._next_id = 0
+
+    async def initialize(self):
+        await self.request(
+            "initialize",
+            {
+                "protocolVersion": PROTOCOL_VERSION,
+                "clientInfo": {"name": "intellihub-replay", "version": "0.0.1"},
+                "capabilities": {},
+            },
+        )
+        await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+    async def request(self, method, params):
+        self._next_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[self._next_id] = future
+        await self._send({"jsonrpc": "2.0", "id": self._next_id, "method": method, "params": params})
+        return await future
+
+    def dispatch(self, message):
+        future = self._pending.pop(message.get("id"), None)
+        if future is not None and not future.done():
+            future.set_result(message)
+
+    def fail(self, error):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    async def call_tool(self, tool, arguments):
+        """Return (latency in ms, "ok" or "error", response size in bytes)."""
+        start = time.perf_counter()
+        response = await self.request("tools/call", {"name": tool, "arguments": arguments})
+        latency = (time.perf_counter() - start) * 1000
+        result = response.get("result")
+        status = "error" if "error" in response or (result or {}).get("isError") else "ok"
+        return latency, status, len(json.dumps(response.get("result", response.get("error"))))
+
+
+async def open_websocket(uri):
+    import websockets
+
+    ws = await websockets.connect(uri, subprotocols=["mcp"], max_size=None)
+    connection = Connection(lambda message: ws.send(json.dumps(message)))
+
+    async def read():
+        try:
+            async for raw in ws:
+                connection.dispatch(json.loads(raw))
+        finally:
+            connection.fail(ConnectionError("WebSocket closed"))
+
+    reader = asyncio.create_task(read())
+    await connection.initialize()
+
+    async def close():
+        await ws.close()
+        await reader
+
+    return connection, close
+
+
+async def open_stdio():
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "stdio_server.py",
+        cwd=TOOL_DIR,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        limit=STDIO_LINE_LIMIT,
+    )
+
+    async def send(message):
+        proc.stdin.write(json.dumps(message).encode("utf-8") + b"\n")
+        await proc.stdin.drain()
+
+    connection = Connection(send)
+
+    async def read():
+        try:
+            while line := await proc.stdout.readline():
+                connection.dispatch(json.loads(line))
+        finally:
+            connection.fail(ConnectionError("stdio server exited"))
+
+    reader = asyncio.create_task(read())
+    await connection.initialize()
+
+    async def close():
+        proc.stdin.close()
+        await proc.wait()
+        await reader
+
+    return connection, close
+
+
+# ---- Replay ----
+
+
+async def replay(calls, opener, per_session, speed):
+    connections = {}
+    closers = []
+
+    async def connection_for(session):
+        key = session if per_session else None
+        if key not in connections:
+            connection, close = await opener()
+            connections[key] = connection
+            closers.append(close)
+        return connections[key]
+
+    async def run(index, call, connection):
+        latency, status, size = await connection.call_tool(call["tool"], call.get("arguments") or {})
+        return {
+            "i": index,
+            "tool": call["tool"],
+            "status": status,
+            "latency_ms": round(latency, 3),
+            "result_bytes": size,
+        }
+
+    results = []
+    tasks = []
+    began = time.perf_counter()
+    try:
+        for index, call in enumerate(calls):
+            connection = await connection_for(call.get("session"))
+            if speed > 0:
+                delay = began + (call["t"] - calls[0]["t"]) / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(run(index, call, connection)))
+            else:
+                results.append(await run(index, call, connection))
+        results.extend(await asyncio.gather(*tasks))
+    finally:
+        for close in closers:
+            await close()
+    return results, time.perf_counter() - began
+
+
+def print_summary(summary):
+    print(f"{'tool':<20} {'calls':>6} {'errors':>6} {'mean':>9} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9}  (ms)")
+    for tool, s in summary.items():
+        print(
+            f"{tool:<20} {s['count']:>6} {s['errors']:>6} {s['mean']:9.2f} {s['p50']:9.2f} "
+            f"{s['p90']:9.2f} {s['p99']:9.2f} {s['max']:9.2f}"
+        )
+
+
+def _change(old, new):
+    if old is None or new is None:
+        return "n/a"
+    if old == 0:
+        return f"{new - old:+.2f}"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def print_comparison(previous, report):
+    print(f"\nCompared with {previous.get('label') or 'previous run'}:")
+    print(f"{'tool':<20} {'p50 before':>10} {'p50 after':>10} {'change':>8} {'p99 before':>10} {'p99 after':>10} {'change':>8} {'errors':>9}")
+    for tool, new in report["summary"].items():
+        old = previous["summary"].get(tool)
+        if old is None:
+            print(f"{tool:<20} {'(new)':>10}")
+            continue
+        print(
+            f"{tool:<20} {old['p50']:10.2f} {new['p50']:10.2f} {_change(old['p50'], new['p50']):>8} "
+            f"{old['p99']:10.2f} {new['p99']:10.2f} {_change(old['p99'], new['p99']):>8} "
+            f"{old['errors']:>4}->{new['errors']:<4}"
+        )
+
+    before = {r["i"]: r for r in previous["calls"]}
+    changed = [
+        (before[r["i"]], r)
+        for r in report["calls"]
+        if r["i"] in before
+        and before[r["i"]]["tool"] == r["tool"]
+        and (before[r["i"]]["status"], before[r["i"]]["result_bytes"]) != (r["status"], r["result_bytes"])
+    ]
+    print(f"\n{len(changed)} of {len(report['calls'])} calls returned a different status or result size")
+    for old, new in changed[:10]:
+        print(
+            f"  #{new['i']} {new['tool']}: {old['status']} {old['result_bytes']} B -> "
+            f"{new['status']} {new['result_bytes']} B"
+        )
+
+
+async def main(args):
+    calls = load_recordings(args.recordings)
+    if args.limit:
+        calls = calls[: args.limit]
+    if not calls:
+        raise SystemExit("No recorded calls to replay")
+
+    if args.stdio:
+        opener, transport = open_stdio, "stdio"
+    else:
+        opener, transport = (lambda: open_websocket(args.ws)), args.ws
+    results, wall = await replay(calls, opener, per_session=not args.stdio, speed=args.speed)
+
+    report = {
+        "label": args.label or f"{transport} x{args.speed:g} at {time.strftime('%Y-%m-%d %H:%M:%S')}",
+        "recordings": args.recordings,
+        "transport": transport,
+        "speed": args.speed,
+        "wall_seconds": round(wall, 3),
+        "summary": summarize(results),
+        "calls": results,
+    }
+    recorded_span = calls[-1]["t"] - calls[0]["t"]
+    print(f"Replayed {len(results)} calls in {wall:.2f} s (recorded over {recorded_span:.2f} s) via {transport}")
+    print_summary(report["summary"])
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(json.load(f), report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded IntelliHub tool calls")
+    parser.add_argument("recordings", nargs="+", help="Files written by server.py --record")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--ws", default="ws://127.0.0.1:8000/mcp", help="WebSocket endpoint of the server")
+    target.add_argument("--stdio", action="store_true", help="Spawn stdio_server.py and replay over stdio")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Time compression (2 = twice as fast); 0 sends calls back to back",
+    )
+    parser.add_argument("--limit", type=int, default=None, help="Replay only the first N calls")
+    parser.add_argument("--out", default=None, help="Write the report (JSON) here")
+    parser.add_argument("--compare", default=None, help="Report of a previous replay to compare with")
+    parser.add_argument("--label", default=None, help="Name of this run in later comparisons")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
@@ -2,97 +2,307 @@ import asyncio
 import json
 import os
 import argparse
+import contextlib
+import contextvars
+import mimetypes
+import time
+import weakref
+from urllib.parse import quote, unquote
+from pydantic import AnyUrl
 from mcp.server import Server
+from mcp.server.lowlevel import NotificationOptions
+from mcp.server.lowlevel.helper_types import ReadResourceContents
 from mcp import types
-from mcp.server.websocket import websocket_server
-from starlette.applications import Starlette
-from starlette.routing import WebSocketRoute, Route
-from starlette.responses import JSONResponse
-from starlette.middleware import Middleware
-from starlette.middleware.cors import CORSMiddleware
-
 
+# The HTTP stack (Starlette, CORS, WebSocket and streamable HTTP transports)
+# is imported inside _build_app() and mcp_endpoint(), so stdio_server.py can
+# import this module without paying for it.
 
 import tool as tool_impl
+from access_log import AccessLog, CallRecorder
+from cancellation import CancelToken, OperationCancelled, cancel_scope
+from encoding import ResultEncoder
+from prefetch import READER
+from roots import pinned
+from scheduling import FairScheduler, RateLimiter, RateLimitError
 
 # Load manifest
 MANIFEST_PATH = os.path.join(os.path.dirname(__file__), "manifest.json")
 with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
     MANIFEST = json.load(f)
 
+
+class IntelliHubServer(Server):
+    """MCP server that advertises resource subscriptions on every transport."""
+
+    def create_initialization_options(
+        self, notification_options=None, experimental_capabilities=None
+    ):
+        options = super().create_initialization_options(
+            notification_options or NotificationOptions(resources_changed=True),
+            experimental_capabilities,
+        )
+        # The lowlevel server never advertises subscriptions on its own.
+        if options.capabilities.resources is not None:
+            options.capabilities.resources.subscribe = True
+        return options
+
+
 # Create MCP server
-mcp = Server(
+mcp = IntelliHubServer(
     name=MANIFEST["name"],
     version=MANIFEST["version"],
 )
 
+# ---- Corpus watchers and shared indexes ----
+
+
+def get_watcher(root=None):
+    """Return the corpus watcher of a knowledge root (default root if omitted)."""
+    return tool_impl.get_root(root).watcher
+
+
+def start_index():
+    """Map or build every root's shared index and warm it in the background."""
+    tool_impl.start_indexing()
+
+
+async def _on_initialized(notification):
+    # Warm the index only once the handshake is done, so a freshly spawned
+    # stdio server answers initialize and tools/list without competing with
+    # the corpus scan.
+    start_index()
+
+
+mcp.notification_handlers[types.InitializedNotification] = _on_initialized
+
+
 # ---- Tool implementations ----
 
 
-async def list_files():
-    return await asyncio.to_thread(tool_impl.list_files)
+async def list_files(root: str = None, sizes: bool = False, filters: dict = None):
+    return await asyncio.to_thread(tool_impl.list_files, root, sizes, filters)
+
+
+async def read_file(path: str, root: str = None, max_tokens: int = None):
+    return await asyncio.to_thread(tool_impl.read_file, path, root, max_tokens)
+
+
+async def get_section(path: str, heading: str, root: str = None, max_tokens: int = None):
+    return await asyncio.to_thread(tool_impl.get_section, path, heading, root, max_tokens)
+
+
+async def search(
+    query: str, root: str = None, filters: dict = None, context_lines: int = 0, highlight: bool = False
+):
+    return await asyncio.to_thread(tool_impl.search, query, root, filters, context_lines, highlight)
+
+
+async def similar(query_or_path: str, top_k: int = 5, root: str = None):
+    return await asyncio.to_thread(tool_impl.similar, query_or_path, top_k, root)
+
+
+async def suggest(prefix: str, limit: int = 10, root: str = None):
+    return await asyncio.to_thread(tool_impl.suggest, prefix, limit, root)
+
 
+async def related(path: str, depth: int = 1, root: str = None):
+    return await asyncio.to_thread(tool_impl.related, path, depth, root)
 
-async def read_file(path: str):
-    return await asyncio.to_thread(tool_impl.read_file, path)
 
+async def get_schema(name: str, root: str = None):
+    return await asyncio.to_thread(tool_impl.get_schema, name, root)
 
-async def search(query: str):
-    return await asyncio.to_thread(tool_impl.search, query)
 
+async def get_module_purpose(name: str, root: str = None):
+    return await asyncio.to_thread(tool_impl.get_module_purpose, name, root)
 
-async def get_schema(name: str):
-    return await asyncio.to_thread(tool_impl.get_schema, name)
 
+async def diagnose(root: str = None):
+    return await asyncio.to_thread(tool_impl.diagnose, root)
 
-async def get_module_purpose(name: str):
-    return await asyncio.to_thread(tool_impl.get_module_purpose, name)
 
+async def list_roots():
+    return await asyncio.to_thread(tool_impl.list_roots)
 
-async def diagnose():
-    return await asyncio.to_thread(tool_impl.diagnose)
+
+async def export_snapshot(root: str = None, since: str = None):
+    return await asyncio.to_thread(tool_impl.export_snapshot, root, since)
 
 
 # Dictionary to map tool names to functions
 TOOL_IMPLEMENTATIONS = {
     "list_files": list_files,
     "read_file": read_file,
+    "get_section": get_section,
     "search": search,
+    "similar": similar,
+    "suggest": suggest,
+    "related": related,
     "get_schema": get_schema,
     "get_module_purpose": get_module_purpose,
     "diagnose": diagnose,
+    "list_roots": list_roots,
+    "export_snapshot": export_snapshot,
+}
+
+# Every tool except list_roots takes an optional knowledge root name.
+ROOT_PROPERTY = {
+    "type": "string",
+    "description": "Knowledge root to use (see list_roots); defaults to the default root.",
+}
+
+MAX_TOKENS_PROPERTY = {
+    "type": "integer",
+    "minimum": 1,
+    "description": "Approximate token budget; longer text is cut at a section or paragraph boundary.",
+}
+
+FILTERS_PROPERTY = {
+    "type": "object",
+    "additionalProperties": {
+        "anyOf": [{"type": "string"}, {"type": "array", "items": {"type": "string"}}]
+    },
+    "description": (
+        "Front-matter filters, e.g. {\"module\": \"mon_forge\", \"status\": \"canonical\"}; "
+        "a list value matches any of its entries. Only matching files are considered."
+    ),
+}
+
+# Tools whose list results may come in pages (see encoding.py)
+CURSOR_PROPERTY = {
+    "type": "string",
+    "description": "next_cursor of the previous page; repeat the other arguments unchanged.",
 }
 
 TOOLS = [
     types.Tool(
         name="list_files",
         description="Returns a list of all files within the ai_context directory.",
-        inputSchema={"type": "object", "properties": {}, "required": []},
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "root": ROOT_PROPERTY,
+                "sizes": {
+                    "type": "boolean",
+                    "description": "Return path, bytes and estimated tokens for each file.",
+                },
+                "filters": FILTERS_PROPERTY,
+                "cursor": CURSOR_PROPERTY,
+            },
+            "required": [],
+        },
     ),
     types.Tool(
         name="read_file",
         description="Reads and returns the contents of a Markdown file.",
         inputSchema={
             "type": "object",
-            "properties": {"path": {"type": "string"}},
+            "properties": {
+                "path": {"type": "string"},
+                "root": ROOT_PROPERTY,
+                "max_tokens": MAX_TOKENS_PROPERTY,
+            },
             "required": ["path"],
         },
     ),
+    types.Tool(
+        name="get_section",
+        description="Returns one section (a heading and its subsections) of a Markdown file.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "path": {"type": "string"},
+                "heading": {"type": "string"},
+                "root": ROOT_PROPERTY,
+                "max_tokens": MAX_TOKENS_PROPERTY,
+            },
+            "required": ["path", "heading"],
+        },
+    ),
     types.Tool(
         name="search",
-        description="Searches across all Markdown files and returns matching snippets.",
+        description=(
+            "Searches across all Markdown files and returns matching snippets, optionally "
+            "with surrounding lines (nearby matches merged into one window) and match offsets."
+        ),
         inputSchema={
             "type": "object",
-            "properties": {"query": {"type": "string"}},
+            "properties": {
+                "query": {"type": "string"},
+                "root": ROOT_PROPERTY,
+                "filters": FILTERS_PROPERTY,
+                "context_lines": {
+                    "type": "integer",
+                    "minimum": 0,
+                    "maximum": 20,
+                    "default": 0,
+                    "description": "Lines of context on each side of a match, returned as 'context'.",
+                },
+                "highlight": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Add 'highlights': [start, end] offsets of each match in the snippet or context.",
+                },
+                "cursor": CURSOR_PROPERTY,
+            },
             "required": ["query"],
         },
     ),
+    types.Tool(
+        name="similar",
+        description=(
+            "Finds the Markdown passages most similar to a query or to a file by TF-IDF "
+            "cosine similarity; catches related wording that substring search misses."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query_or_path": {"type": "string"},
+                "top_k": {"type": "integer", "minimum": 1, "maximum": 50, "default": 5},
+                "root": ROOT_PROPERTY,
+                "cursor": CURSOR_PROPERTY,
+            },
+            "required": ["query_or_path"],
+        },
+    ),
+    types.Tool(
+        name="suggest",
+        description=(
+            "Autocompletes a search term: returns indexed terms starting with a prefix and "
+            "the number of files each appears in, most widely used first."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "prefix": {"type": "string"},
+                "limit": {"type": "integer", "minimum": 1, "maximum": 100, "default": 10},
+                "root": ROOT_PROPERTY,
+                "cursor": CURSOR_PROPERTY,
+            },
+            "required": ["prefix"],
+        },
+    ),
+    types.Tool(
+        name="related",
+        description="Lists files linked to or from a file, following Markdown links up to depth hops.",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "path": {"type": "string"},
+                "depth": {"type": "integer", "minimum": 1, "maximum": 3, "default": 1},
+                "root": ROOT_PROPERTY,
+                "cursor": CURSOR_PROPERTY,
+            },
+            "required": ["path"],
+        },
+    ),
     types.Tool(
         name="get_schema",
         description="Returns the contents of a schema file from the schemas directory.",
         inputSchema={
             "type": "object",
-            "properties": {"name": {"type": "string"}},
+            "properties": {"name": {"type": "string"}, "root": ROOT_PROPERTY},
             "required": ["name"],
         },
     ),
@@ -101,15 +311,39 @@ TOOLS = [
         description="Returns the contents of a module purpose file.",
         inputSchema={
             "type": "object",
-            "properties": {"name": {"type": "string"}},
+            "properties": {"name": {"type": "string"}, "root": ROOT_PROPERTY},
             "required": ["name"],
         },
     ),
     types.Tool(
         name="diagnose",
         description="Performs a full health check of the IntelliHub knowledge capsule.",
+        inputSchema={"type": "object", "properties": {"root": ROOT_PROPERTY}, "required": []},
+    ),
+    types.Tool(
+        name="list_roots",
+        description="Lists the configured knowledge roots with their index and cache status.",
         inputSchema={"type": "object", "properties": {}, "required": []},
     ),
+    types.Tool(
+        name="export_snapshot",
+        description=(
+            "Exports the whole capsule as a base64 .tar.gz with a manifest of file hashes. "
+            "Pass the manifest_hash of an earlier export as since to get only the files that "
+            "changed, plus the list of removed paths. Large capsules: use GET /export instead."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "root": ROOT_PROPERTY,
+                "since": {
+                    "type": "string",
+                    "description": "manifest_hash of the export the client already has.",
+                },
+            },
+            "required": [],
+        },
+    ),
 ]
 
 
@@ -118,24 +352,347 @@ async def list_tools_handler():
     return TOOLS
 
 
+# ---- Rate limits and fair scheduling ----
+
+RATE_LIMITER = RateLimiter()
+SCHEDULER = FairScheduler()
+# Structured per-call log, written off the event loop
+ACCESS_LOG = AccessLog()
+# Every call with its arguments, for scripts/replay.py (server.py --record;
+# the environment variable reaches uvicorn workers and stdio_server.py too)
+RECORDER = CallRecorder()
+if os.environ.get("INTELLIHUB_RECORD"):
+    RECORDER.start(os.environ["INTELLIHUB_RECORD"])
+# Compact, paged encoding of results (see encoding.py)
+ENCODER = ResultEncoder()
+# session -> {root: RootView} its calls read through while session_pin_seconds
+# is set, so consecutive calls see the same index generation (see roots.pinned)
+SESSION_VIEWS = weakref.WeakKeyDictionary()
+
+# Seconds a call may run before its scan stops at the next cancellation check
+TOOL_TIMEOUTS = {"search": 30.0, "similar": 30.0, "diagnose": 60.0, "export_snapshot": 60.0}
+DEFAULT_TOOL_TIMEOUT = 10.0
+
+# Calls stopped early: by their deadline, or because the client cancelled
+# the request or disconnected
+CALL_STOPS = {"timed_out": 0, "cancelled": 0}
+
+# Remote host of the WebSocket connection being served. WebSocket requests
+# carry no request object, so mcp_endpoint() sets this when it accepts the
+# connection; the handlers of its messages run in tasks that inherit it.
+WEBSOCKET_PEER = contextvars.ContextVar("intellihub_websocket_peer", default=None)
+
+
+def _client_key(ctx):
+    """
+    Identify the client behind a request: the remote address (HTTP and
+    WebSocket), else the client name (stdio).
+    """
+    client = getattr(ctx.request, "client", None)
+    if client is not None and client.host:
+        return f"addr:{client.host}"
+    peer = WEBSOCKET_PEER.get()
+    if peer is not None:
+        return f"addr:{peer}"
+    params = ctx.session.client_params
+    if params is not None:
+        return f"app:{params.clientInfo.name}"
+    return "local"
+
+
+def metrics():
+    """Rate limiter, scheduler and access log counters of this process."""
+    return {
+        "rate_limits": RATE_LIMITER.stats(),
+        "access_log": ACCESS_LOG.stats(),
+        "scheduler": SCHEDULER.stats(),
+        "stopped_calls": dict(CALL_STOPS),
+        "results": ENCODER.stats(),
+    }
+
+
+def _session_key(ctx):
+    """Mcp-Session-Id of streamable HTTP requests, else the session object's id."""
+    headers = getattr(ctx.request, "headers", None)
+    session_id = headers.get("mcp-session-id") if headers is not None else None
+    return session_id or f"{id(ctx.session):x}"
+
+
+def _session_views(session, seconds):
+    """
+    The views a session's calls are pinned to, or None to pin each call on its own.
+
+    A view older than seconds is dropped, so the call after it takes a fresh one
+    of the then current generation.
+    """
+    if not seconds:
+        SESSION_VIEWS.pop(session, None)
+        return None
+    views = SESSION_VIEWS.setdefault(session, {})
+    now = time.monotonic()
+    for root, view in list(views.items()):
+        if now - view.taken_at >= seconds:
+            views.pop(root, None)
+    return views
+
+
 @mcp.call_tool()
 async def call_tool_handler(name: str, arguments: dict):
     tool_func = TOOL_IMPLEMENTATIONS.get(name)
     if not tool_func:
         raise ValueError(f"Tool '{name}' not found.")
 
-    result = await tool_func(**arguments)
+    ctx = mcp.request_context
+    client = _client_key(ctx)
+    config = tool_impl.load_config()
+    ACCESS_LOG.configure(config.get("access_log"))
+    RATE_LIMITER.configure(config.get("rate_limits"))
+    ENCODER.configure(config.get("result_encoding"))
+    views = _session_views(ctx.session, config.get("session_pin_seconds", 0))
+    # The cursor selects a page of the result; the tool never sees it.
+    cursor = arguments.get("cursor")
+    tool_arguments = {key: value for key, value in arguments.items() if key != "cursor"}
+    received = time.perf_counter()
+    started = None
+    status, result, text, error = "error", None, None, None
+    # The worker thread checks the token between files. Cancelling this task
+    # (notifications/cancelled, or the WebSocket closing) cancels the token
+    # on the way out, so abandoned scans stop instead of running to the end.
+    # Throttle and queue waits are plain awaits that cancellation interrupts
+    # by itself; the deadline only covers the call once it has a slot.
+    token = None
+    # Read sequences are learned per session (see prefetch.py).
+    reader = READER.set(_session_key(ctx))
+    try:
+        try:
+            wait = RATE_LIMITER.admit(name, ctx.session, client)
+        except RateLimitError:
+            status = "rejected"
+            raise
+        if wait:
+            await asyncio.sleep(wait)
+        # Stateless HTTP opens a session per request, so take turns by client.
+        async with SCHEDULER.slot(client if HTTP_STATELESS else ctx.session):
+            started = time.perf_counter()
+            token = CancelToken(TOOL_TIMEOUTS.get(name, DEFAULT_TOOL_TIMEOUT))
+            # The worker thread inherits the pins along with the context.
+            with cancel_scope(token), pinned(views):
+                if cursor is not None:
+                    result = ENCODER.resume(name, tool_arguments, cursor)
+                if result is None:
+                    result = await tool_func(**tool_arguments)
+        text = ENCODER.encode(name, tool_arguments, result, cursor)
+        status = "ok"
+    except OperationCancelled as e:
+        CALL_STOPS["timed_out"] += 1
+        status, error = "timeout", str(e)
+        raise TimeoutError(f"Tool '{name}' stopped: {e}") from None
+    except asyncio.CancelledError:
+        CALL_STOPS["cancelled"] += 1
+        status = "cancelled"
+        raise
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        READER.reset(reader)
+        if token is not None:
+            token.cancel()
+        finished = time.perf_counter()
+        if started is None:
+            started = finished
+        # A queue put; the result is measured and written on the log thread.
+        ACCESS_LOG.record(
+            name,
+            status,
+            session=_session_key(ctx),
+            client=client,
+            wait_ms=round((started - received) * 1000, 2),
+            latency_ms=round((finished - started) * 1000, 2),
+            # The text sent: measuring it costs no second serialization, and
+            # result_bytes is what went on the wire (one page when paged).
+            result=text,
+            error=error,
+        )
+        if RECORDER.active:
+            RECORDER.record(
+                received,
+                name,
+                arguments,
+                session=_session_key(ctx),
+                status=status,
+                latency_ms=round((finished - started) * 1000, 2),
+                result=text,
+            )
+
+    # One text block: text results as they are, anything else as compact JSON,
+    # never also as structuredContent (which would send it twice).
+    return [types.TextContent(type="text", text=text)]
+
+
+# ---- Resources ----
+
+RESOURCE_SCHEME = "intellihub"
+RESOURCE_PAGE_SIZE = 100
+
+# (root name, relative path) -> sessions subscribed to updates of that file
+SUBSCRIPTIONS = {}
+# Sessions that listed resources and get notified when files come and go
+LISTING_SESSIONS = weakref.WeakSet()
+
+_watch_loop = None
+
+
+def resource_uri(path, root=None):
+    """
+    Map a path relative to a root to its resource URI.
+
+    Files of the default root use intellihub:///<path>; other roots put their
+    name in the authority: intellihub://<root>/<path>.
+    """
+    default = tool_impl.get_root().name
+    authority = "" if root is None or root == default else root
+    return f"{RESOURCE_SCHEME}://{authority}/{quote(path)}"
+
+
+def resource_path(uri):
+    """Map a resource URI back to (root name, path relative to that root)."""
+    uri = str(uri)
+    prefix = f"{RESOURCE_SCHEME}://"
+    if not uri.startswith(prefix) or "/" not in uri[len(prefix):]:
+        raise ValueError(f"Unknown resource URI: {uri}")
+    authority, _, path = uri[len(prefix):].partition("/")
+    root = tool_impl.get_root(authority or None).name
+    return root, unquote(path)
+
+
+def _mime_type(path):
+    if path.endswith(".md"):
+        return "text/markdown"
+    return mimetypes.guess_type(path)[0] or "text/plain"
+
+
+def _ensure_watching():
+    """Start the corpus watchers the first time a session needs change events."""
+    global _watch_loop
+    if _watch_loop is not None:
+        return
+    _watch_loop = asyncio.get_running_loop()
+    tool_impl.load_config()
+    tool_impl.add_root_listener(_on_roots_changed)
+    _on_roots_changed(tool_impl.get_roots(), [])
+
+
+def _on_roots_changed(added, removed):
+    # Files of a root the reload dropped never change again; forget their
+    # subscriptions (a root re-added under the same name keeps its URIs).
+    gone = {root.name for root in removed} - {root.name for root in added}
+    for key in [key for key in SUBSCRIPTIONS if key[0] in gone]:
+        del SUBSCRIPTIONS[key]
+    for root in added:
+        root.watcher.add_listener(lambda changes, generation, name=root.name: _on_corpus_change(name, changes))
+        root.watcher.start()
+    if _watch_loop is not None and (added or removed):
+        asyncio.run_coroutine_threadsafe(_broadcast_list_changed(), _watch_loop)
+
+
+def _on_corpus_change(root, changes):
+    # Called on the watcher thread; hand the fan-out to the event loop.
+    asyncio.run_coroutine_threadsafe(_broadcast_changes(root, changes), _watch_loop)
+
+
+async def _broadcast_changes(root, changes):
+    changed = changes["added"] | changes["modified"] | changes["removed"]
+    for path in sorted(changed):
+        sessions = SUBSCRIPTIONS.get((root, path))
+        if not sessions:
+            continue
+        uri = AnyUrl(resource_uri(path, root))
+        for session in list(sessions):
+            try:
+                await session.send_resource_updated(uri)
+            except Exception:
+                # The session went away; stop notifying it.
+                sessions.discard(session)
+
+    if changes["added"] or changes["removed"]:
+        await _broadcast_list_changed()
+
+
+async def _broadcast_list_changed():
+    for session in list(LISTING_SESSIONS):
+        try:
+            await session.send_resource_list_changed()
+        except Exception:
+            LISTING_SESSIONS.discard(session)
+
+
+def _all_resources():
+    """Every (root name, path) pair, default root first."""
+    return [
+        (root.name, path)
+        for root in tool_impl.get_roots()
+        for path in sorted(tool_impl.list_files(root.name))
+    ]
+
+
+@mcp.list_resources()
+async def list_resources_handler(request: types.ListResourcesRequest):
+    _ensure_watching()
+    LISTING_SESSIONS.add(mcp.request_context.session)
+
+    cursor = request.params.cursor if request.params else None
+    try:
+        start = int(cursor) if cursor else 0
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+    files = await asyncio.to_thread(_all_resources)
+    default = tool_impl.get_root().name
+    page = files[start : start + RESOURCE_PAGE_SIZE]
+    end = start + len(page)
+
+    return types.ListResourcesResult(
+        resources=[
+            types.Resource(
+                uri=resource_uri(path, root),
+                name=path if root == default else f"{root}/{path}",
+                mimeType=_mime_type(path),
+            )
+            for root, path in page
+        ],
+        nextCursor=str(end) if end < len(files) else None,
+    )
+
+
+@mcp.read_resource()
+async def read_resource_handler(uri: AnyUrl):
+    root, path = resource_path(uri)
+    content = await asyncio.to_thread(tool_impl.read_file, path, root)
+    return [ReadResourceContents(content=content, mime_type=_mime_type(path))]
+
+
+@mcp.subscribe_resource()
+async def subscribe_resource_handler(uri: AnyUrl):
+    _ensure_watching()
+    key = resource_path(uri)
+    SUBSCRIPTIONS.setdefault(key, weakref.WeakSet()).add(mcp.request_context.session)
 
-    if isinstance(result, str):
-        return [types.TextContent(type="text", text=result)]
-    else:
-        # For list_files, search, diagnose, the result is JSON-serializable.
-        # This will be returned as structuredContent, and also as a JSON string in content.
-        return {"result": result}
+
+@mcp.unsubscribe_resource()
+async def unsubscribe_resource_handler(uri: AnyUrl):
+    sessions = SUBSCRIPTIONS.get(resource_path(uri))
+    if sessions is not None:
+        sessions.discard(mcp.request_context.session)
 
 
 async def mcp_endpoint(websocket):
     """MCP WebSocket endpoint."""
+    from mcp.server.websocket import websocket_server
+
+    client = websocket.scope.get("client")
+    if client and client[0]:
+        WEBSOCKET_PEER.set(client[0])
     async with websocket_server(websocket.scope, websocket.receive, websocket.send) as (
         read_stream,
         write_stream,
@@ -147,28 +704,145 @@ async def mcp_endpoint(websocket):
         )
 
 
+# Stateful HTTP sessions live in a single process. With several workers a
+# follow-up request can land on any of them, so HTTP goes stateless.
+HTTP_STATELESS = int(os.environ.get("INTELLIHUB_WORKERS", "1")) > 1
+
+# Created together with the app by _build_app().
+http_session_manager = None
+
+
+class StreamableHTTPEndpoint:
+    """ASGI endpoint handing HTTP requests to the streamable HTTP session manager."""
+
+    async def __call__(self, scope, receive, send):
+        await http_session_manager.handle_request(scope, receive, send)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    start_index()
+    async with http_session_manager.run():
+        yield
+
+
 async def health_check(request):
     """Health check endpoint."""
+    from starlette.responses import JSONResponse
+
     return JSONResponse({"status": "ok"})
 
 
-routes = [
-    WebSocketRoute("/mcp", mcp_endpoint),
-    Route("/health", health_check),
-]
+def readiness():
+    """Warm-up state of every root; ready once all of them are warm."""
+    roots = [
+        {
+            "name": r.name,
+            "ready": r.ready,
+            "warmup": r.warmup_status(),
+            "index": r.index.status() if r.index else None,
+            "cache": r.cache.stats(),
+        }
+        for r in tool_impl.get_roots()
+    ]
+    return {"ready": bool(roots) and all(r["ready"] for r in roots), "roots": roots}
 
-# Enables CORS
-middleware = [
-    Middleware(
-        CORSMiddleware,
-        allow_origins=['*'],
-        allow_credentials=True,
-        allow_methods=['*'],
-        allow_headers=['*']
-    )
-]
 
-app = Starlette(routes=routes, middleware=middleware)
+async def ready_check(request):
+    """
+    Readiness endpoint: 200 once every root is warm, 503 until then.
+
+    Tools answer before that (reading the disk directly), just more slowly,
+    so /health stays the liveness check.
+    """
+    from starlette.responses import JSONResponse
+
+    try:
+        report = await asyncio.to_thread(readiness)
+    except RuntimeError as e:
+        report = {"ready": False, "error": str(e)}
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+async def export_endpoint(request):
+    """
+    Stream the capsule as a .tar.gz: GET /export?root=NAME&since=MANIFEST_HASH.
+
+    The X-IntelliHub-Manifest-Hash header carries the hash to pass as since
+    next time; X-IntelliHub-Export says whether the body is a full archive
+    or a delta bundle.
+    """
+    from starlette.responses import JSONResponse, StreamingResponse
+
+    root, since = request.query_params.get("root"), request.query_params.get("since")
+    try:
+        info, chunks = await asyncio.to_thread(lambda: tool_impl.get_root(root).exporter().open(since))
+    except (ValueError, RuntimeError) as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    name = f"{info['root']}-{info['manifest_hash'][:12]}{'' if info['full'] else '-delta'}.tar.gz"
+    headers = {
+        "Content-Length": str(info["bytes"]),
+        "Content-Disposition": f'attachment; filename="{name}"',
+        "X-IntelliHub-Manifest-Hash": info["manifest_hash"],
+        "X-IntelliHub-Export": "full" if info["full"] else "delta",
+    }
+    return StreamingResponse(chunks, media_type="application/gzip", headers=headers)
+
+
+async def metrics_endpoint(request):
+    """Rate limiting and scheduling metrics of the worker that answers."""
+    from starlette.responses import JSONResponse
+
+    return JSONResponse(metrics())
+
+
+def _build_app():
+    global http_session_manager
+    from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+    from starlette.applications import Starlette
+    from starlette.routing import WebSocketRoute, Route
+    from starlette.middleware import Middleware
+    from starlette.middleware.cors import CORSMiddleware
+
+    # Streamable HTTP transport. Each client gets an Mcp-Session-Id on
+    # initialize and reuses it on later POSTs; server-to-client messages
+    # (including resource notifications) are streamed back over SSE.
+    http_session_manager = StreamableHTTPSessionManager(app=mcp, stateless=HTTP_STATELESS)
+
+    # WebSocket and streamable HTTP clients share the /mcp path; Starlette
+    # routes by scope type.
+    routes = [
+        WebSocketRoute("/mcp", mcp_endpoint),
+        Route("/mcp", StreamableHTTPEndpoint()),
+        Route("/health", health_check),
+        Route("/ready", ready_check),
+        Route("/metrics", metrics_endpoint),
+        Route("/export", export_endpoint),
+    ]
+
+    # Enables CORS
+    middleware = [
+        Middleware(
+            CORSMiddleware,
+            allow_origins=['*'],
+            allow_credentials=True,
+            allow_methods=['*'],
+            allow_headers=['*'],
+            expose_headers=['Mcp-Session-Id', 'X-IntelliHub-Manifest-Hash', 'X-IntelliHub-Export'],
+        )
+    ]
+
+    return Starlette(routes=routes, middleware=middleware, lifespan=lifespan)
+
+
+def __getattr__(name):
+    # "server:app" is built on first access (PEP 562), e.g. when uvicorn
+    # loads it.
+    if name == "app":
+        global app
+        app = _build_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
@@ -176,11 +850,36 @@ if __name__ == "__main__":
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind")
     parser.add_argument("--port", type=int, default=8000, help="Port to bind")
     parser.add_argument("--reload", action="store_true", help="Enable autoreload")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes; they share one memory-mapped index",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        default=None,
+        help="Append every tool call with its arguments to PATH (JSON lines) for scripts/replay.py",
+    )
     args = parser.parse_args()
 
+    if args.reload and args.workers > 1:
+        parser.error("--reload cannot be combined with --workers")
+    os.environ["INTELLIHUB_WORKERS"] = str(args.workers)
+    if args.record:
+        os.environ["INTELLIHUB_RECORD"] = os.path.abspath(args.record)
+
     try:
         import uvicorn
     except ImportError:  # pragma: no cover - import-time guard
         raise SystemExit("uvicorn is required: pip install uvicorn")
 
-    uvicorn.run("server:app", host=args.host, port=args.port, reload=args.reload, factory=False)
+    uvicorn.run(
+        "server:app",
+        host=args.host,
+        port=args.port,
+        reload=args.reload,
+        workers=args.workers,
+        factory=False,
+    )
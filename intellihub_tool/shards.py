@@ -0,0 +1,452 @@
+"""
+Sharded index: the corpus split by path hash into shards that worker
+processes build and search independently.
+
+With "shards": N on a root, every file belongs to shard crc32(path) % N. Each
+shard is an ordinary shared snapshot (see index.py) in its own directory,
+``<index_dir>/shard-<i>-of-<N>``, owned by a worker process that rebuilds it
+when files of that shard change. A change only invalidates its own shard, so
+a rebuild re-reads a fraction of the capsule and the other shards keep
+serving their current snapshots.
+
+search() is scatter-gather: the query goes to every shard worker at once,
+each scans its own mapped snapshot on its own core, and the per-shard results,
+already ordered by path, are merged into the order an unsharded search
+returns. A worker whose shard is being rebuilt answers from the disk for its
+files, so a rebuild never blocks a query.
+
+The parent process maps every shard read-only as well (build=False), and
+snapshot() offers them as one ShardedSnapshot for the other tools while all
+shards are current.
+"""
+import hashlib
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import zlib
+
+from cancellation import check_cancelled
+from index import SharedIndex, fingerprint
+from snippets import search_text
+
+# Workers are spawned, not forked: the parent runs threads (watcher, event
+# loop) that a fork would copy in an arbitrary state.
+CONTEXT = multiprocessing.get_context("spawn")
+# How long stop() waits for a worker before terminating it
+STOP_TIMEOUT = 2.0
+# How often a pending gather checks for cancellation
+GATHER_POLL = 0.05
+
+
+def shard_of(path, count):
+    """Return the shard (0..count-1) that owns a relative path."""
+    return zlib.crc32(path.encode("utf-8")) % count
+
+
+def partition(paths, count):
+    """
+    Split paths by owning shard.
+
+    Args:
+        paths: {path: value} dict (kept as dicts) or any iterable of paths
+        count: Number of shards
+
+    Returns:
+        List of count dicts (for a dict) or sets of paths
+    """
+    if isinstance(paths, dict):
+        parts = [{} for _ in range(count)]
+        for path, value in paths.items():
+            parts[shard_of(path, count)][path] = value
+    else:
+        parts = [set() for _ in range(count)]
+        for path in paths:
+            parts[shard_of(path, count)].add(path)
+    return parts
+
+
+def shard_dir(index_dir, shard, count):
+    return os.path.join(index_dir, f"shard-{shard}-of-{count}")
+
+
+class ShardedSnapshot:
+    """
+    Read-only view over one current snapshot per shard, with the interface of
+    IndexSnapshot.
+
+    Lookups go straight to the owning shard; paths and entries are merged
+    once per combination of shard generations.
+    """
+
+    def __init__(self, snapshots):
+        self.shards = snapshots
+        # Sums of per-shard generations only grow, like a single snapshot's.
+        self.generation = sum(s.generation for s in snapshots)
+        self.fingerprint = hashlib.sha1(
+            "".join(s.fingerprint for s in snapshots).encode("ascii")
+        ).hexdigest()
+        self.built_at = max(s.built_at for s in snapshots)
+        self.paths = list(heapq.merge(*(s.paths for s in snapshots)))
+        self.entries = {}
+        for snapshot in snapshots:
+            self.entries.update(snapshot.entries)
+
+    def _shard(self, path):
+        return self.shards[shard_of(path, len(self.shards))]
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def stats(self, path):
+        return self.entries.get(path)
+
+    def read_bytes(self, path):
+        return self._shard(path).read_bytes(path)
+
+    def read_text(self, path):
+        return self._shard(path).read_text(path)
+
+    def line_starts(self, path):
+        return self._shard(path).line_starts(path)
+
+    def iter_markdown(self):
+        for path in self.paths:
+            if path.endswith(".md"):
+                text = self.read_text(path)
+                if text is not None:
+                    yield path, text
+
+
+# ---- Worker process ----
+
+
+def _read_disk(root, real_root, path):
+    full_path = os.path.realpath(os.path.join(root, path))
+    if not full_path.startswith(real_root + os.sep):
+        return None
+    try:
+        with open(full_path, "r", encoding="utf-8") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def _search_shard(index, root, real_root, state, query, paths, context_lines, highlight):
+    """Search one shard's Markdown files (or only paths), in path order."""
+    files = state["files"]
+    snapshot = index.snapshot()
+    if snapshot is not None and snapshot.fingerprint != state["wanted"]:
+        # A newer scan arrived and its rebuild has not started yet.
+        snapshot = None
+    if paths is None:
+        paths = snapshot.paths if snapshot is not None else sorted(files)
+        paths = [p for p in paths if p.endswith(".md")]
+    else:
+        paths = sorted(paths)
+    results = []
+    for path in paths:
+        starts = None
+        if snapshot is not None:
+            try:
+                text = snapshot.read_text(path)
+            except UnicodeDecodeError:
+                continue
+            starts = snapshot.line_starts(path)
+        else:
+            # Being rebuilt (or built by a peer): read this shard's files directly.
+            text = _read_disk(root, real_root, path) if path in files else None
+        if text is not None:
+            results.extend(search_text(path, text, query, starts, context_lines, highlight))
+    return results
+
+
+def _serve(conn, root, index_dir):
+    """
+    Worker main loop: build the shard in a background thread and answer
+    queries on this one.
+
+    Messages are ("scan", files), ("search", request_id, query, paths,
+    context_lines, highlight), ("status", request_id) and ("stop",). Replies
+    are (request_id, "ok", value) or (request_id, "error", message).
+    """
+    index = SharedIndex(root, index_dir, watcher=None)
+    real_root = os.path.realpath(root)
+    state = {"files": {}, "wanted": None, "pending": None}
+    wake = threading.Event()
+
+    def build():
+        while True:
+            wake.wait()
+            wake.clear()
+            files, state["pending"] = state["pending"], None
+            if files is not None:
+                try:
+                    index.refresh(files)
+                except OSError:
+                    # Leave the shard stale; searches keep reading the disk
+                    # and the next scan retries.
+                    pass
+
+    threading.Thread(target=build, name="intellihub-shard-build", daemon=True).start()
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            return
+        kind = message[0]
+        if kind == "stop":
+            return
+        if kind == "scan":
+            state["files"] = state["pending"] = message[1]
+            state["wanted"] = fingerprint(message[1])
+            wake.set()
+            continue
+        request_id = message[1]
+        try:
+            if kind == "search":
+                value = _search_shard(index, root, real_root, state, *message[2:])
+            else:
+                value = dict(index.status(), pid=os.getpid())
+            conn.send((request_id, "ok", value))
+        except Exception as e:
+            conn.send((request_id, "error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    """Parent-side handle of one shard's process and pipe."""
+
+    def __init__(self, root, index_dir):
+        self.root = root
+        self.index_dir = index_dir
+        self.process = None
+        self.conn = None
+        # Last scan sent, resent to a respawned worker
+        self.files = None
+        # Held to send, and to spawn or stop the process
+        self.lock = threading.Lock()
+        # Held by the one thread reading replies off the pipe
+        self._recv_lock = threading.Lock()
+        # request_id -> pipe it was sent on, for requests awaiting a reply
+        self._waiting = {}
+        # request_id -> (status, value) read by another request's thread
+        self._replies = {}
+
+    def ensure_running(self):
+        """Spawn the process if it is not running (caller holds lock)."""
+        if self.process is not None and self.process.is_alive():
+            return
+        if self.conn is not None:
+            self.conn.close()
+        self.conn, child = CONTEXT.Pipe()
+        self.process = CONTEXT.Process(
+            target=_serve,
+            args=(child, self.root, self.index_dir),
+            name="intellihub-shard",
+            daemon=True,
+        )
+        self.process.start()
+        child.close()
+        if self.files is not None:
+            self.conn.send(("scan", self.files))
+
+    def send(self, message):
+        """Send a message (caller holds lock)."""
+        self.ensure_running()
+        self.conn.send(message)
+
+    def request(self, request_id, message):
+        """Send a message that expects a reply; collect it with receive(request_id)."""
+        with self.lock:
+            self.send(message)
+            self._waiting[request_id] = self.conn
+
+    def receive(self, request_id):
+        """
+        Return the reply to request_id.
+
+        Concurrent requests share the pipe: whichever thread is reading
+        hands other requests' replies over to them, and replies to abandoned
+        requests are dropped.
+        """
+        try:
+            while True:
+                with self._recv_lock:
+                    if request_id in self._replies:
+                        status, value = self._replies.pop(request_id)
+                        if status == "error":
+                            raise RuntimeError(f"Shard search failed: {value}")
+                        return value
+                    conn, process = self._waiting[request_id], self.process
+                    # A respawned worker never saw the request.
+                    if conn is not self.conn or process is None or not process.is_alive():
+                        raise RuntimeError("Shard worker exited")
+                    if conn.poll(GATHER_POLL):
+                        reply_id, status, value = conn.recv()
+                        if reply_id in self._waiting:
+                            self._replies[reply_id] = (status, value)
+                        continue
+                check_cancelled()
+        finally:
+            self.discard(request_id)
+
+    def discard(self, request_id):
+        """Forget a request; a reply still to come is dropped."""
+        with self._recv_lock:
+            self._waiting.pop(request_id, None)
+            self._replies.pop(request_id, None)
+
+    def stop(self):
+        with self.lock:
+            if self.process is None:
+                return
+            try:
+                self.conn.send(("stop",))
+            except OSError:
+                pass
+            self.process.join(STOP_TIMEOUT)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.conn.close()
+            self.process = None
+            self.conn = None
+
+
+class ShardedIndex:
+    """
+    Drop-in replacement for SharedIndex that splits the corpus into count
+    shards, each built and searched by its own worker process.
+    """
+
+    def __init__(self, root, index_dir, watcher, count):
+        self.root = root
+        self.index_dir = index_dir
+        self.watcher = watcher
+        self.count = count
+        self.shards = [
+            SharedIndex(root, shard_dir(index_dir, i, count), watcher=None, build=False)
+            for i in range(count)
+        ]
+        self._workers = [_Worker(root, shard.index_dir) for shard in self.shards]
+        self._sent = [None] * count
+        self._combined = None
+        self._request_ids = itertools.count(1)
+        self._refresh_lock = threading.Lock()
+
+    # ---- Lifecycle ----
+
+    def start(self):
+        """Spawn the shard workers and follow the watcher, in the background."""
+        self.watcher.add_listener(self.on_change)
+        thread = threading.Thread(target=self._run, name="intellihub-index", daemon=True)
+        thread.start()
+        return thread
+
+    def _run(self):
+        self.refresh()
+        self.watcher.start()
+
+    def stop(self):
+        self.watcher.remove_listener(self.on_change)
+        for worker in self._workers:
+            worker.stop()
+
+    def on_change(self, changes, generation):
+        self.refresh()
+
+    def refresh(self):
+        """Send each shard whose files changed its new scan; the others are left alone."""
+        with self._refresh_lock:
+            files = self.watcher.files()
+            if files is None:
+                self.watcher.poll()
+                files = self.watcher.files()
+            for i, part in enumerate(partition(files, self.count)):
+                wanted = fingerprint(part)
+                if wanted == self._sent[i]:
+                    continue
+                self.shards[i].refresh(part)
+                worker = self._workers[i]
+                with worker.lock:
+                    worker.files = part
+                    worker.send(("scan", part))
+                self._sent[i] = wanted
+
+    # ---- Reads ----
+
+    def snapshot(self):
+        """Return a ShardedSnapshot while every shard is current, else None."""
+        return self._combine([shard.snapshot() for shard in self.shards])
+
+    def latest(self):
+        """Return a ShardedSnapshot of every shard's last mapped snapshot, current or not."""
+        return self._combine([shard.latest() for shard in self.shards])
+
+    def _combine(self, snapshots):
+        if any(s is None for s in snapshots):
+            return None
+        combined = self._combined
+        if combined is None or any(a is not b for a, b in zip(combined.shards, snapshots)):
+            combined = self._combined = ShardedSnapshot(snapshots)
+        return combined
+
+    def search(self, query, paths=None, context_lines=0, highlight=False):
+        """
+        Scatter a search() query to every shard and merge the results.
+
+        Args:
+            query: Lowercase substring to look for
+            paths: Only search these files (e.g. selected by front-matter
+                filters); None searches every Markdown file
+            context_lines, highlight: As for search() (see snippets.py)
+
+        Returns:
+            Results ordered by path, then line, like an unsharded search
+
+        Raises:
+            RuntimeError: If a shard worker fails or exits
+        """
+        groups = partition(paths, self.count) if paths is not None else [None] * self.count
+        targets = [
+            (worker, group)
+            for worker, group in zip(self._workers, groups)
+            if group is None or group
+        ]
+        request_id = next(self._request_ids)
+        sent = []
+        try:
+            # Each worker is locked only to send; replies are matched by
+            # request id, so concurrent searches overlap across the shards.
+            for worker, group in targets:
+                worker.request(request_id, ("search", request_id, query, group, context_lines, highlight))
+                sent.append(worker)
+            parts = [worker.receive(request_id) for worker in sent]
+        finally:
+            for worker in sent:
+                worker.discard(request_id)
+        return list(heapq.merge(*parts, key=lambda r: r["file"]))
+
+    def status(self):
+        snapshot = self.snapshot()
+        shards = [shard.status() for shard in self.shards]
+        return {
+            "generation": snapshot.generation if snapshot else None,
+            "current": snapshot is not None,
+            "files": len(snapshot.paths) if snapshot else sum(s["files"] for s in shards),
+            "shards": self.count,
+            "stale": [i for i, s in enumerate(shards) if not s["current"]],
+            "workers": sum(
+                w.process is not None and w.process.is_alive() for w in self._workers
+            ),
+        }
+
+    def worker_status(self):
+        """Ask every worker for its own view of its shard (builds, pid)."""
+        request_id = next(self._request_ids)
+        statuses = []
+        for worker in self._workers:
+            worker.request(request_id, ("status", request_id))
+            statuses.append(worker.receive(request_id))
+        return statuses
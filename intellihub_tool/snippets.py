@@ -0,0 +1,178 @@
+"""
+Line offsets, match spans and context windows for search().
+
+A file's line starts are the character offsets just past each "\n", the
+lines readlines() returns for text read with universal newlines (as every
+caller reads it). Other characters str.splitlines() breaks on, such as form
+feeds or U+2028, do not start a line, so line numbers agree with editors. The index snapshot stores them per Markdown file (see
+index.py), so search() finds matches in the lowercased text with str.find,
+maps each match to its line by binary search and cuts context windows straight
+out of the text it already holds, without splitting whole files into lines or
+reading anything twice.
+"""
+import re
+from array import array
+from bisect import bisect_right
+
+LINE_BREAK = re.compile("\n")
+
+# Most context lines search() returns on each side of a match
+MAX_CONTEXT_LINES = 20
+
+
+def line_starts(text):
+    """
+    Return the start offset of every line of text as an array('I').
+
+    There is one entry per line readlines() would return for text.
+    """
+    starts = array("I", [0] if text else [])
+    starts.extend(m.end() for m in LINE_BREAK.finditer(text) if m.end() < len(text))
+    return starts
+
+
+def _line_end(text, starts, line):
+    """Offset just past the content of a 0-based line (before its line break)."""
+    end = starts[line + 1] if line + 1 < len(starts) else len(text)
+    if end > starts[line] and text[end - 1] == "\n":
+        return end - 1
+    return end
+
+
+def find_matches(text, query, starts, every=True):
+    """
+    Find every line of text that contains query.
+
+    Args:
+        text: File content
+        query: Lowercase search string
+        starts: line_starts(text)
+        every: Report every match; when False only the first match of each
+            line is reported and the scan skips to the next line
+
+    Returns:
+        {0-based line: [(start, end), ...] offsets of the matches in text},
+        lines in ascending order
+    """
+    if not query:
+        # An empty query matches every line, like "" in line.
+        return {line: [] for line in range(len(starts))}
+    if "\n" in query:
+        return {}
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        # Case folding changed the length (e.g. "İ"), so offsets in the
+        # lowercased text do not line up; match line by line instead.
+        return _find_per_line(text, query, starts)
+    matches = {}
+    last = len(starts) - 1
+    position = lowered.find(query)
+    while position >= 0:
+        line = bisect_right(starts, position) - 1
+        spans = matches.get(line)
+        if spans is None:
+            spans = matches[line] = []
+        spans.append((position, position + len(query)))
+        if every or line == last:
+            position = lowered.find(query, position + len(query))
+        else:
+            position = lowered.find(query, starts[line + 1])
+    return matches
+
+
+def _find_per_line(text, query, starts):
+    matches = {}
+    for line, start in enumerate(starts):
+        content = text[start : _line_end(text, starts, line)]
+        lowered = content.lower()
+        if query not in lowered:
+            continue
+        spans = []
+        position = lowered.find(query)
+        while position >= 0:
+            # Map back through the original line; clamp when lowering grew it.
+            spans.append((start + min(position, len(content)), start + min(position + len(query), len(content))))
+            position = lowered.find(query, position + len(query))
+        matches[line] = spans
+    return matches
+
+
+def search_text(path, text, query, starts=None, context_lines=0, highlight=False):
+    """
+    Return search() results for one file.
+
+    Args:
+        path: Relative path reported in each result
+        text: File content
+        query: Lowercase search string
+        starts: Stored line_starts(text), computed when None
+        context_lines: Lines of context on each side of a match; with more
+            than 0, matches whose windows touch or overlap share one result
+        highlight: Add "highlights", [start, end] offsets of every match in
+            the result's snippet (or context)
+
+    Returns:
+        Without context, one {"file", "line", "snippet"} per matching line
+        (snippet is the stripped line). With context, one {"file", "line",
+        "snippet", "start_line", "end_line", "matches", "context"} per window,
+        where line is the first match, matches lists every matching line and
+        context holds lines start_line..end_line.
+    """
+    if starts is None:
+        starts = line_starts(text)
+    matches = find_matches(text, query, starts, every=highlight)
+    if not matches:
+        return []
+
+    if context_lines <= 0 and not highlight:
+        # strip() also drops the line break, which is whitespace to Python.
+        last = len(starts) - 1
+        return [
+            {
+                "file": path,
+                "line": line + 1,
+                "snippet": text[starts[line] : starts[line + 1] if line < last else len(text)].strip(),
+            }
+            for line in matches
+        ]
+
+    results = []
+    if context_lines <= 0:
+        for line, spans in matches.items():
+            start, end = starts[line], _line_end(text, starts, line)
+            content = text[start:end]
+            snippet = content.strip()
+            result = {"file": path, "line": line + 1, "snippet": snippet}
+            if highlight:
+                offset = start + len(content) - len(content.lstrip())
+                result["highlights"] = [
+                    [max(0, a - offset), min(len(snippet), b - offset)] for a, b in spans
+                ]
+            results.append(result)
+        return results
+
+    last = len(starts) - 1
+    windows = []
+    for line in matches:
+        first, final = max(0, line - context_lines), min(last, line + context_lines)
+        if windows and first <= windows[-1][1] + 1:
+            windows[-1][1] = final
+            windows[-1][2].append(line)
+        else:
+            windows.append([first, final, [line]])
+
+    for first, final, lines in windows:
+        base = starts[first]
+        result = {
+            "file": path,
+            "line": lines[0] + 1,
+            "snippet": text[starts[lines[0]] : _line_end(text, starts, lines[0])].strip(),
+            "start_line": first + 1,
+            "end_line": final + 1,
+            "matches": [line + 1 for line in lines],
+            "context": text[base : _line_end(text, starts, final)],
+        }
+        if highlight:
+            result["highlights"] = [[a - base, b - base] for line in lines for a, b in matches[line]]
+        results.append(result)
+    return results
@@ -0,0 +1,231 @@
+"""
+Test the structured access log for IntelliHub MCP tool.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import anyio
+from mcp.client.session import ClientSession
+from mcp.shared.memory import create_client_server_memory_streams
+
+import access_log
+from access_log import AccessLog, CallRecorder, parse_access_log
+from encoding import encode
+
+
+def _read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_access_log_config():
+    """Test defaults, overrides and rejected access_log values."""
+    print("\n=== Testing Access Log Config ===")
+
+    assert parse_access_log(False) is None and parse_access_log(None) is None
+    print("✅ PASS: Off unless the config turns it on")
+
+    defaults = parse_access_log(True)
+    assert defaults["path"].endswith(os.path.join("logs", "access.jsonl"))
+    assert defaults["sample"] == {}
+    settings = parse_access_log({"path": "logs/calls.jsonl", "sample": {"read_file": 0.25}})
+    assert Path(settings["path"]).is_absolute()
+    assert settings["sample"] == {"read_file": 0.25} and settings["backup_count"] == 5
+    print("✅ PASS: Overrides merged over the defaults")
+
+    for bad in ("on", {"sample": {"search": 2}}, {"max_bytes": -1}, {"rotate": True}, {"path": ""}):
+        try:
+            parse_access_log(bad)
+            assert False, f"{bad!r} should be rejected"
+        except ValueError:
+            pass
+    print("✅ PASS: Malformed values rejected")
+
+
+def test_access_log_records():
+    """Test records, sampling, rotation and reconfiguration."""
+    print("\n=== Testing Access Log Records ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        log = AccessLog()
+        try:
+            path = os.path.join(tmpdir, "logs", "access.jsonl")
+            log.configure({"path": path, "sample": {"read_file": 0}})
+            log.record("search", "ok", session="s1", client="local", latency_ms=1.5, result=[{"path": "a.md"}])
+            log.record("read_file", "ok", session="s1", client="local", result="x" * 100)
+            log.record("read_file", "error", session="s1", client="local", error="FileNotFoundError: a.md")
+            log.record("get_section", "ok", session="s1", client="local", result="héllo")
+            log.flush()
+
+            records = _read_records(path)
+            assert [(r["tool"], r["status"]) for r in records] == [
+                ("search", "ok"),
+                ("read_file", "error"),
+                ("get_section", "ok"),
+            ]
+            assert records[0]["result_bytes"] == len('[{"path":"a.md"}]')
+            assert records[0]["latency_ms"] == 1.5 and records[0]["ts"].endswith("Z")
+            assert records[1]["sample_rate"] == 1.0 and records[1]["result_bytes"] == 0
+            assert records[2]["result_bytes"] == len("héllo".encode("utf-8"))
+            assert log.stats()["records"] == 3 and log.stats()["sampled_out"] == 1
+            print("✅ PASS: JSON records written; sampled-out successes skipped, failures kept")
+
+            log.configure({"path": path, "max_bytes": 200, "backup_count": 2})
+            measured = []
+            result_bytes = access_log._result_bytes
+            access_log._result_bytes = lambda result: measured.append(result) or result_bytes(result)
+            try:
+                for _ in range(10):
+                    log.record("list_files", "ok", session="s2", client="local", result=["a.md"])
+                log.flush()
+            finally:
+                access_log._result_bytes = result_bytes
+            assert len(measured) == 10
+            assert os.path.exists(path + ".1") and os.path.exists(path + ".2")
+            assert not os.path.exists(path + ".3")
+            assert os.path.getsize(path) <= 200
+            print("✅ PASS: File rotated by size, backups capped, each record formatted once")
+
+            log.configure(False)
+            log.record("search", "ok", session="s3", client="local")
+            assert log.stats()["enabled"] is False and log.stats()["records"] == 13
+            print("✅ PASS: Disabled log records nothing")
+        finally:
+            log.close()
+
+
+def test_call_recorder():
+    """Test that the recorder keeps every call with its arguments and offset."""
+    print("\n=== Testing Call Recorder ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        recorder = CallRecorder()
+        path = os.path.join(tmpdir, "requests.jsonl")
+        recorder.record(0.0, "search", {"query": "lumen"})
+        assert not recorder.active and recorder.records == 0
+        try:
+            recorder.start(path)
+            began = time.perf_counter()
+            recorder.record(began, "search", {"query": "lumen"}, session="s1", status="ok", result=[])
+            recorder.record(began + 0.25, "read_file", {"path": "a.md"}, session="s2", status="error")
+            recorder.stop()
+            recorder.record(began + 0.5, "search", {"query": "late"})
+
+            records = _read_records(path)
+            assert [(r["tool"], r["arguments"], r["session"]) for r in records] == [
+                ("search", {"query": "lumen"}, "s1"),
+                ("read_file", {"path": "a.md"}, "s2"),
+            ]
+            assert 0 <= records[0]["t"] < 0.25 and abs(records[1]["t"] - records[0]["t"] - 0.25) < 1e-3
+            print("✅ PASS: Calls recorded with arguments, session and arrival offset")
+        finally:
+            recorder.close()
+
+
+async def _exercise_calls(server):
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                lambda: server.mcp.run(
+                    server_streams[0],
+                    server_streams[1],
+                    server.mcp.create_initialization_options(),
+                )
+            )
+            async with ClientSession(client_streams[0], client_streams[1]) as client:
+                await client.initialize()
+                assert not (await client.call_tool("read_file", {"path": "lore_core.md"})).isError
+                assert not (await client.call_tool("search", {"query": "lore"})).isError
+                assert (await client.call_tool("read_file", {"path": "missing.md"})).isError
+
+            tg.cancel_scope.cancel()
+
+
+def test_logged_session():
+    """Test records written by the server's call_tool handler."""
+    print("\n=== Testing Logged Session ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        os.makedirs(ai_context)
+        with open(os.path.join(ai_context, "lore_core.md"), "w", encoding="utf-8") as f:
+            f.write("# Lore\n")
+        log_path = os.path.join(tmpdir, "access.jsonl")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {
+                        "ai_context_path": ai_context,
+                        "index_path": os.path.join(tmpdir, "index"),
+                        "access_log": {"path": log_path},
+                    },
+                    f,
+                )
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+            import server
+
+            recording = os.path.join(tmpdir, "requests.jsonl")
+            server.RECORDER.start(recording)
+            asyncio.run(_exercise_calls(server))
+            server.ACCESS_LOG.flush()
+            server.RECORDER.stop()
+            records = _read_records(log_path)
+            assert [(r["tool"], r["status"]) for r in records] == [
+                ("read_file", "ok"),
+                ("search", "ok"),
+                ("read_file", "error"),
+            ]
+            assert len({r["session"] for r in records}) == 1
+            assert records[0]["result_bytes"] == len("# Lore\n")
+            # The bytes sent: compact JSON, not a re-serialization of the result
+            sent = encode([{"file": "lore_core.md", "line": 1, "snippet": "# Lore"}])
+            assert records[1]["result_bytes"] == len(sent)
+            assert records[2]["error"].startswith("FileNotFoundError")
+            assert all(r["latency_ms"] >= 0 and r["wait_ms"] >= 0 for r in records)
+            assert server.metrics()["access_log"]["records"] == 3
+            print("✅ PASS: Each call logged with session, latency, size and status")
+
+            recorded = _read_records(recording)
+            assert [r["arguments"] for r in recorded] == [
+                {"path": "lore_core.md"},
+                {"query": "lore"},
+                {"path": "missing.md"},
+            ]
+            assert [r["session"] for r in recorded] == [r["session"] for r in records]
+            assert recorded[0]["t"] <= recorded[1]["t"] <= recorded[2]["t"]
+            assert [r["result_bytes"] for r in recorded] == [r["result_bytes"] for r in records]
+            print("✅ PASS: Recorder captured the calls for replay")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "server" in sys.modules:
+                sys.modules["server"].ACCESS_LOG.close()
+                sys.modules["server"].RECORDER.close()
+                sys.modules["server"].get_watcher().stop()
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Access Log Tests")
+    print("=" * 60)
+
+    test_access_log_config()
+    test_access_log_records()
+    test_call_recorder()
+    test_logged_session()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
@@ -0,0 +1,201 @@
+"""
+Test cooperative cancellation and tool deadlines for IntelliHub MCP tool.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import anyio
+from mcp.client.session import ClientSession
+from mcp.shared.memory import create_client_server_memory_streams
+
+from cancellation import CancelToken, OperationCancelled, cancel_scope, check_cancelled
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+class CancelAfter(CancelToken):
+    """Token that cancels itself on its n-th check, like a client hanging up mid-scan."""
+
+    def __init__(self, n):
+        super().__init__()
+        self.n = n
+        self.checks = 0
+
+    def check(self):
+        self.checks += 1
+        if self.checks == self.n:
+            self.cancel("client went away")
+        super().check()
+
+
+def test_cancel_token():
+    """Test cancellation, deadlines and propagation into worker threads."""
+    print("\n=== Testing Cancel Token ===")
+
+    check_cancelled()
+    print("✅ PASS: No token outside a tool call")
+
+    token = CancelToken(timeout=0.01)
+    with cancel_scope(token):
+        check_cancelled()
+        time.sleep(0.02)
+        try:
+            check_cancelled()
+            assert False, "deadline should have passed"
+        except OperationCancelled as e:
+            assert "deadline of 0.01 s exceeded" in str(e)
+    check_cancelled()
+    print("✅ PASS: Deadline raises OperationCancelled; scope resets")
+
+    async def in_thread():
+        token = CancelToken()
+        token.cancel("client went away")
+        with cancel_scope(token):
+            await asyncio.to_thread(check_cancelled)
+
+    try:
+        asyncio.run(in_thread())
+        assert False, "worker thread should see the token"
+    except OperationCancelled as e:
+        assert str(e) == "client went away"
+    print("✅ PASS: Token reaches asyncio.to_thread workers")
+
+
+def test_scans_stop():
+    """Test that search() and diagnose() stop at the next file once cancelled."""
+    print("\n=== Testing Cancelled Scans ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        for i in range(50):
+            _write(os.path.join(ai_context, "notes", f"note_{i:02}.md"), f"Note {i} about the forge\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")},
+                    f,
+                )
+            sys.modules.pop("tool", None)
+            import tool
+
+            assert len(tool.search("forge")) == 50
+            token = CancelAfter(10)
+            with cancel_scope(token):
+                try:
+                    tool.search("forge")
+                    assert False, "search should stop"
+                except OperationCancelled:
+                    pass
+            assert token.checks == 10
+            print("✅ PASS: search() stops at the first check after cancellation")
+
+            token = CancelAfter(3)
+            with cancel_scope(token):
+                try:
+                    tool.diagnose()
+                    assert False, "diagnose should stop, not report a broken search"
+                except OperationCancelled:
+                    pass
+            print("✅ PASS: diagnose() does not swallow cancellation")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            sys.modules.pop("tool", None)
+
+
+async def _exercise_deadline(server):
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                lambda: server.mcp.run(
+                    server_streams[0],
+                    server_streams[1],
+                    server.mcp.create_initialization_options(),
+                )
+            )
+            async with ClientSession(client_streams[0], client_streams[1]) as client:
+                await client.initialize()
+                result = await client.call_tool("search", {"query": "lore"})
+                assert result.isError and "deadline of 0 s exceeded" in result.content[0].text
+                print("✅ PASS: Call past its deadline returns an error")
+
+                result = await client.call_tool("list_files", {})
+                assert not result.isError
+
+                # Time queued for a worker slot does not count against the deadline.
+                server.TOOL_TIMEOUTS["search"] = 0.2
+                slots = server.SCHEDULER.slots
+                for _ in range(slots):
+                    await server.SCHEDULER.acquire("busy")
+
+                async def finish_busy_calls():
+                    await anyio.sleep(0.5)
+                    for _ in range(slots):
+                        server.SCHEDULER.release()
+
+                tg.start_soon(finish_busy_calls)
+                result = await client.call_tool("search", {"query": "lore"})
+                assert not result.isError
+                print("✅ PASS: The deadline starts once the call has a worker slot")
+            tg.cancel_scope.cancel()
+
+
+def test_tool_deadline():
+    """Test per-tool deadlines through the server's call_tool handler."""
+    print("\n=== Testing Tool Deadlines ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        _write(os.path.join(ai_context, "lore_core.md"), "# Lore\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")},
+                    f,
+                )
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+            import server
+
+            server.TOOL_TIMEOUTS["search"] = 0
+            asyncio.run(_exercise_deadline(server))
+            assert server.metrics()["stopped_calls"]["timed_out"] == 1
+            print("✅ PASS: Timed-out call reported in metrics")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "server" in sys.modules:
+                sys.modules["server"].get_watcher().stop()
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Cancellation Tests")
+    print("=" * 60)
+
+    test_cancel_token()
+    test_scans_stop()
+    test_tool_deadline()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
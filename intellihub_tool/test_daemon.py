@@ -0,0 +1,161 @@
+"""
+Test the CLI daemon and batch mode for IntelliHub MCP tool.
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import daemon
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_daemon_and_batch():
+    """Test commands served by the daemon, batch output and shutdown."""
+    print("\n=== Testing CLI Daemon and Batch ===")
+
+    if not daemon.SUPPORTED:
+        print("⚠️  SKIP: Unix domain sockets unavailable")
+        return
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        _write(os.path.join(ai_context, "lore_core.md"), "# Lore\nLumen crystals.\n")
+        socket_path = os.path.join(tmpdir, "cli.sock")
+        os.environ["INTELLIHUB_SOCKET"] = socket_path
+        thread = None
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")},
+                    f,
+                )
+            for name in ("tool", "cli"):
+                sys.modules.pop(name, None)
+            import cli
+
+            out = io.StringIO()
+            args = cli.build_parser().parse_args(["--no-daemon", "batch"])
+            cli.run_batch(args, ["list", "", "# comment", 'search "lumen crystals"', "read nope.md", "daemon"], out)
+            lines = [json.loads(line) for line in out.getvalue().splitlines()]
+            assert lines[0] == {"line": 1, "ok": True, "result": ["lore_core.md"]}
+            assert lines[1]["line"] == 4 and lines[1]["result"][0]["line"] == 2
+            assert lines[2]["type"] == "FileNotFoundError" and not lines[2]["ok"]
+            assert lines[3]["type"] == "CommandError"
+            print("✅ PASS: Batch writes one JSON line per command, errors included")
+
+            thread = threading.Thread(target=daemon.serve, args=(cli.execute_argv,), daemon=True)
+            thread.start()
+            for _ in range(500):
+                client = daemon.DaemonClient.connect()
+                if client is not None:
+                    break
+                time.sleep(0.01)
+            assert client is not None
+            assert client.request(["read", "lore_core.md"]) == "# Lore\nLumen crystals.\n"
+            try:
+                client.request(["schema", "missing"])
+                assert False, "daemon should report the tool's error"
+            except daemon.DaemonError as e:
+                assert e.type_name == "NameNotFoundError"
+            client.close()
+            print("✅ PASS: Daemon answers commands and reports errors")
+
+            # A daemon running as another user is never trusted.
+            uid = daemon._uid
+            daemon._uid = lambda: os.getuid() + 1
+            try:
+                assert daemon.DaemonClient.connect() is None
+            finally:
+                daemon._uid = uid
+            print("✅ PASS: Sockets served by another user are not used")
+
+            try:
+                daemon.serve(cli.execute_argv)
+                assert False, "a second daemon should refuse to start"
+            except RuntimeError:
+                pass
+
+            out = io.StringIO()
+            cli.run_batch(cli.build_parser().parse_args(["batch"]), ["roots"], out)
+            assert json.loads(out.getvalue())["result"][0]["name"] == "default"
+            print("✅ PASS: Batch reuses a running daemon")
+
+            assert daemon.stop()
+            thread.join(timeout=5)
+            assert not thread.is_alive() and not os.path.exists(socket_path)
+            assert daemon.DaemonClient.connect() is None
+            print("✅ PASS: Daemon stops and removes its socket")
+        finally:
+            os.environ.pop("INTELLIHUB_SOCKET", None)
+            if thread is not None and thread.is_alive():
+                daemon.stop()
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                sys.modules["tool"].get_root().stop()
+            for name in ("tool", "cli"):
+                sys.modules.pop(name, None)
+
+
+def test_socket_directory():
+    """Test that the default socket sits in a private per-user directory."""
+    print("\n=== Testing Socket Directory ===")
+
+    if not daemon.SUPPORTED:
+        print("⚠️  SKIP: Unix domain sockets unavailable")
+        return
+
+    runtime = os.environ.pop("XDG_RUNTIME_DIR", None)
+    tempdir = tempfile.tempdir
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tempfile.tempdir = tmpdir
+        try:
+            path = daemon.socket_path()
+            directory = os.path.dirname(path)
+            assert os.path.dirname(directory) == tmpdir and os.stat(directory).st_mode & 0o777 == 0o700
+            print("✅ PASS: Socket directory created owner-only")
+
+            os.chmod(directory, 0o777)
+            try:
+                daemon.socket_path()
+                assert False, "a directory open to other users should be refused"
+            except RuntimeError:
+                pass
+            assert daemon.DaemonClient.connect() is None
+            print("✅ PASS: A socket directory open to other users is refused")
+
+            os.environ["XDG_RUNTIME_DIR"] = tmpdir
+            assert os.path.dirname(daemon.socket_path()) == tmpdir
+            print("✅ PASS: XDG_RUNTIME_DIR preferred")
+        finally:
+            tempfile.tempdir = tempdir
+            os.environ.pop("XDG_RUNTIME_DIR", None)
+            if runtime is not None:
+                os.environ["XDG_RUNTIME_DIR"] = runtime
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP CLI Daemon Tests")
+    print("=" * 60)
+
+    test_daemon_and_batch()
+    test_socket_directory()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
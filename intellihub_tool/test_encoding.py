@@ -0,0 +1,190 @@
+"""
+Test compact result encoding and paged results for IntelliHub MCP tool.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import anyio
+from mcp.client.session import ClientSession
+from mcp.shared.memory import create_client_server_memory_streams
+
+from encoding import ResultEncoder, encode, parse_result_encoding, tabulate, untabulate
+
+HITS = [{"file": f"lore/doc_{i // 10:02d}.md", "line": i, "snippet": f"Lumen line {i}"} for i in range(500)]
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _pages(encoder, tool, arguments, result):
+    """Every page of result as decoded JSON, following next_cursor."""
+    pages = [json.loads(encoder.encode(tool, arguments, result))]
+    while "next_cursor" in pages[-1]:
+        cursor = pages[-1]["next_cursor"]
+        held = encoder.resume(tool, arguments, cursor)
+        pages.append(json.loads(encoder.encode(tool, arguments, result if held is None else held, cursor)))
+    return pages
+
+
+def test_tables():
+    """Test the table layout, string interning and compact output."""
+    print("\n=== Testing Tables ===")
+
+    table = tabulate(HITS)
+    assert table["columns"] == ["file", "line", "snippet"] and list(table["strings"]) == ["file"]
+    assert table["strings"]["file"][:2] == ["lore/doc_00.md", "lore/doc_01.md"]
+    assert list(table["rows"][10]) == [1, 10, "Lumen line 10"]
+    assert untabulate(json.loads(encode(HITS))["result"]) == HITS
+    print("✅ PASS: Hit lists become tables with interned file names")
+
+    assert tabulate(["a.md", "b.md"]) is None
+    assert tabulate([{"path": "a.md"}, {"path": "b.md", "bytes": 3}]) is None
+    assert tabulate([{"a": 1}, {"b": 1}]) is None
+    assert "strings" not in tabulate([{"path": "a.md", "bytes": 1}, {"path": "b.md", "bytes": 2}])
+    assert json.loads(encode(["a.md"]))["result"] == ["a.md"]
+    assert json.loads(encode(HITS, layout="rows"))["result"] == HITS
+    print("✅ PASS: Other results keep their shape")
+
+    text = encode({"status": "ok", "notes": ["é"]})
+    assert text == '{"result":{"status":"ok","notes":["é"]}}'
+    print("✅ PASS: One compact serialization, no indentation")
+
+    assert parse_result_encoding(None)["layout"] == "columnar"
+    for bad in ("rows", {"layout": "csv"}, {"max_bytes": -1}, {"max_bytes": True}, {"pages": 2}):
+        try:
+            parse_result_encoding(bad)
+            assert False, f"{bad!r} should be rejected"
+        except ValueError:
+            pass
+    print("✅ PASS: Malformed result_encoding rejected")
+
+
+def test_pages():
+    """Test paging, cursors across encoders and stale cursors."""
+    print("\n=== Testing Pages ===")
+
+    arguments = {"query": "lumen"}
+    encoder = ResultEncoder({"max_bytes": 2048})
+    pages = _pages(encoder, "search", arguments, HITS)
+    assert len(pages) > 5 and all(page["total"] == 500 for page in pages)
+    assert [hit for page in pages for hit in untabulate(page["result"])] == HITS
+    assert all(len(json.dumps(page, ensure_ascii=False, separators=(",", ":"))) <= 2048 for page in pages)
+    assert encoder.stats()["reruns"] == 0 and encoder.stats()["held"] == 1
+    print("✅ PASS: Oversized results arrive in pages that fit max_bytes")
+
+    # Another worker (or after the result expired): the tool runs again.
+    cursor = pages[2]["next_cursor"]
+    other = ResultEncoder({"max_bytes": 2048})
+    assert other.resume("search", arguments, cursor) is None
+    assert json.loads(other.encode("search", arguments, list(HITS), cursor)) == pages[3]
+    print("✅ PASS: Cursors continue on an encoder that never saw the first page")
+
+    for call, error in (
+        (lambda: other.encode("search", arguments, HITS[:-1], cursor), "stale"),
+        (lambda: encoder.resume("search", {"query": "other"}, cursor), "different call"),
+        (lambda: encoder.resume("search", arguments, "page-2"), "Invalid cursor"),
+    ):
+        try:
+            call()
+            assert False, f"expected {error}"
+        except ValueError as e:
+            assert error in str(e), e
+    print("✅ PASS: Changed results and foreign cursors are rejected")
+
+    assert json.loads(ResultEncoder({"max_bytes": 0}).encode("search", arguments, HITS)).keys() == {"result"}
+    assert ResultEncoder({"max_bytes": 10}).encode("read_file", {"path": "a.md"}, "# Long\n" * 10) == "# Long\n" * 10
+    print("✅ PASS: max_bytes 0 never pages; text is never paged")
+
+
+async def _exercise_server(server):
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                lambda: server.mcp.run(
+                    server_streams[0],
+                    server_streams[1],
+                    server.mcp.create_initialization_options(),
+                )
+            )
+            async with ClientSession(client_streams[0], client_streams[1]) as client:
+                await client.initialize()
+                result = await client.call_tool("search", {"query": "lumen"})
+                assert result.structuredContent is None and len(result.content) == 1
+                page = json.loads(result.content[0].text)
+                assert page["total"] == 120 and "next_cursor" in page
+                print("✅ PASS: One compact text block per call, no structuredContent")
+
+                hits = untabulate(page["result"])
+                while "next_cursor" in page:
+                    result = await client.call_tool("search", {"query": "lumen", "cursor": page["next_cursor"]})
+                    page = json.loads(result.content[0].text)
+                    hits.extend(untabulate(page["result"]))
+                order = lambda hit: (hit["file"], hit["line"])
+                assert sorted(hits, key=order) == sorted(server.tool_impl.search("lumen"), key=order)
+                print("✅ PASS: next_cursor walks every page of a search")
+
+                result = await client.call_tool("search", {"query": "other", "cursor": "40-0123456789abcdef"})
+                assert result.isError and "stale" in result.content[0].text
+                text = (await client.call_tool("read_file", {"path": "lore/doc_00.md"})).content[0].text
+                assert text.startswith("# Doc 0")
+            tg.cancel_scope.cancel()
+
+
+def test_server_results():
+    """Test encoding and cursors through the server's call_tool handler."""
+    print("\n=== Testing Server Results ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        for i in range(60):
+            _write(os.path.join(ai_context, f"lore/doc_{i:02d}.md"), f"# Doc {i}\nLumen {i}\nplain\nlumen again\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {
+                        "ai_context_path": ai_context,
+                        "index_path": os.path.join(tmpdir, "index"),
+                        "rate_limits": False,
+                        "access_log": False,
+                        "result_encoding": {"max_bytes": 1024},
+                    },
+                    f,
+                )
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+            import server
+
+            asyncio.run(_exercise_server(server))
+            assert server.metrics()["results"]["pages"] > 2
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "server" in sys.modules:
+                sys.modules["server"].get_watcher().stop()
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Result Encoding Tests")
+    print("=" * 60)
+
+    test_tables()
+    test_pages()
+    test_server_results()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
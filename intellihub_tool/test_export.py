@@ -0,0 +1,215 @@
+"""
+Test capsule export archives and delta bundles for IntelliHub MCP tool.
+"""
+import asyncio
+import base64
+import io
+import json
+import os
+import sys
+import tarfile
+import tempfile
+import time
+from pathlib import Path
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def _members(data):
+    """Return {name: bytes} of a .tar.gz bundle."""
+    with tarfile.open(fileobj=io.BytesIO(data), mode="r:gz") as archive:
+        return {m.name: archive.extractfile(m).read() for m in archive.getmembers()}
+
+
+def _export(tool, since=None):
+    result = tool.export_snapshot(since=since)
+    return result, _members(base64.b64decode(result["archive"]))
+
+
+def test_export_bundles():
+    """Test full archives, delta bundles and incremental rebuilds on a passive root."""
+    print("\n=== Testing Export Bundles ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        _write(os.path.join(ai_context, "lore_core.md"), "# Lore\r\nLumen rises.\r\n")
+        _write(os.path.join(ai_context, "schemas", "seed.json"), '{"type": "seed"}\n')
+        _write(os.path.join(ai_context, "module_purposes", "mon_forge.md"), "# Forge\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump({"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")}, f)
+            sys.modules.pop("tool", None)
+            import tool
+
+            full, members = _export(tool)
+            assert full["full"] and full["base"] is None and full["files"] == 3
+            assert members["lore_core.md"] == b"# Lore\nLumen rises.\n"
+            manifest = json.loads(members[".intellihub/manifest.json"])
+            assert manifest["manifest_hash"] == full["manifest_hash"]
+            assert sorted(manifest["files"]) == ["lore_core.md", "module_purposes/mon_forge.md", "schemas/seed.json"]
+            assert manifest["files"]["lore_core.md"]["size"] == len(members["lore_core.md"])
+            print("✅ PASS: Full archive holds every file (as read_file() returns it) and the manifest")
+
+            exporter = tool.get_root().exporter()
+            again, _ = _export(tool)
+            assert again["manifest_hash"] == full["manifest_hash"] and exporter.builds == 1
+            print("✅ PASS: Archive cached for an unchanged corpus")
+
+            _write(os.path.join(ai_context, "module_purposes", "mon_forge.md"), "# Forge\nNow with smelting.\n")
+            _write(os.path.join(ai_context, "schemas", "mutagen.json"), '{"type": "mutagen"}\n')
+            os.remove(os.path.join(ai_context, "schemas", "seed.json"))
+
+            delta, members = _export(tool, since=full["manifest_hash"])
+            assert not delta["full"] and delta["base"] == full["manifest_hash"]
+            assert delta["removed"] == ["schemas/seed.json"]
+            assert sorted(members) == [
+                ".intellihub/delta.json",
+                ".intellihub/manifest.json",
+                "module_purposes/mon_forge.md",
+                "schemas/mutagen.json",
+            ]
+            assert json.loads(members[".intellihub/delta.json"])["removed"] == ["schemas/seed.json"]
+            assert exporter.builds == 2 and exporter.members_copied == 1
+            print("✅ PASS: Delta bundle holds only changed files and lists removals")
+            print("✅ PASS: Rebuild copied the unchanged member instead of recompressing it")
+
+            current, _ = _export(tool, since=delta["manifest_hash"])
+            assert not current["full"] and current["files"] == 0 and current["removed"] == []
+            unknown, _ = _export(tool, since="0" * 64)
+            assert unknown["full"] and unknown["files"] == 3
+            malformed, _ = _export(tool, since="../../etc/passwd")
+            assert malformed["full"]
+            print("✅ PASS: Current hash gives an empty delta; unknown hashes get the full archive")
+
+            _, chunks = exporter.open()
+            chunks.close()
+            assert chunks._file.closed
+            limit = tool.EXPORT_INLINE_LIMIT
+            tool.EXPORT_INLINE_LIMIT = 1
+            try:
+                tool.export_snapshot()
+                assert False, "an export over the inline limit should be refused"
+            except ValueError:
+                pass
+            finally:
+                tool.EXPORT_INLINE_LIMIT = limit
+            print("✅ PASS: A stream closed before it is read releases the archive file")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            sys.modules.pop("tool", None)
+
+
+def _mirror(members, into):
+    """Apply a bundle to a {path: bytes} mirror."""
+    delta = members.get(".intellihub/delta.json")
+    if delta is None:
+        into.clear()
+    else:
+        for path in json.loads(delta)["removed"]:
+            into.pop(path, None)
+    for name, data in members.items():
+        if not name.startswith(".intellihub/"):
+            into[name] = data
+
+
+async def _download(server, since=None):
+    class Request:
+        query_params = {"since": since} if since else {}
+
+    response = await server.export_endpoint(Request())
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    assert int(response.headers["content-length"]) == len(body)
+    return response.headers, body
+
+
+def test_export_route():
+    """Test GET /export on a started root, mirroring the capsule through deltas."""
+    print("\n=== Testing Export Route ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        for i in range(5):
+            _write(os.path.join(ai_context, f"doc_{i}.md"), f"# Doc {i}\n" + "lore " * 200)
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump({"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")}, f)
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+            import server
+
+            root = server.tool_impl.get_root()
+            root.warm_cache_fraction = 0
+            root.start()
+
+            def wait_for_snapshot(after=0):
+                for _ in range(500):
+                    snapshot = root.snapshot()
+                    if root.started and snapshot is not None and snapshot.generation > after:
+                        return snapshot.generation
+                    time.sleep(0.01)
+                raise AssertionError("snapshot not rebuilt")
+
+            generation = wait_for_snapshot()
+            headers, body = asyncio.run(_download(server))
+            assert headers["x-intellihub-export"] == "full" and headers["content-type"] == "application/gzip"
+            mirror = {}
+            _mirror(_members(body), mirror)
+            assert len(mirror) == 5
+            print("✅ PASS: Full archive streamed from the index snapshot")
+
+            _write(os.path.join(ai_context, "doc_2.md"), "# Doc 2\nRewritten.\n")
+            _write(os.path.join(ai_context, "doc_5.md"), "# Doc 5\n")
+            os.remove(os.path.join(ai_context, "doc_0.md"))
+            root.watcher.poll()
+            wait_for_snapshot(generation)
+
+            delta_headers, delta = asyncio.run(_download(server, headers["x-intellihub-manifest-hash"]))
+            assert delta_headers["x-intellihub-export"] == "delta" and len(delta) < len(body)
+            _mirror(_members(delta), mirror)
+            expected = {}
+            for name in sorted(os.listdir(ai_context)):
+                with open(os.path.join(ai_context, name), "rb") as f:
+                    expected[name] = f.read()
+            assert mirror == expected
+            assert root.exporter().members_copied == 3
+            print("✅ PASS: Applying the delta bundle reproduces the capsule")
+
+            class BadRequest:
+                query_params = {"root": "nope"}
+
+            response = asyncio.run(server.export_endpoint(BadRequest()))
+            assert response.status_code == 400
+            print("✅ PASS: Unknown root rejected")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "server" in sys.modules:
+                sys.modules["server"].tool_impl.get_root().stop()
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Export Tests")
+    print("=" * 60)
+
+    test_export_bundles()
+    test_export_route()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
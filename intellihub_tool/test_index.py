@@ -0,0 +1,80 @@
+"""
+Test the shared memory-mapped index for IntelliHub MCP tool.
+"""
+import os
+import tempfile
+
+from index import SharedIndex, IndexSnapshot
+from watcher import CorpusWatcher
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def test_shared_index_build_and_swap():
+    """Test that one process builds and others map the same snapshot."""
+    print("\n=== Testing Shared Index ===")
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        index_dir = os.path.join(tmpdir, "index")
+        _write(os.path.join(ai_context, "00_README.md"), "# Readme\r\nLumen here\r\n")
+        _write(os.path.join(ai_context, "schemas", "seed_type_schema.md"), "# Seed\n")
+        _write(os.path.join(tmpdir, "secret.md"), "outside")
+        os.symlink(os.path.join(tmpdir, "secret.md"), os.path.join(ai_context, "escape.md"))
+
+        # Two "workers" with their own watchers share one index directory
+        first = SharedIndex(ai_context, index_dir, CorpusWatcher(ai_context))
+        second = SharedIndex(ai_context, index_dir, CorpusWatcher(ai_context))
+
+        first.refresh()
+        second.refresh()
+        snap = first.snapshot()
+        assert snap is not None and snap.generation == 1
+        assert second.snapshot().generation == 1
+        assert first.builds == 1 and second.builds == 0
+        print("✅ PASS: Only one process built generation 1; the other mapped it")
+
+        assert snap.read_text("00_README.md") == "# Readme\nLumen here\n"
+        print("✅ PASS: Stored text uses universal newlines like read_file()")
+
+        readme = snap.stats("00_README.md")
+        assert readme["tokens"] == 4 and readme["sections"][0]["heading"] == "Readme"
+        print("✅ PASS: File table carries token and section estimates")
+
+        assert "escape.md" in snap and snap.read_text("escape.md") is None
+        print("✅ PASS: Symlink escaping ai_context is not captured")
+
+        # Change the corpus: the snapshot goes stale until someone rebuilds
+        _write(os.path.join(ai_context, "lore_core.md"), "# Lore\n")
+        second.watcher.poll()
+        second.refresh()
+        assert second.snapshot().generation == 2
+        assert "lore_core.md" in second.snapshot()
+
+        # A watcher-driven refresh maps the peer's build instead of rebuilding
+        first.watcher.add_listener(first.on_change)
+        first.watcher.poll()
+        assert first.snapshot().generation == 2 and first.builds == 1
+        print("✅ PASS: New generation published atomically and picked up by peers")
+
+        # The old generation stays readable for in-flight readers
+        assert snap.read_text("00_README.md") is not None
+        reopened = IndexSnapshot(os.path.join(index_dir, "snapshot-2.bin"))
+        assert reopened.fingerprint == second.snapshot().fingerprint
+        print("✅ PASS: Previous generation remains mapped for existing readers")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Index Tests")
+    print("=" * 60)
+
+    test_shared_index_build_and_swap()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
@@ -32,8 +32,9 @@ def test_tool_functionality():
         if 'tool' in sys.modules:
             del sys.modules['tool']
         
-        # Import tool (this will validate config on import)
+        # Import tool and validate config (validation is deferred until first use)
         import tool
+        tool.load_config()
         
         print("\n✅ PASS: Module imported successfully with valid config")
         
@@ -135,6 +136,7 @@ def test_config_error_handling():
         
         try:
             import tool
+            tool.load_config()
             print("❌ FAIL: Should have raised RuntimeError for invalid JSON")
         except RuntimeError as e:
             if "Invalid JSON" in str(e):
@@ -152,6 +154,7 @@ def test_config_error_handling():
         
         try:
             import tool
+            tool.load_config()
             print("❌ FAIL: Should have raised RuntimeError for missing key")
         except RuntimeError as e:
             if "ai_context_path" in str(e):
@@ -169,6 +172,7 @@ def test_config_error_handling():
         
         try:
             import tool
+            tool.load_config()
             print("❌ FAIL: Should have raised RuntimeError for non-existent path")
         except RuntimeError as e:
             if "does not exist" in str(e):
@@ -0,0 +1,260 @@
+"""
+Test snapshot-isolated reads per call and per session for IntelliHub MCP tool.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import anyio
+from mcp.client.session import ClientSession
+from mcp.shared.memory import create_client_server_memory_streams
+
+from links import LinkGraph
+from metadata import MetadataTable
+from roots import ContentCache, pinned
+from vectors import VectorIndex
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the index")
+        time.sleep(0.01)
+
+
+def _use_config(tmpdir, **settings):
+    ai_context = os.path.join(tmpdir, "ai_context")
+    _write(os.path.join(ai_context, "00_README.md"), "# Readme\n[Lore](lore_core.md)\n")
+    _write(os.path.join(ai_context, "lore_core.md"), "# Lore\nThe Lumen hums.\n")
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    with open(config_path, "w") as f:
+        json.dump(
+            dict(
+                {"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")},
+                rate_limits=False,
+                access_log=False,
+                **settings,
+            ),
+            f,
+        )
+    return ai_context
+
+
+def _change(root, path, text):
+    """Change a file and wait until the index has published its next generation."""
+    # root.index: root.snapshot() is the pinned one inside pinned()
+    generation = root.index.snapshot().generation
+    _write(os.path.join(root.path, path), text)
+    root.watcher.poll()
+    _wait_for(lambda: root.index.snapshot() is not None and root.index.snapshot().generation > generation)
+
+
+def test_versions():
+    """Test that derived index versions and cached text never change under a reader."""
+    print("\n=== Testing Versions ===")
+
+    graph = LinkGraph()
+    graph.set_links("a.md", ["b.md"])
+    graph.add_file("b.md")
+    table = MetadataTable()
+    table.set_file("a.md", {"status": "draft"})
+    vectors = VectorIndex()
+    vectors.set_file("a.md", "# A\nCrystals hum under the lumen.\n")
+
+    next_graph, next_table, next_vectors = graph.copy(), table.copy(), vectors.copy()
+    next_graph.set_links("a.md", [])
+    next_graph.set_links("c.md", ["b.md"])
+    next_table.set_file("a.md", {"status": "canonical"})
+    next_vectors.remove_file("a.md")
+
+    assert [r["path"] for r in graph.related("b.md")] == ["a.md"] and graph.orphans() == ["a.md"]
+    assert [r["path"] for r in next_graph.related("b.md")] == ["c.md"]
+    assert table.select({"status": ["draft"]}) == {"a.md"}
+    assert next_table.select({"status": ["draft"]}) == set()
+    assert len(vectors) == 1 and len(next_vectors) == 0
+    print("✅ PASS: Updating a copy leaves the version readers hold unchanged")
+
+    cache = ContentCache(1024 * 1024)
+    cache.put("a.md", "old", (1, 3))
+    assert cache.get("a.md", (1, 3)) == "old" and cache.get("a.md") == "old"
+    assert cache.get("a.md", (2, 3)) is None and cache.peek("a.md", (2, 3)) is None
+    print("✅ PASS: Cached text of another file version is a miss")
+
+
+def test_pinned_reads():
+    """Test that a pinned call sees one generation while the corpus changes."""
+    print("\n=== Testing Pinned Reads ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            _use_config(tmpdir)
+            sys.modules.pop("tool", None)
+            import tool
+
+            root = tool.get_root()
+            root.warm_cache_fraction = 0
+            root.start()
+            _wait_for(lambda: root.started and root.snapshot() is not None)
+            root.link_graph()
+            tool.read_file("lore_core.md")
+
+            with pinned():
+                generation = root.snapshot().generation
+                graph = root.link_graph()
+                assert tool.list_roots()[0]["pins"] == {
+                    "views": 1,
+                    "generations": {str(generation): 1},
+                    "stale": 0,
+                }
+
+                _change(root, "lore_core.md", "# Lore\nThe Lumen sings.\n[Readme](00_README.md)\n")
+                assert tool.read_file("lore_core.md") == "# Lore\nThe Lumen hums.\n"
+                assert tool.search("sings") == [] and tool.search("hums")[0]["file"] == "lore_core.md"
+                assert root.snapshot().generation == generation and root.link_graph() is graph
+                assert graph.orphans() == []
+            print("✅ PASS: A pinned call keeps reading its generation after a rebuild")
+
+            assert tool.read_file("lore_core.md").endswith("[Readme](00_README.md)\n")
+            assert root.snapshot().generation > generation
+            assert root.link_graph() is not graph
+            assert [r["links_to"] for r in root.link_graph().related("lore_core.md")] == [True]
+            print("✅ PASS: The next call sees the published generation")
+
+            assert tool.list_roots()[0]["pins"]["views"] == 0
+            print("✅ PASS: Views are released with the call that pinned them")
+
+            # A rebuild that cannot run yet: unchanged files are still read
+            # from the last generation, changed ones from the disk.
+            root.index.build = False
+            published = root.snapshot()
+            _write(os.path.join(root.path, "lore_core.md"), "# Lore\nThe Lumen is silent.\n")
+            os.remove(os.path.join(root.path, "00_README.md"))
+            _write(os.path.join(root.path, "notes.md"), "# Notes\n[Lore](lore_core.md)\n")
+            root.watcher.poll()
+            _wait_for(lambda: root.index.snapshot() is None)
+            with pinned():
+                view = root.view()
+                assert view.stale and view.snapshot.base is published
+                assert tool.list_roots()[0]["pins"]["stale"] == 1
+                assert tool.read_file("lore_core.md") == "# Lore\nThe Lumen is silent.\n"
+                assert tool.search("silent")[0]["line"] == 2 and tool.search("sings") == []
+                try:
+                    tool.read_file("00_README.md")
+                    assert False, "a deleted file should not be served from a stale generation"
+                except FileNotFoundError:
+                    pass
+                assert view.snapshot.read_bytes("notes.md") is not None
+                assert [r["path"] for r in root.link_graph().related("lore_core.md")] == ["notes.md"]
+            print("✅ PASS: Reads see their own writes while a rebuild is pending")
+
+            root.index.build = True
+            root.index.refresh()
+            with pinned():
+                assert not root.view().stale and root.snapshot().generation > generation
+                assert tool.read_file("notes.md") == "# Notes\n[Lore](lore_core.md)\n"
+                assert [r["path"] for r in root.link_graph().related("lore_core.md")] == ["notes.md"]
+            print("✅ PASS: Derived indexes advance with the published generation")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                sys.modules["tool"].get_root().stop()
+            sys.modules.pop("tool", None)
+
+
+async def _exercise_sessions(server):
+    root = server.tool_impl.get_root()
+
+    async def read(client):
+        result = await client.call_tool("read_file", {"path": "lore_core.md"})
+        return result.content[0].text
+
+    async with create_client_server_memory_streams() as (first_streams, first_server):
+        async with create_client_server_memory_streams() as (second_streams, second_server):
+            async with anyio.create_task_group() as tg:
+                for streams in (first_server, second_server):
+                    tg.start_soon(
+                        lambda s=streams: server.mcp.run(s[0], s[1], server.mcp.create_initialization_options())
+                    )
+                async with ClientSession(first_streams[0], first_streams[1]) as first:
+                    await first.initialize()
+                    while not (root.started and root.snapshot() is not None):
+                        await anyio.sleep(0.01)
+                    assert await read(first) == "# Lore\nThe Lumen hums.\n"
+
+                    await asyncio.to_thread(_change, root, "lore_core.md", "# Lore\nThe Lumen sings.\n")
+                    assert await read(first) == "# Lore\nThe Lumen hums.\n"
+                    print("✅ PASS: Calls of one session share a generation")
+
+                    async with ClientSession(second_streams[0], second_streams[1]) as second:
+                        await second.initialize()
+                        assert await read(second) == "# Lore\nThe Lumen sings.\n"
+                    print("✅ PASS: Another session pins the current generation")
+
+                    for views in list(server.SESSION_VIEWS.values()):
+                        for view in views.values():
+                            view.taken_at -= 60
+                    assert await read(first) == "# Lore\nThe Lumen sings.\n"
+                    print("✅ PASS: Session pins expire after session_pin_seconds")
+                tg.cancel_scope.cancel()
+
+
+def test_session_pins():
+    """Test session_pin_seconds through the server's call_tool handler."""
+    print("\n=== Testing Session Pins ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        try:
+            _use_config(tmpdir, session_pin_seconds=30)
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+            import server
+
+            asyncio.run(_exercise_sessions(server))
+
+            with open(config_path, "w") as f:
+                json.dump({"ai_context_path": tmpdir, "session_pin_seconds": -1}, f)
+            try:
+                server.tool_impl.reload_config()
+                assert False, "negative session_pin_seconds should be rejected"
+            except RuntimeError as e:
+                assert "session_pin_seconds" in str(e)
+            print("✅ PASS: Malformed session_pin_seconds rejected")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "server" in sys.modules:
+                sys.modules["server"].get_watcher().stop()
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Snapshot Isolation Tests")
+    print("=" * 60)
+
+    test_versions()
+    test_pinned_reads()
+    test_session_pins()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
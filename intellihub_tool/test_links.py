@@ -0,0 +1,124 @@
+"""
+Test the Markdown link graph, related() and link checks for IntelliHub MCP tool.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from links import extract_links
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_extract_links():
+    """Test link parsing and resolution."""
+    print("\n=== Testing Link Extraction ===")
+
+    text = (
+        "See [overview](../architecture_overview.md#layers) and [seed][s].\n"
+        "![diagram](img/flow.png) [web](https://example.com) [top](#intro)\n"
+        "```\n[not a link](code.md)\n```\n"
+        "[s]: seed_type_schema.md \"Seed\"\n"
+        "[escape](../../outside.md)\n"
+    )
+    assert extract_links("schemas/mutagen_schema.md", text) == [
+        "architecture_overview.md",
+        "schemas/img/flow.png",
+        "schemas/seed_type_schema.md",
+    ]
+    print("✅ PASS: Relative, reference and image links resolved; others skipped")
+
+
+def test_link_graph_tools():
+    """Test related(), broken links, orphans and incremental updates."""
+    print("\n=== Testing Link Graph ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        _write(os.path.join(ai_context, "00_README.md"), "[Overview](architecture_overview.md)\n")
+        _write(
+            os.path.join(ai_context, "architecture_overview.md"),
+            "[Seeds](schemas/seed_type_schema.md) [Gone](missing.md)\n",
+        )
+        _write(os.path.join(ai_context, "schemas", "seed_type_schema.md"), "# Seed\n")
+        _write(os.path.join(ai_context, "lore_core.md"), "# Lore\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")},
+                    f,
+                )
+            sys.modules.pop("tool", None)
+            import tool
+
+            near = tool.related("architecture_overview.md")
+            assert [(r["path"], r["links_to"], r["linked_from"]) for r in near] == [
+                ("00_README.md", False, True),
+                ("schemas/seed_type_schema.md", True, False),
+            ]
+            far = tool.related("00_README.md", depth=2)
+            assert [(r["path"], r["distance"]) for r in far] == [
+                ("architecture_overview.md", 1),
+                ("schemas/seed_type_schema.md", 2),
+            ]
+            print("✅ PASS: related() follows links both ways up to depth")
+
+            report = tool.diagnose()
+            assert report["links"]["broken"] == [
+                {"source": "architecture_overview.md", "target": "missing.md"}
+            ]
+            assert report["links"]["orphans"] == ["lore_core.md"]
+            assert any("missing.md" in issue for issue in report["issues"])
+            print("✅ PASS: diagnose() reports broken links and orphans")
+
+            # Once started, the graph is built from the snapshot and patched per change
+            root = tool.get_root()
+            root.start()
+            for _ in range(500):
+                if root.started and root.snapshot() is not None:
+                    break
+                time.sleep(0.01)
+            graph = root.link_graph()
+            assert root.link_graph() is graph
+
+            _write(os.path.join(ai_context, "missing.md"), "[Lore](lore_core.md)\n")
+            root.watcher.poll()
+            updated = root.link_graph()
+            assert updated is not graph and root.link_graph() is updated
+            assert updated.broken() == []
+            assert updated.orphans() == []
+            print("✅ PASS: Graph updated incrementally from watcher changes")
+
+            # The change went into a new version; the one readers held is unchanged.
+            assert graph.broken() == [{"source": "architecture_overview.md", "target": "missing.md"}]
+            print("✅ PASS: Earlier graph versions are never modified")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                sys.modules["tool"].get_root().stop()
+            sys.modules.pop("tool", None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Link Graph Tests")
+    print("=" * 60)
+
+    test_extract_links()
+    test_link_graph_tools()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
@@ -0,0 +1,151 @@
+"""
+Test front-matter parsing and metadata filters for IntelliHub MCP tool.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from metadata import MetadataTable, normalize_filters, parse_front_matter
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+FORGE = "---\nmodule: mon_forge\nstatus: canonical\ntags: [lore, Mutagens]\n---\n# Forge\nThe forge smelts.\n"
+DRAFT = "---\nModule: mon_forge\nstatus: 'draft'\ntags:\n  - lore\n---\n# Draft forge\nForge notes.\n"
+SEEDS = "---\nmodule: seeds\nstatus: canonical\n---\n# Seeds\nNo forge here, but the word is.\n"
+
+
+def test_front_matter():
+    """Test parsing of scalar and list fields."""
+    print("\n=== Testing Front Matter ===")
+
+    assert parse_front_matter(FORGE) == {
+        "module": "mon_forge",
+        "status": "canonical",
+        "tags": ["lore", "Mutagens"],
+    }
+    assert parse_front_matter(DRAFT) == {"module": "mon_forge", "status": "draft", "tags": ["lore"]}
+    print("✅ PASS: Scalars, quoted values, inline and dash lists parsed")
+
+    assert parse_front_matter("---\ntags:\n- lore\n- mutagens\nstatus: draft\n---\n") == {
+        "tags": ["lore", "mutagens"],
+        "status": "draft",
+    }
+    print("✅ PASS: Dash lists with unindented items parsed")
+
+    assert parse_front_matter("---\nstatus: draft\n- canonical\ntags: [lore]\n  - mutagens\n---\n") == {
+        "status": "draft",
+        "tags": ["lore"],
+    }
+    print("✅ PASS: Dash items after a key with a value are ignored")
+
+    assert parse_front_matter("# Title\n---\nkey: value\n---\n") == {}
+    assert parse_front_matter("---\nkey: value\n\nBody without a closing fence\n") == {}
+    print("✅ PASS: Text without a leading, closed block has no front matter")
+
+
+def test_metadata_table():
+    """Test filter selection and per-file updates."""
+    print("\n=== Testing Metadata Table ===")
+
+    table = MetadataTable()
+    table.set_file("forge.md", parse_front_matter(FORGE))
+    table.set_file("draft.md", parse_front_matter(DRAFT))
+    table.set_file("seeds.md", parse_front_matter(SEEDS))
+
+    assert table.select(normalize_filters({"module": "MON_FORGE"})) == {"forge.md", "draft.md"}
+    assert table.select(normalize_filters(["module=mon_forge", "status=canonical"])) == {"forge.md"}
+    assert table.select(normalize_filters({"status": ["draft", "canonical"], "tags": "mutagens"})) == {"forge.md"}
+    assert table.select(normalize_filters({"owner": "nobody"})) == set()
+    print("✅ PASS: Filters intersect across keys and union within a key")
+
+    table.set_file("forge.md", parse_front_matter(SEEDS))
+    table.remove_file("draft.md")
+    assert table.select(normalize_filters({"module": "mon_forge"})) == set()
+    assert "mon_forge" not in table.columns["module"]
+    print("✅ PASS: Updated and removed files leave no stale cells")
+
+    for bad in ({"module": 3}, ["module"], "module=mon_forge"):
+        try:
+            normalize_filters(bad)
+            assert False, f"{bad!r} should be rejected"
+        except ValueError:
+            pass
+    print("✅ PASS: Malformed filters rejected")
+
+
+def test_filtered_tools():
+    """Test list_files() and search() filters, and that only matches are read."""
+    print("\n=== Testing Filtered list_files() and search() ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        _write(os.path.join(ai_context, "forge.md"), FORGE)
+        _write(os.path.join(ai_context, "module_purposes", "draft.md"), DRAFT)
+        _write(os.path.join(ai_context, "seeds.md"), SEEDS)
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")},
+                    f,
+                )
+            sys.modules.pop("tool", None)
+            import tool
+
+            assert tool.list_files(filters={"status": "canonical"}) == ["forge.md", "seeds.md"]
+            results = tool.search("smelts", filters={"module": "mon_forge"})
+            assert [r["file"] for r in results] == ["forge.md"]
+            assert tool.search("no forge", filters={"module": "mon_forge"}) == []
+            print("✅ PASS: Passive root filters listings and searches")
+
+            root = tool.get_root()
+            root.warm_cache_fraction = 0  # count only the reads below
+            root.start()
+            for _ in range(500):
+                if root.started and root.snapshot() is not None:
+                    break
+                time.sleep(0.01)
+
+            sizes = tool.list_files(sizes=True, filters=["module=mon_forge", "status=draft"])
+            assert [entry["path"] for entry in sizes] == ["module_purposes/draft.md"]
+            misses = root.cache.misses
+            results = tool.search("forge", filters={"status": "canonical"})
+            assert {r["file"] for r in results} == {"forge.md", "seeds.md"}
+            assert root.cache.misses - misses == 2
+            print("✅ PASS: Filtered search reads only the matching files")
+
+            _write(os.path.join(ai_context, "seeds.md"), SEEDS.replace("canonical", "retired"))
+            root.watcher.poll()
+            assert tool.list_files(filters={"status": "canonical"}) == ["forge.md"]
+            print("✅ PASS: Front-matter edits update the table")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                sys.modules["tool"].get_root().stop()
+            sys.modules.pop("tool", None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Metadata Tests")
+    print("=" * 60)
+
+    test_front_matter()
+    test_metadata_table()
+    test_filtered_tools()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
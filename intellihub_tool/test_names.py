@@ -0,0 +1,93 @@
+"""
+Test fuzzy name resolution for get_schema and get_module_purpose.
+"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from names import NameIndex
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_name_index_ranking():
+    """Test normalized and trigram matching in NameIndex."""
+    print("\n=== Testing Name Index ===")
+
+    index = NameIndex(["seed_type", "mutagen", "mon_forge", "monsterseed"])
+    assert index.lookup("MonForge")[0] == ("mon_forge", 1.0)
+    assert index.lookup("seedtype")[0] == ("seed_type", 1.0)
+    print("✅ PASS: Case and separators are ignored")
+
+    best, score = index.lookup("mutagn")[0]
+    assert best == "mutagen" and 0 < score < 1
+    assert index.lookup("zzzz") == []
+    print("✅ PASS: Typos ranked by trigram similarity")
+
+
+def test_fuzzy_schema_and_module_lookup():
+    """Test that near-misses resolve in one call and misses suggest names."""
+    print("\n=== Testing Fuzzy Lookup ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        _write(os.path.join(ai_context, "schemas", "seed_type_schema.md"), "# Seed Type\n")
+        _write(os.path.join(ai_context, "schemas", "mutagen_schema.md"), "# Mutagen\n")
+        _write(os.path.join(ai_context, "module_purposes", "mon_forge.md"), "# Mon Forge\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump({"ai_context_path": ai_context}, f)
+            sys.modules.pop("tool", None)
+            import tool
+
+            assert tool.get_schema("seed_type") == "# Seed Type\n"
+            assert tool.get_schema("seedtype") == "# Seed Type\n"
+            assert tool.get_module_purpose("MonForge") == "# Mon Forge\n"
+            print("✅ PASS: Near-miss names resolve in one call")
+
+            try:
+                tool.get_schema("seed")
+                raise AssertionError("Ambiguous name was resolved")
+            except tool.NameNotFoundError as e:
+                assert e.suggestions[0] == "seed_type"
+                assert "Did you mean: seed_type" in str(e)
+            print("✅ PASS: Unresolved names raise with ranked suggestions")
+
+            # New files are picked up without restarting
+            _write(os.path.join(ai_context, "schemas", "lumen_schema.md"), "# Lumen\n")
+            assert tool.get_schema("Lumen") == "# Lumen\n"
+            print("✅ PASS: Name index follows directory changes")
+
+            try:
+                tool.get_schema("../../secret")
+                raise AssertionError("Traversal was not rejected")
+            except ValueError:
+                pass
+            print("✅ PASS: Traversal attempts are still rejected")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            sys.modules.pop("tool", None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Name Resolution Tests")
+    print("=" * 60)
+
+    test_name_index_ranking()
+    test_fuzzy_schema_and_module_lookup()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
@@ -0,0 +1,284 @@
+"""
+Performance regression tests for IntelliHub MCP tool.
+
+Builds a fixed synthetic capsule in a temp dir and times every tool against
+it on a started (indexed, warm) root. Latency budgets are expressed in
+calibration units, the time this machine takes for a fixed pure-Python
+workload, so they hold on slow CI runners and fast laptops alike. Peak memory
+is the tracemalloc peak of one call, which does not depend on the machine.
+
+A JSON report with every measurement is written to logs/perf_report.json
+(override with INTELLIHUB_PERF_REPORT). Compare two reports with:
+
+    python test_performance.py --compare before.json after.json
+
+INTELLIHUB_PERF_SCALE multiplies every latency budget (e.g. 2 under a
+profiler or coverage).
+"""
+import gc
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+REPORT_PATH = os.environ.get(
+    "INTELLIHUB_PERF_REPORT", str(Path(__file__).parent / "logs" / "perf_report.json")
+)
+LATENCY_SCALE = float(os.environ.get("INTELLIHUB_PERF_SCALE", "1"))
+
+# Synthetic capsule shape (fixed seed, so every run sees the same corpus)
+SEED = 46
+DOCS = 240
+SCHEMAS = 20
+MODULES = 20
+PARAGRAPHS = 6
+VOCABULARY = 800
+
+# Timed runs per operation (median is reported)
+RUNS = 7
+
+# operation -> (latency budget in calibration units, peak memory budget in KiB).
+# Raise a budget only together with a note on what made the operation slower.
+BUDGETS = {
+    "list_files": (0.05, 32),
+    "list_files_sizes": (0.2, 256),
+    "list_files_filtered": (0.05, 32),
+    "read_file": (0.05, 32),
+    "read_file_max_tokens": (0.6, 512),
+    "get_section": (0.05, 32),
+    "search": (5.0, 4096),
+    "search_filtered": (3.0, 128),
+    "search_context": (5.0, 4096),
+    "similar": (0.25, 512),
+    "similar_path": (1.0, 4096),
+    "suggest": (0.05, 16),
+    "related": (0.05, 64),
+    "get_schema": (0.05, 32),
+    "get_schema_near_miss": (0.15, 64),
+    "get_module_purpose": (0.05, 32),
+    "diagnose": (5.0, 256),
+    "list_roots": (0.05, 32),
+    "export_snapshot": (3.0, 4096),
+    "export_snapshot_delta": (3.0, 2048),
+}
+
+
+def calibrate():
+    """Seconds this machine needs for a fixed mixed workload (best of 5)."""
+    words = [f"w{i % 97}x{i % 13}" for i in range(20000)]
+    text = " ".join(words)
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        counts = {}
+        for word in text.split():
+            counts[word] = counts.get(word, 0) + 1
+        sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+        json.loads(json.dumps(counts))
+        for needle in ("w5x", "w96x12", "absent"):
+            text.lower().count(needle)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def build_capsule(path):
+    """Write the synthetic capsule; returns the list of document paths."""
+    rng = random.Random(SEED)
+    vocabulary = [
+        "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10)))
+        for _ in range(VOCABULARY)
+    ]
+    # Zipf-like skew: a few words are everywhere, most are rare
+    weights = [1 / (rank + 1) for rank in range(VOCABULARY)]
+
+    def paragraph():
+        return " ".join(rng.choices(vocabulary, weights, k=rng.randint(40, 90))) + ".\n"
+
+    def write(rel_path, text):
+        full = os.path.join(path, rel_path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    docs = [f"{('lore', 'notes', 'systems')[i % 3]}/doc_{i:03d}.md" for i in range(DOCS)]
+    for i, doc in enumerate(docs):
+        links = "\n".join(
+            f"- [{other}](../{other})" for other in rng.sample(docs, 3) if other != doc
+        )
+        sections = "".join(f"## Section {s}\n{paragraph()}\n" for s in range(PARAGRAPHS))
+        write(
+            doc,
+            f"---\nmodule: module_{i % MODULES:02d}\nstatus: {('canonical', 'draft')[i % 2]}\n"
+            f"tags: [{vocabulary[i % 50]}, {vocabulary[(i * 7) % 50]}]\n---\n"
+            f"# Document {i}\n{paragraph()}\n{sections}## Links\n{links}\n",
+        )
+    for i in range(SCHEMAS):
+        write(f"schemas/schema_{i:02d}_schema.md", f"# Schema {i}\n{paragraph()}")
+    for i in range(MODULES):
+        write(f"module_purposes/module_{i:02d}.md", f"# Module {i}\n{paragraph()}")
+    write("lore_core.md", "# Lore\n" + "".join(paragraph() for _ in range(20)))
+    return docs, vocabulary
+
+
+def _measure(func):
+    """Return (median seconds over RUNS, tracemalloc peak KiB of one more run)."""
+    func()  # warm caches the way repeated production calls would
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(samples), peak / 1024
+
+
+def _operations(tool, docs, vocabulary):
+    doc = docs[17]
+    hot_word = vocabulary[3]
+    rare_word = vocabulary[VOCABULARY - 5]
+    return {
+        "list_files": lambda: tool.list_files(),
+        "list_files_sizes": lambda: tool.list_files(sizes=True),
+        "list_files_filtered": lambda: tool.list_files(filters={"module": "module_03"}),
+        "read_file": lambda: tool.read_file(doc),
+        "read_file_max_tokens": lambda: tool.read_file("lore_core.md", max_tokens=200),
+        "get_section": lambda: tool.get_section(doc, "Section 3"),
+        "search": lambda: tool.search(hot_word),
+        "search_filtered": lambda: tool.search(rare_word, filters={"status": "canonical"}),
+        "search_context": lambda: tool.search(hot_word, context_lines=2, highlight=True),
+        "similar": lambda: tool.similar(f"{hot_word} {rare_word} {vocabulary[40]}"),
+        "similar_path": lambda: tool.similar(doc),
+        "suggest": lambda: tool.suggest(hot_word[:2]),
+        "related": lambda: tool.related(doc, depth=2),
+        "get_schema": lambda: tool.get_schema("schema_07"),
+        "get_schema_near_miss": lambda: tool.get_schema("Schema07"),
+        "get_module_purpose": lambda: tool.get_module_purpose("module_05"),
+        "diagnose": lambda: tool.diagnose(),
+        "list_roots": lambda: tool.list_roots(),
+        "export_snapshot": lambda: tool.export_snapshot(),
+        "export_snapshot_delta": None,  # needs a base hash, set up below
+    }
+
+
+def run_suite():
+    """Build the capsule, measure every operation and return the report."""
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        docs, vocabulary = build_capsule(ai_context)
+        try:
+            with open(config_path, "w") as f:
+                json.dump({"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")}, f)
+            sys.modules.pop("tool", None)
+            import tool
+
+            root = tool.get_root()
+            root.start()
+            deadline = time.monotonic() + 60
+            while not root.ready and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert root.ready, f"warm-up did not finish: {root.warmup_status()}"
+
+            operations = _operations(tool, docs, vocabulary)
+            base = tool.export_snapshot()["manifest_hash"]
+            operations["export_snapshot_delta"] = lambda: tool.export_snapshot(since=base)
+
+            unit = calibrate()
+            results = {}
+            for name, func in operations.items():
+                seconds, peak_kib = _measure(func)
+                results[name] = {
+                    "ms": round(seconds * 1000, 3),
+                    "units": round(seconds / unit, 3),
+                    "peak_kib": round(peak_kib, 1),
+                }
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                sys.modules["tool"].get_root().stop()
+            sys.modules.pop("tool", None)
+
+    return {
+        "calibration_ms": round(unit * 1000, 3),
+        "capsule": {"docs": DOCS, "schemas": SCHEMAS, "modules": MODULES, "seed": SEED},
+        "operations": results,
+    }
+
+
+def write_report(report, path=REPORT_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def test_performance_budgets():
+    """Test every tool against its latency and peak-memory budget."""
+    print("\n=== Testing Performance Budgets ===")
+
+    report = run_suite()
+    write_report(report)
+    print(f"calibration unit: {report['calibration_ms']:.2f} ms; report: {REPORT_PATH}")
+
+    failures = []
+    for name, (unit_budget, kib_budget) in BUDGETS.items():
+        result = report["operations"][name]
+        over = []
+        if result["units"] > unit_budget * LATENCY_SCALE:
+            over.append(f"{result['units']} units > {unit_budget * LATENCY_SCALE}")
+        if result["peak_kib"] > kib_budget:
+            over.append(f"{result['peak_kib']} KiB > {kib_budget}")
+        if over:
+            failures.append(f"{name}: {', '.join(over)}")
+        else:
+            print(f"✅ PASS: {name}: {result['ms']} ms ({result['units']} units), {result['peak_kib']} KiB")
+    assert set(BUDGETS) == set(report["operations"]), "every operation needs a budget"
+    assert not failures, "over budget:\n" + "\n".join(failures)
+
+
+def compare_reports(before, after):
+    """Print per-operation changes between two reports."""
+    print(f"{'operation':<24} {'units':>16} {'change':>8} {'peak KiB':>20} {'change':>8}")
+    for name in sorted(set(before["operations"]) | set(after["operations"])):
+        old, new = before["operations"].get(name), after["operations"].get(name)
+        if old is None or new is None:
+            print(f"{name:<24} {'(only in ' + ('after' if old is None else 'before') + ')':>16}")
+            continue
+        units = (new["units"] - old["units"]) / old["units"] * 100 if old["units"] else 0.0
+        peak = (new["peak_kib"] - old["peak_kib"]) / old["peak_kib"] * 100 if old["peak_kib"] else 0.0
+        print(
+            f"{name:<24} {old['units']:>7.3f} -> {new['units']:<7.3f} {units:>+7.1f}% "
+            f"{old['peak_kib']:>9.1f} -> {new['peak_kib']:<9.1f} {peak:>+7.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--compare":
+        with open(sys.argv[2], encoding="utf-8") as f, open(sys.argv[3], encoding="utf-8") as g:
+            compare_reports(json.load(f), json.load(g))
+        sys.exit(0)
+
+    print("=" * 60)
+    print("IntelliHub MCP Performance Tests")
+    print("=" * 60)
+
+    test_performance_budgets()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
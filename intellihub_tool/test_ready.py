@@ -0,0 +1,85 @@
+"""
+Test background warm-up and the /ready endpoint for IntelliHub MCP server.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_warm_up_and_ready():
+    """Test that /ready answers 503 until every root is warm, then 200."""
+    print("\n=== Testing Warm-up and /ready ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        _write(os.path.join(ai_context, "00_README.md"), "[Lore](lore_core.md)\n")
+        _write(os.path.join(ai_context, "lore_core.md"), "---\nstatus: canonical\n---\n# Lore\nLumen.\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")},
+                    f,
+                )
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+            import server
+
+            response = asyncio.run(server.ready_check(None))
+            body = json.loads(response.body)
+            assert response.status_code == 503 and not body["ready"]
+            assert body["roots"][0]["warmup"]["phase"] == "idle"
+            assert "Lumen." in server.tool_impl.read_file("lore_core.md")
+            print("✅ PASS: Not ready before warm-up, but tools already answer")
+
+            server.start_index()
+            root = server.tool_impl.get_root()
+            deadline = time.monotonic() + 10
+            while not root.ready and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            response = asyncio.run(server.ready_check(None))
+            body = json.loads(response.body)
+            assert response.status_code == 200 and body["ready"]
+            status = body["roots"][0]
+            assert status["warmup"]["derived"] == ["metadata", "links", "vectors"]
+            assert status["warmup"]["cached_files"] == 2 and status["cache"]["entries"] == 2
+            assert status["index"]["generation"] == 1 and status["index"]["current"]
+            print("✅ PASS: Ready once indexed, derived indexes built and cache prefilled")
+
+            server.tool_impl.read_file("lore_core.md")
+            assert root.cache.stats()["hits"] == 1
+            assert server.tool_impl.list_roots()[0]["ready"]
+            print("✅ PASS: First read after warm-up is a cache hit")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "server" in sys.modules:
+                sys.modules["server"].tool_impl.get_root().stop()
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Readiness Tests")
+    print("=" * 60)
+
+    test_warm_up_and_ready()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
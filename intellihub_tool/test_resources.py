@@ -0,0 +1,147 @@
+"""
+Test MCP resources and change subscriptions for IntelliHub MCP server.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import anyio
+from mcp import types
+from mcp.client.session import ClientSession
+from mcp.shared.memory import create_client_server_memory_streams
+from pydantic import AnyUrl
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+async def _exercise_resources(server, ai_context, config_path):
+    notifications = []
+
+    async def message_handler(message):
+        if isinstance(message, types.ServerNotification):
+            notifications.append(message.root)
+
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                lambda: server.mcp.run(
+                    server_streams[0],
+                    server_streams[1],
+                    server.mcp.create_initialization_options(),
+                )
+            )
+            async with ClientSession(
+                client_streams[0], client_streams[1], message_handler=message_handler
+            ) as client:
+                init = await client.initialize()
+                assert init.capabilities.resources.subscribe
+                print("✅ PASS: Server advertises resource subscriptions")
+
+                # Pagination walks every file exactly once
+                seen = []
+                cursor = None
+                while True:
+                    page = await client.list_resources(cursor)
+                    assert len(page.resources) <= server.RESOURCE_PAGE_SIZE
+                    seen.extend(r.name for r in page.resources)
+                    cursor = page.nextCursor
+                    if cursor is None:
+                        break
+                assert sorted(seen) == sorted(server.tool_impl.list_files())
+                print(f"✅ PASS: Listed {len(seen)} resources across pages")
+
+                uri = AnyUrl(server.resource_uri("lore_core.md"))
+                result = await client.read_resource(uri)
+                assert result.contents[0].text == "# Lore\n"
+                print("✅ PASS: read_resource returns file contents")
+
+                await client.subscribe_resource(uri)
+                _write(os.path.join(ai_context, "lore_core.md"), "# Lore\n\nUpdated.\n")
+
+                deadline = time.monotonic() + 5
+                while time.monotonic() < deadline:
+                    if any(
+                        isinstance(n, types.ResourceUpdatedNotification)
+                        and str(n.params.uri) == str(uri)
+                        for n in notifications
+                    ):
+                        break
+                    await anyio.sleep(0.05)
+                else:
+                    raise AssertionError("No resources/updated notification received")
+                print("✅ PASS: Subscribed session notified of file change")
+
+                config = json.loads(config_path.read_text())
+                with open(config_path, "w") as f:
+                    json.dump(dict(config, roots={"extra": {"path": ai_context}}), f)
+                await asyncio.to_thread(server.tool_impl.reload_config)
+                while server.tool_impl.get_root("extra").snapshot() is None:
+                    await anyio.sleep(0.01)
+                await client.subscribe_resource(AnyUrl(server.resource_uri("lore_core.md", "extra")))
+                assert ("extra", "lore_core.md") in server.SUBSCRIPTIONS
+                with open(config_path, "w") as f:
+                    json.dump(config, f)
+                await asyncio.to_thread(server.tool_impl.reload_config)
+                assert [key for key in server.SUBSCRIPTIONS if key[0] == "extra"] == []
+                assert ("default", "lore_core.md") in server.SUBSCRIPTIONS
+                print("✅ PASS: Subscriptions of a root removed by a reload are dropped")
+
+            tg.cancel_scope.cancel()
+
+
+def test_resources_and_subscriptions():
+    """Test resource listing, reading and change notifications."""
+    print("\n=== Testing Resources ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        _write(os.path.join(ai_context, "lore_core.md"), "# Lore\n")
+        for i in range(250):
+            _write(os.path.join(ai_context, "notes", f"note_{i:03}.md"), f"Note {i}\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {
+                        "ai_context_path": ai_context,
+                        "index_path": os.path.join(tmpdir, "index"),
+                    },
+                    f,
+                )
+
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+            import server
+
+            server.get_watcher().interval = 0.05
+            asyncio.run(_exercise_resources(server, ai_context, config_path))
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "server" in sys.modules:
+                sys.modules["server"].get_watcher().stop()
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Resource Tests")
+    print("=" * 60)
+
+    test_resources_and_subscriptions()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
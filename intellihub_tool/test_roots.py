@@ -0,0 +1,120 @@
+"""
+Test multiple knowledge roots and hot config reload for IntelliHub MCP tool.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _write_config(config_path, config):
+    with open(config_path, "w") as f:
+        json.dump(config, f)
+    # Make sure the mtime moves even on coarse-grained filesystems
+    stat = os.stat(config_path)
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_multiple_roots_and_reload():
+    """Test root selection, per-root caches and reload without restart."""
+    print("\n=== Testing Knowledge Roots ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        game = os.path.join(tmpdir, "game")
+        tools = os.path.join(tmpdir, "tools")
+        extra = os.path.join(tmpdir, "extra")
+        _write(os.path.join(game, "lore_core.md"), "# Lore\n")
+        _write(os.path.join(tools, "lore_core.md"), "# Tooling lore\n")
+        _write(os.path.join(extra, "notes.md"), "# Extra\n")
+
+        config = {
+            "roots": {"game": game, "tools": {"path": tools, "memory_budget_mb": 1}},
+            "default_root": "game",
+            "index_path": os.path.join(tmpdir, "index"),
+        }
+
+        try:
+            _write_config(config_path, config)
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+            import tool
+            import server
+
+            assert tool.read_file("lore_core.md") == "# Lore\n"
+            assert tool.read_file("lore_core.md", root="tools") == "# Tooling lore\n"
+            assert [r["name"] for r in tool.list_roots()] == ["game", "tools"]
+            print("✅ PASS: Tools read from the default or the named root")
+
+            try:
+                tool.list_files(root="missing")
+                raise AssertionError("Unknown root was accepted")
+            except ValueError as e:
+                assert "game" in str(e) and "tools" in str(e)
+            print("✅ PASS: Unknown root rejected with the available roots")
+
+            assert server.resource_uri("lore_core.md") == "intellihub:///lore_core.md"
+            uri = server.resource_uri("lore_core.md", "tools")
+            assert uri == "intellihub://tools/lore_core.md"
+            assert server.resource_path(uri) == ("tools", "lore_core.md")
+            print("✅ PASS: Resource URIs carry the root name")
+
+            # Caching only starts once the root is watched
+            tools_root = tool.get_root("tools")
+            tools_root.warm_cache_fraction = 0  # count only the reads below
+            tools_root.start()
+            deadline = time.monotonic() + 5
+            while not tools_root.started and time.monotonic() < deadline:
+                time.sleep(0.01)
+            tool.read_file("lore_core.md", root="tools")
+            tool.read_file("lore_core.md", root="tools")
+            assert tools_root.cache.stats()["hits"] == 1
+            _write(os.path.join(tools, "lore_core.md"), "# Tooling lore v2\n")
+            tools_root.watcher.poll()
+            assert tool.read_file("lore_core.md", root="tools") == "# Tooling lore v2\n"
+            print("✅ PASS: Per-root cache serves hits and drops changed files")
+
+            # Hot reload: add a root, keep unchanged roots as they are
+            tool.CONFIG_RECHECK = 0
+            config["roots"]["extra"] = extra
+            _write_config(config_path, config)
+            assert tool.list_files(root="extra") == ["notes.md"]
+            assert tool.get_root("tools") is tools_root
+            print("✅ PASS: Config edits apply without a restart")
+
+            # A broken edit keeps the last good config and is reported
+            _write_config(config_path, {"roots": {"game": os.path.join(tmpdir, "gone")}})
+            assert tool.read_file("notes.md", root="extra") == "# Extra\n"
+            report = tool.diagnose()
+            assert any("Config reload failed" in issue for issue in report["issues"])
+            print("✅ PASS: Invalid reload keeps the previous config")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                for root in sys.modules["tool"].get_roots():
+                    root.stop()
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Knowledge Root Tests")
+    print("=" * 60)
+
+    test_multiple_roots_and_reload()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
@@ -0,0 +1,278 @@
+"""
+Test rate limiting and fair scheduling for IntelliHub MCP tool.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import anyio
+from mcp.client.session import ClientSession
+from mcp.shared.memory import create_client_server_memory_streams
+
+from scheduling import FairScheduler, RateLimiter, RateLimitError, parse_rate_limits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class Session:
+    """Stand-in for an MCP session (weakly referenced by the limiter)."""
+
+
+def test_rate_limits():
+    """Test heavy/cheap budgets, throttling, rejection and per-client limits."""
+    print("\n=== Testing Rate Limits ===")
+
+    clock = FakeClock()
+    limiter = RateLimiter(
+        {
+            "heavy": {"session": {"rate": 1, "burst": 2}, "client": {"rate": 0}},
+            "cheap": {"client": {"rate": 1, "burst": 3}},
+            "max_wait": 1.5,
+        },
+        clock=clock,
+    )
+    session = Session()
+
+    assert limiter.admit("search", session, "addr:a") == 0
+    assert limiter.admit("diagnose", session, "addr:a") == 0
+    assert limiter.admit("similar", session, "addr:a") == 1.0
+    try:
+        limiter.admit("search", session, "addr:a")
+        assert False, "fourth heavy call should be rejected"
+    except RateLimitError as e:
+        assert "session" in str(e) and "retry in 2.0 s" in str(e)
+    print("✅ PASS: Heavy calls throttled, then rejected past max_wait")
+
+    assert limiter.admit("read_file", session, "addr:a") == 0
+    assert limiter.admit("search", Session(), "addr:b") == 0
+    print("✅ PASS: Cheap tools and other sessions keep their own budgets")
+
+    for _ in range(2):
+        assert limiter.admit("read_file", Session(), "addr:a") == 0
+    assert limiter.admit("read_file", Session(), "addr:a") == 1.0
+    try:
+        limiter.admit("read_file", Session(), "addr:a")
+        assert False, "client over its cheap budget should be rejected"
+    except RateLimitError as e:
+        assert "client" in str(e)
+    clock.now += 0.5
+    assert limiter.admit("read_file", Session(), "addr:a") == 1.5
+    print("✅ PASS: Client budget shared by all of a client's sessions")
+
+    stats = limiter.stats()
+    assert stats["calls"]["heavy"] == {
+        "admitted": 4,
+        "throttled": 1,
+        "rejected": 1,
+        "throttle_seconds": 1.0,
+    }
+    assert stats["limited_clients"]["addr:a"] == {"throttled": 3, "rejected": 2}
+    print("✅ PASS: Throttling and rejections counted")
+
+    limiter.configure(False)
+    assert all(limiter.admit("search", session, "addr:a") == 0 for _ in range(50))
+    print("✅ PASS: rate_limits false disables limiting")
+
+    for bad in ({"heavy": {"session": {"rate": -1}}}, {"fast": {}}, "yes"):
+        try:
+            parse_rate_limits(bad)
+            assert False, f"{bad!r} should be rejected"
+        except ValueError:
+            pass
+    print("✅ PASS: Malformed rate_limits rejected")
+
+
+def test_fair_scheduler():
+    """Test that waiting calls are served round-robin across sessions."""
+    print("\n=== Testing Fair Scheduler ===")
+
+    async def scenario():
+        scheduler = FairScheduler(slots=1)
+        order = []
+        release = asyncio.Event()
+
+        async def call(key, label):
+            async with scheduler.slot(key):
+                order.append(label)
+                await release.wait()
+
+        first = asyncio.create_task(call("greedy", "g0"))
+        await asyncio.sleep(0)
+        tasks = [asyncio.create_task(call("greedy", f"g{i}")) for i in range(1, 4)]
+        tasks.append(asyncio.create_task(call("polite", "p1")))
+        tasks.append(asyncio.create_task(call("other", "o1")))
+        cancelled = asyncio.create_task(call("other", "o2"))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queued"] == 6
+        cancelled.cancel()
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(first, *tasks)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(scenario())
+    assert order == ["g0", "g1", "p1", "o1", "g2", "g3"]
+    assert stats["running"] == 0 and stats["queued"] == 0 and stats["max_queued"] == 6
+    print("✅ PASS: Sessions take turns; a cancelled waiter gives up its place")
+
+
+async def _exercise_limits(server):
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(
+                lambda: server.mcp.run(
+                    server_streams[0],
+                    server_streams[1],
+                    server.mcp.create_initialization_options(),
+                )
+            )
+            async with ClientSession(client_streams[0], client_streams[1]) as client:
+                await client.initialize()
+
+                first = await client.call_tool("search", {"query": "lore"})
+                assert not first.isError
+                second = await client.call_tool("search", {"query": "lore"})
+                assert second.isError and "Rate limit exceeded" in second.content[0].text
+                print("✅ PASS: Session over its heavy budget gets an error result")
+
+                cheap = await client.call_tool("read_file", {"path": "lore_core.md"})
+                assert not cheap.isError
+                print("✅ PASS: Cheap tools still served")
+
+            tg.cancel_scope.cancel()
+
+
+def test_rate_limited_session():
+    """Test limits applied by the server's call_tool handler."""
+    print("\n=== Testing Rate-Limited Session ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        os.makedirs(ai_context)
+        with open(os.path.join(ai_context, "lore_core.md"), "w", encoding="utf-8") as f:
+            f.write("# Lore\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {
+                        "ai_context_path": ai_context,
+                        "index_path": os.path.join(tmpdir, "index"),
+                        "rate_limits": {"heavy": {"session": {"rate": 0.1, "burst": 1}}, "max_wait": 0},
+                    },
+                    f,
+                )
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+            import server
+
+            asyncio.run(_exercise_limits(server))
+            metrics = server.metrics()
+            assert metrics["rate_limits"]["calls"]["heavy"]["rejected"] == 1
+            assert metrics["scheduler"]["running"] == 0
+            print("✅ PASS: Rejection reported in metrics")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "server" in sys.modules:
+                sys.modules["server"].get_watcher().stop()
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+
+
+def _websocket_call(app, host, tool):
+    """Initialize a WebSocket session from host as the same client app, then call tool."""
+    from starlette.testclient import TestClient
+
+    with TestClient(app, client=(host, 50000)).websocket_connect("/mcp", subprotocols=["mcp"]) as ws:
+        ws.send_json(
+            {
+                "jsonrpc": "2.0",
+                "id": 1,
+                "method": "initialize",
+                "params": {
+                    "protocolVersion": "2025-03-26",
+                    "capabilities": {},
+                    "clientInfo": {"name": "same-app", "version": "1.0"},
+                },
+            }
+        )
+        ws.receive_json()
+        ws.send_json({"jsonrpc": "2.0", "method": "notifications/initialized"})
+        ws.send_json({"jsonrpc": "2.0", "id": 2, "method": "tools/call", "params": {"name": tool, "arguments": {}}})
+        return ws.receive_json()["result"]
+
+
+def test_websocket_clients():
+    """Test that WebSocket clients are told apart by remote address, not app name."""
+    print("\n=== Testing WebSocket Clients ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        os.makedirs(ai_context)
+        with open(os.path.join(ai_context, "lore_core.md"), "w", encoding="utf-8") as f:
+            f.write("# Lore\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {
+                        "ai_context_path": ai_context,
+                        "index_path": os.path.join(tmpdir, "index"),
+                        "access_log": False,
+                        "rate_limits": {"heavy": {"client": {"rate": 0.1, "burst": 1}}, "max_wait": 0},
+                    },
+                    f,
+                )
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+            import server
+
+            app = server._build_app()
+            assert not _websocket_call(app, "10.0.0.1", "diagnose")["isError"]
+            assert not _websocket_call(app, "10.0.0.2", "diagnose")["isError"]
+            assert server.metrics()["rate_limits"]["clients"] == 2
+            print("✅ PASS: Hosts running the same app get their own client budget")
+
+            result = _websocket_call(app, "10.0.0.1", "diagnose")
+            assert result["isError"] and "Rate limit exceeded" in result["content"][0]["text"]
+            assert list(server.metrics()["rate_limits"]["limited_clients"]) == ["addr:10.0.0.1"]
+            print("✅ PASS: A WebSocket client over budget is limited by its address")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "server" in sys.modules:
+                sys.modules["server"].get_watcher().stop()
+            for name in ("tool", "server"):
+                sys.modules.pop(name, None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Scheduling Tests")
+    print("=" * 60)
+
+    test_rate_limits()
+    test_fair_scheduler()
+    test_rate_limited_session()
+    test_websocket_clients()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
@@ -6,6 +6,7 @@ import sys
 import tempfile
 import shutil
 import json
+import time
 from pathlib import Path
 
 # We need to test without importing tool.py directly since it validates config on import
@@ -150,6 +151,75 @@ def read_file(path):
             if 'test_tool' in sys.modules:
                 del sys.modules['test_tool']
 
+def test_validated_path_cache():
+    """Test that cached path validation keeps the traversal and symlink guarantees."""
+    print("\n=== Testing Validated Path Cache ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        os.makedirs(ai_context)
+        with open(os.path.join(ai_context, "test.md"), "w") as f:
+            f.write("This is a test file")
+        outside_file = os.path.join(tmpdir, "outside.txt")
+        with open(outside_file, "w") as f:
+            f.write("This should not be accessible")
+        os.symlink(outside_file, os.path.join(ai_context, "escape.md"))
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")},
+                    f,
+                )
+            sys.modules.pop("tool", None)
+            import tool
+
+            root = tool.get_root()
+            root.start()
+            # Reads served from the snapshot are validated the same way.
+            for _ in range(500):
+                if root.started and root.snapshot() is not None:
+                    break
+                time.sleep(0.01)
+
+            assert tool.read_file("test.md") == "This is a test file"
+            assert tool.read_file("test.md") == "This is a test file"
+            assert len(root.paths) == 1
+            print("✅ PASS: Valid path cached after first read")
+
+            for bad in ("../outside.txt", outside_file, "escape.md"):
+                try:
+                    tool.read_file(bad)
+                    raise AssertionError(f"Escape was not blocked: {bad}")
+                except ValueError as e:
+                    assert "outside ai_context directory" in str(e)
+            assert len(root.paths) == 1
+            print("✅ PASS: Traversal and symlink escapes blocked and never cached")
+
+            # Swap the cached file for a symlink pointing outside
+            os.remove(os.path.join(ai_context, "test.md"))
+            os.symlink(outside_file, os.path.join(ai_context, "test.md"))
+            try:
+                tool.read_file("test.md")
+                raise AssertionError("Cached path followed a new symlink")
+            except ValueError:
+                pass
+            print("✅ PASS: Cached path re-validated after being replaced by a symlink")
+
+            root.watcher.poll()
+            assert len(root.paths) == 0
+            print("✅ PASS: Watcher change clears validated paths")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                sys.modules["tool"].get_root().stop()
+            sys.modules.pop("tool", None)
+
+
 def test_config_validation():
     """Test configuration validation."""
     print("\n=== Testing Configuration Validation ===")
@@ -273,6 +343,7 @@ if __name__ == "__main__":
     print("=" * 60)
     
     test_path_traversal_protection()
+    test_validated_path_cache()
     test_config_validation()
     
     print("\n" + "=" * 60)
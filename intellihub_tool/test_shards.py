@@ -0,0 +1,159 @@
+"""
+Test the sharded index and scatter-gather search for IntelliHub MCP tool.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from index import LOCK_NAME
+from shards import partition, shard_dir, shard_of
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+
+
+def _wait(condition, message):
+    for _ in range(1000):
+        if condition():
+            return
+        time.sleep(0.01)
+    raise AssertionError(message)
+
+
+def test_partition():
+    """Test that paths map to stable shards and partition keeps scan values."""
+    print("\n=== Testing Shard Partition ===")
+
+    paths = [f"notes/doc_{i}.md" for i in range(200)]
+    assert [shard_of(p, 4) for p in paths] == [shard_of(p, 4) for p in paths]
+    parts = partition({p: (1, 2) for p in paths}, 4)
+    assert sum(len(part) for part in parts) == 200 and all(parts)
+    assert all(shard_of(p, 4) == i and part[p] == (1, 2) for i, part in enumerate(parts) for p in part)
+    assert partition(paths[:3], 4)[shard_of(paths[0], 4)] >= {paths[0]}
+    print("✅ PASS: Every path lands in exactly one shard, the same one every time")
+
+
+def test_sharded_search():
+    """Test scatter-gather search, per-shard rebuilds and reads during a rebuild."""
+    print("\n=== Testing Sharded Search ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        index_dir = os.path.join(tmpdir, "index")
+        for i in range(30):
+            status = "canonical" if i % 3 == 0 else "draft"
+            _write(
+                os.path.join(ai_context, f"lore/doc_{i:02d}.md"),
+                f"---\nstatus: {status}\n---\n# Doc {i}\nLumen line {i}\nplain\nlumen again\n",
+            )
+        _write(os.path.join(ai_context, "schemas", "seed_schema.md"), "# Seed\nNo light here.\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {
+                        "ai_context_path": ai_context,
+                        "index_path": index_dir,
+                        "roots": {"flat": {"path": ai_context, "shards": 1}},
+                        "shards": 3,
+                    },
+                    f,
+                )
+            sys.modules.pop("tool", None)
+            import tool
+
+            root = tool.get_root()
+            assert root.shards == 3 and tool.get_root("flat").shards == 1
+            root.warm_cache_fraction = 0
+            root.start()
+            _wait(lambda: root.ready, "sharded root never became ready")
+            assert root.index.status()["workers"] == 3
+
+            # Passive roots walk the disk; snapshots (sharded or not) go in path order.
+            expected = sorted(tool.search("lumen", root="flat"), key=lambda r: (r["file"], r["line"]))
+            assert len(expected) == 60
+            assert tool.search("LUMEN") == expected
+            assert tool.search("lumen", filters={"status": "canonical"}) == tool.search(
+                "lumen", root="flat", filters={"status": "canonical"}
+            )
+            assert tool.search("nothing matches this") == []
+            assert tool.search("lumen", context_lines=2, highlight=True) == sorted(
+                tool.search("lumen", root="flat", context_lines=2, highlight=True),
+                key=lambda r: (r["file"], r["line"]),
+            )
+            print("✅ PASS: Scatter-gather results match an unsharded search, in the same order")
+
+            # Replies are matched by request id, not by holding the workers.
+            workers = root.index._workers
+            for worker in workers:
+                worker.request(-1, ("search", -1, "plain", None, 0, False))
+            assert tool.search("lumen") == expected
+            assert sum(len(worker.receive(-1)) for worker in workers) == 30
+            with ThreadPoolExecutor(6) as pool:
+                found = list(pool.map(lambda i: tool.search(f"lumen line {i}"), range(10, 30)))
+            assert [[r["file"] for r in hits] for hits in found] == [[f"lore/doc_{i}.md"] for i in range(10, 30)]
+            print("✅ PASS: Concurrent searches share the workers and get their own replies")
+
+            snapshot = root.snapshot()
+            assert len(snapshot.paths) == 31 and snapshot.paths == sorted(snapshot.paths)
+            assert tool.read_file("lore/doc_07.md").startswith("---\nstatus: draft")
+            assert tool.list_files(sizes=True)[0]["tokens"] is not None
+            print("✅ PASS: Other tools read every shard through one combined snapshot")
+
+            target = "lore/doc_04.md"
+            owner = shard_of(target, 3)
+            before = root.index.worker_status()
+            assert [s["builds"] for s in before] == [1, 1, 1]
+            generation = snapshot.generation
+            _write(os.path.join(ai_context, target), "# Doc 4\nLumen moved\n")
+            root.watcher.poll()
+            _wait(lambda: root.snapshot() is not None and root.snapshot().generation > generation, "no rebuild")
+            after = root.index.worker_status()
+            assert [s["builds"] for s in after] == [2 if i == owner else 1 for i in range(3)]
+            assert [r for r in tool.search("lumen") if r["file"] == target] == [
+                {"file": target, "line": 2, "snippet": "Lumen moved"}
+            ]
+            print("✅ PASS: A change rebuilds only the shard that owns the file")
+
+            # Another process holds the owning shard's build lock: that shard
+            # stays stale, yet search answers from its files on disk.
+            lock = os.path.join(shard_dir(index_dir, owner, 3), LOCK_NAME)
+            _write(lock, "12345")
+            _write(os.path.join(ai_context, target), "# Doc 4\nLumen mid-rebuild\n")
+            root.watcher.poll()
+            _wait(lambda: root.index.status()["stale"] == [owner], "owning shard not stale")
+            assert root.snapshot() is None
+            hits = tool.search("lumen")
+            assert {"file": target, "line": 2, "snippet": "Lumen mid-rebuild"} in hits
+            assert len(hits) == 59
+            print("✅ PASS: Queries keep working while one shard waits for its rebuild")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                for r in sys.modules["tool"].get_roots():
+                    r.stop()
+            sys.modules.pop("tool", None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Shard Tests")
+    print("=" * 60)
+
+    test_partition()
+    test_sharded_search()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
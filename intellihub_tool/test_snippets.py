@@ -0,0 +1,134 @@
+"""
+Test context-window snippets and match highlighting for IntelliHub MCP tool.
+"""
+import builtins
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from snippets import line_starts, search_text
+
+LORE = "# Lore\n\nThe Lumen rises.\nplain\nplain\nplain\nplain\nLumen again, lumen twice.\nend\nLUMEN last\n"
+
+
+def _legacy(path, text, query):
+    """search() results as they were computed before stored line offsets."""
+    return [
+        {"file": path, "line": i, "snippet": line.strip()}
+        for i, line in enumerate(io.StringIO(text).readlines(), start=1)
+        if query in line.lower()
+    ]
+
+
+def test_line_offsets():
+    """Test that offsets and matches agree with readlines() line numbering."""
+    print("\n=== Testing Line Offsets ===")
+
+    for text in ("", "a", "a\n", "a\n\nb", "a\r\nb\rc\x0cd e\n", "  x \n\ty\n"):
+        assert len(line_starts(text)) == len(io.StringIO(text).readlines()), repr(text)
+        for query in ("", "a", "x", " ", "b"):
+            assert search_text("f.md", text, query) == _legacy("f.md", text, query), (text, query)
+    assert search_text("f.md", "İstanbul lumen\n", "lumen") == _legacy("f.md", "İstanbul lumen\n", "lumen")
+    assert search_text("f.md", "a\nb\n", "a\nb") == []
+    assert [h["line"] for h in search_text("f.md", "a\x0cb\u2028c\nlumen\n", "lumen")] == [2]
+    print("✅ PASS: Same lines and snippets as a line-by-line scan")
+
+
+def test_context_windows():
+    """Test merged windows and highlight offsets."""
+    print("\n=== Testing Context Windows ===")
+
+    hits = search_text("lore.md", LORE, "lumen", highlight=True)
+    assert [h["line"] for h in hits] == [3, 8, 10]
+    assert hits[1]["snippet"] == "Lumen again, lumen twice." and hits[1]["highlights"] == [[0, 5], [13, 18]]
+    print("✅ PASS: Highlights point at each match in the snippet")
+
+    windows = search_text("lore.md", LORE, "lumen", context_lines=1, highlight=True)
+    assert [(w["start_line"], w["end_line"], w["matches"]) for w in windows] == [(2, 4, [3]), (7, 10, [8, 10])]
+    assert windows[1]["context"] == "plain\nLumen again, lumen twice.\nend\nLUMEN last"
+    assert windows[1]["line"] == 8 and windows[1]["snippet"] == "Lumen again, lumen twice."
+    context = windows[1]["context"]
+    assert [context[a:b] for a, b in windows[1]["highlights"]] == ["Lumen", "lumen", "LUMEN"]
+    print("✅ PASS: Windows that touch are merged into one result")
+
+    whole = search_text("lore.md", LORE, "lumen", context_lines=20)
+    assert len(whole) == 1 and whole[0]["context"] == LORE.rstrip("\n")
+    print("✅ PASS: Windows are clipped to the file")
+
+
+def test_search_from_index():
+    """Test that a started root serves context from the index without opening files."""
+    print("\n=== Testing Search From Index ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        os.makedirs(ai_context)
+        with open(os.path.join(ai_context, "lore_core.md"), "w", encoding="utf-8", newline="") as f:
+            f.write(LORE.replace("\n", "\r\n"))
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump({"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")}, f)
+            sys.modules.pop("tool", None)
+            import tool
+
+            passive = tool.search("lumen", context_lines=1, highlight=True)
+            root = tool.get_root()
+            root.start()
+            for _ in range(500):
+                if root.ready:
+                    break
+                time.sleep(0.01)
+            assert root.ready
+
+            snapshot = root.snapshot()
+            text = snapshot.read_text("lore_core.md")
+            assert list(snapshot.line_starts("lore_core.md")) == list(line_starts(text))
+            print("✅ PASS: Line offsets stored in the snapshot")
+
+            real_open = builtins.open
+
+            def no_disk(*args, **kwargs):
+                raise AssertionError(f"search() opened {args[0]}")
+
+            builtins.open = no_disk
+            try:
+                indexed = tool.search("lumen", context_lines=1, highlight=True)
+            finally:
+                builtins.open = real_open
+            assert indexed == passive and len(indexed) == 2
+            print("✅ PASS: Windows and highlights served without reading files")
+
+            try:
+                tool.search("lumen", context_lines=21)
+                assert False, "context_lines above the limit should be rejected"
+            except ValueError:
+                pass
+            print("✅ PASS: Out-of-range context_lines rejected")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                sys.modules["tool"].get_root().stop()
+            sys.modules.pop("tool", None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Snippet Tests")
+    print("=" * 60)
+
+    test_line_offsets()
+    test_context_windows()
+    test_search_from_index()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
@@ -0,0 +1,110 @@
+"""
+Test the prefix term dictionary and the suggest() tool for IntelliHub MCP tool.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from prefixes import PrefixIndex
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_prefix_index():
+    """Test prefix ranges, ranking and limits."""
+    print("\n=== Testing Prefix Index ===")
+
+    index = PrefixIndex({"mutagen": 4, "mutate": 1, "mutation": 4, "lumen": 9, "mu": 2})
+
+    assert index.suggest("muta") == [
+        {"term": "mutagen", "df": 4},
+        {"term": "mutation", "df": 4},
+        {"term": "mutate", "df": 1},
+    ]
+    print("✅ PASS: Matches ranked by document frequency, then alphabetically")
+
+    assert [s["term"] for s in index.suggest("MU", limit=2)] == ["mutagen", "mutation"]
+    assert index.suggest("mu", limit=5)[-1] == {"term": "mutate", "df": 1}
+    print("✅ PASS: Case-insensitive; memoized short prefixes honour limit")
+
+    assert index.suggest("zz") == []
+    assert len(index.suggest("")) == 5
+    print("✅ PASS: No match returns []; empty prefix ranks every term")
+
+
+def test_suggest_tool():
+    """Test suggest() through tool.py, including watcher-driven updates."""
+    print("\n=== Testing suggest() ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        _write(os.path.join(ai_context, "lore_core.md"), "# Mutagens\nMutagens and mutation.\n# Lumen\nMutagens glow.\n")
+        _write(os.path.join(ai_context, "schemas", "mutagen.md"), "# Mutation\nMutation rules.\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")},
+                    f,
+                )
+            sys.modules.pop("tool", None)
+            import tool
+
+            # df counts files, not sections: lore_core.md mentions mutagens twice
+            assert tool.suggest("mut") == [
+                {"term": "mutation", "df": 2},
+                {"term": "mutagens", "df": 1},
+            ]
+            print("✅ PASS: suggest() returns terms with file counts")
+
+            try:
+                tool.suggest("mut", limit=0)
+                assert False, "limit=0 should be rejected"
+            except ValueError:
+                print("✅ PASS: Out-of-range limit rejected")
+
+            root = tool.get_root()
+            root.start()
+            for _ in range(500):
+                if root.started:
+                    break
+                time.sleep(0.01)
+            tool.suggest("mut")
+
+            _write(os.path.join(ai_context, "forge.md"), "# Forge\nThe forge mutates mutagens.\n")
+            root.watcher.poll()
+            assert tool.suggest("muta") == [
+                {"term": "mutagens", "df": 2},
+                {"term": "mutation", "df": 2},
+                {"term": "mutates", "df": 1},
+            ]
+            print("✅ PASS: New files show up without a full rebuild")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                sys.modules["tool"].get_root().stop()
+            sys.modules.pop("tool", None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Suggest Tests")
+    print("=" * 60)
+
+    test_prefix_index()
+    test_suggest_tool()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
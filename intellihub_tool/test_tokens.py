@@ -0,0 +1,117 @@
+"""
+Test token estimates, sections and token-budgeted reads for IntelliHub MCP tool.
+"""
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from tokens import estimate_tokens, split_sections, truncate
+
+DOC = """Intro paragraph.
+
+# Overview
+
+First paragraph of the overview.
+
+Second paragraph of the overview, which is a little longer than the first one.
+
+## Details
+
+```
+# not a heading
+```
+
+# Appendix
+
+Closing words.
+"""
+
+
+def test_sections_and_truncation():
+    """Test section splitting and boundary-aware truncation."""
+    print("\n=== Testing Token Estimates ===")
+
+    assert estimate_tokens("the cat sat") == 3
+    assert estimate_tokens("architecture, 42") == 5
+    print("✅ PASS: Token estimate counts words, digits and punctuation")
+
+    sections = split_sections(DOC)
+    assert [s["heading"] for s in sections] == [None, "Overview", "Details", "Appendix"]
+    assert [s["level"] for s in sections] == [0, 1, 2, 1]
+    assert sum(s["tokens"] for s in sections) == estimate_tokens(DOC)
+    print("✅ PASS: Headings inside code fences are ignored")
+
+    assert truncate(DOC, 10_000) == DOC
+    budget = sections[0]["tokens"] + estimate_tokens("# Overview\n\nFirst paragraph of the overview.")
+    cut = truncate(DOC, budget, sections)
+    assert cut.startswith("Intro paragraph.\n\n# Overview\n\nFirst paragraph of the overview.\n\n[truncated")
+    print("✅ PASS: Truncation stops at a paragraph boundary with a note")
+
+    padded = "\n" * 10 + "# Title\n\npara 1 word word word word word\n\npara 2 word word word word word\n"
+    sections = split_sections(padded)
+    assert sections[0]["start"] == 10
+    cut = truncate(padded, estimate_tokens("# Title\n\npara 1 word word word word word\n"), sections)
+    assert cut.startswith("\n" * 10 + "# Title\n\npara 1 word word word word word\n\n[truncated")
+    print("✅ PASS: A blank preamble does not shift the cut")
+
+
+def test_budgeted_reads():
+    """Test max_tokens, get_section and list_files sizes through tool.py."""
+    print("\n=== Testing Budgeted Reads ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        os.makedirs(ai_context)
+        with open(os.path.join(ai_context, "architecture_overview.md"), "w") as f:
+            f.write(DOC)
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump({"ai_context_path": ai_context}, f)
+            sys.modules.pop("tool", None)
+            import tool
+
+            [entry] = tool.list_files(sizes=True)
+            assert entry == {
+                "path": "architecture_overview.md",
+                "bytes": len(DOC.encode("utf-8")),
+                "tokens": estimate_tokens(DOC),
+            }
+            print("✅ PASS: list_files reports bytes and tokens")
+
+            assert tool.read_file("architecture_overview.md", max_tokens=10_000) == DOC
+            short = tool.read_file("architecture_overview.md", max_tokens=5)
+            assert short.startswith("Intro paragraph.\n\n[truncated")
+            print("✅ PASS: read_file honours max_tokens")
+
+            overview = tool.get_section("architecture_overview.md", "overview")
+            assert overview.startswith("# Overview") and "## Details" in overview
+            assert "# Appendix" not in overview
+            try:
+                tool.get_section("architecture_overview.md", "Missing")
+                raise AssertionError("Unknown heading was accepted")
+            except ValueError as e:
+                assert "Appendix" in str(e)
+            print("✅ PASS: get_section returns a heading with its subsections")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            sys.modules.pop("tool", None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Token Budget Tests")
+    print("=" * 60)
+
+    test_sections_and_truncation()
+    test_budgeted_reads()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
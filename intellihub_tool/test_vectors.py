@@ -0,0 +1,109 @@
+"""
+Test the TF-IDF vector index and the similar() tool for IntelliHub MCP tool.
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from vectors import VectorIndex
+
+
+def _write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_vector_index():
+    """Test passage ranking and incremental updates."""
+    print("\n=== Testing Vector Index ===")
+
+    vectors = VectorIndex()
+    vectors.set_file(
+        "lore_core.md",
+        "# Lumen\nLumen energy flows through seed crystals.\n# Forge\nThe forge smelts mutagens.\n",
+    )
+    vectors.set_file("schemas/crystal.md", "# Crystals\nSeed crystals store lumen energy.\n")
+    vectors.set_file("weather.md", "# Weather\nRain and snow fall in the valley.\n")
+
+    results = vectors.similar("lumen energy crystals", top_k=3)
+    assert [(r["file"], r["heading"]) for r in results] == [
+        ("schemas/crystal.md", "Crystals"),
+        ("lore_core.md", "Lumen"),
+    ]
+    assert results[0]["score"] > results[1]["score"]
+    print("✅ PASS: Passages ranked by cosine similarity; unrelated ones omitted")
+
+    neighbours = vectors.similar(path="schemas/crystal.md")
+    assert neighbours[0]["file"] == "lore_core.md"
+    assert all(r["file"] != "schemas/crystal.md" for r in neighbours)
+    print("✅ PASS: File query excludes the file's own passages")
+
+    vectors.set_file("weather.md", "# Weather\nLumen storms follow the crystals.\n")
+    assert "weather.md" in [r["file"] for r in vectors.similar("lumen storms")]
+    vectors.remove_file("lore_core.md")
+    assert all(r["file"] != "lore_core.md" for r in vectors.similar("lumen"))
+    print("✅ PASS: Changed and removed files are reflected")
+
+
+def test_similar_tool():
+    """Test similar() through tool.py, including watcher-driven updates."""
+    print("\n=== Testing similar() ===")
+
+    config_path = Path(__file__).parent / "config" / "paths.json"
+    config_backup = config_path.read_text()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        ai_context = os.path.join(tmpdir, "ai_context")
+        _write(os.path.join(ai_context, "lore_core.md"), "# Lumen\nLumen crystals hum at dusk.\n")
+        _write(os.path.join(ai_context, "design_bible.md"), "# Tone\nKeep the palette muted.\n")
+
+        try:
+            with open(config_path, "w") as f:
+                json.dump(
+                    {"ai_context_path": ai_context, "index_path": os.path.join(tmpdir, "index")},
+                    f,
+                )
+            sys.modules.pop("tool", None)
+            import tool
+
+            assert tool.similar("humming crystals")[0]["file"] == "lore_core.md"
+            print("✅ PASS: similar() answers a free-text query")
+
+            root = tool.get_root()
+            root.start()
+            for _ in range(500):
+                if root.started:
+                    break
+                time.sleep(0.01)
+            vectors = root.vector_index()
+
+            _write(os.path.join(ai_context, "mutagen.md"), "# Mutagens\nCrystals mutate under lumen.\n")
+            root.watcher.poll()
+            updated = root.vector_index()
+            assert updated is not vectors and root.vector_index() is updated
+            assert len(updated) == len(vectors) + 1
+            assert [r["file"] for r in tool.similar("lore_core.md")] == ["mutagen.md"]
+            print("✅ PASS: Vectors updated incrementally; file paths work as queries")
+        finally:
+            with open(config_path, "w") as f:
+                f.write(config_backup)
+            if "tool" in sys.modules:
+                sys.modules["tool"].get_root().stop()
+            sys.modules.pop("tool", None)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("IntelliHub MCP Vector Index Tests")
+    print("=" * 60)
+
+    test_vector_index()
+    test_similar_tool()
+
+    print("\n" + "=" * 60)
+    print("Tests Complete")
+    print("=" * 60)
@@ -0,0 +1,113 @@
+"""
+Approximate token counts and section-aware truncation for Markdown files.
+
+The estimate needs no model vocabulary and no network: words count one token
+per eight characters (rounded up), every digit and punctuation mark counts
+one. That tracks common BPE tokenizers closely enough to plan reads against a
+context budget.
+"""
+import re
+
+_TOKEN = re.compile(r"[A-Za-z]+|\d|[^\sA-Za-z\d]")
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+
+WORD_CHARS_PER_TOKEN = 8
+_LONG_WORD = re.compile(r"[A-Za-z]{%d,}" % (WORD_CHARS_PER_TOKEN + 1))
+
+
+def estimate_tokens(text):
+    """Return the approximate number of tokens in text."""
+    # One token per match, plus the extra tokens of words longer than
+    # WORD_CHARS_PER_TOKEN (rare, so only those are looped over in Python).
+    count = len(_TOKEN.findall(text))
+    for word in _LONG_WORD.findall(text):
+        count += (len(word) - 1) // WORD_CHARS_PER_TOKEN
+    return count
+
+
+def split_sections(text):
+    """
+    Split Markdown text at ATX headings (outside fenced code blocks).
+
+    Returns:
+        List of {"heading", "level", "start", "tokens"} dicts in document
+        order. Text before the first heading, if any, is a section with
+        heading None and level 0. Each section runs from its start offset to
+        the next section's start.
+    """
+    starts = []
+    offset = 0
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if _FENCE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            match = _HEADING.match(line.rstrip("\n"))
+            if match:
+                starts.append((offset, match.group(2), len(match.group(1))))
+        offset += len(line)
+
+    if not starts or starts[0][0] > 0:
+        starts.insert(0, (0, None, 0))
+
+    sections = []
+    for i, (start, heading, level) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(text)
+        if heading is None and not text[start:end].strip():
+            continue
+        sections.append(
+            {
+                "heading": heading,
+                "level": level,
+                "start": start,
+                "tokens": estimate_tokens(text[start:end]),
+            }
+        )
+    return sections
+
+
+def truncate(text, max_tokens, sections=None):
+    """
+    Cut text to at most roughly max_tokens, at a section or paragraph boundary.
+
+    Whole sections are kept while they fit; the first section that does not
+    fit is cut after its last fitting paragraph. A note saying how much was
+    left out is appended whenever anything was cut.
+
+    Args:
+        text: Full text
+        max_tokens: Token budget
+        sections: Precomputed split_sections(text), if available
+
+    Returns:
+        The (possibly shortened) text
+    """
+    if sections is None:
+        sections = split_sections(text)
+    total = sum(s["tokens"] for s in sections)
+    if total <= max_tokens:
+        return text
+
+    used = 0
+    # split_sections() skips a blank preamble, so the first section may not
+    # start at 0; paragraphs below are counted from the section's start.
+    end = sections[0]["start"]
+    for i, section in enumerate(sections):
+        section_end = sections[i + 1]["start"] if i + 1 < len(sections) else len(text)
+        if used + section["tokens"] <= max_tokens:
+            used += section["tokens"]
+            end = section_end
+            continue
+        # Fill the rest of the budget paragraph by paragraph.
+        body = text[section["start"] : section_end]
+        for paragraph in re.split(r"(?<=\n)(?=\n)", body):
+            tokens = estimate_tokens(paragraph)
+            if used + tokens > max_tokens:
+                break
+            used += tokens
+            end += len(paragraph)
+        break
+
+    kept = text[:end].rstrip("\n")
+    return f"{kept}\n\n[truncated: ~{used} of ~{total} tokens shown; raise max_tokens or use get_section]\n"
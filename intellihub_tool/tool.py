@@ -1,79 +1,438 @@
+import base64
+import functools
 import os
+import re
 import json
+import stat
+import threading
+import time
 from pathlib import Path
 
+from cancellation import check_cancelled
+from metadata import normalize_filters
+from prefixes import MAX_SUGGESTIONS
+from roots import DEFAULT_MEMORY_BUDGET_MB, KnowledgeRoot, file_version, pinned
+from scheduling import parse_rate_limits
+from snippets import MAX_CONTEXT_LINES, search_text
+from tokens import estimate_tokens, split_sections, truncate
+
 # Load config relative to this file so CWD doesn't matter.
 BASE_DIR = Path(__file__).resolve().parent
 CONFIG_PATH = BASE_DIR / "config" / "paths.json"
 
-# Validate config file exists
-if not CONFIG_PATH.exists():
-    raise RuntimeError(
-        f"Configuration file not found: {CONFIG_PATH}\n"
-        f"Please create it with the following structure:\n"
-        f'{{"ai_context_path": "/path/to/your/ai_context"}}'
-    )
-
-# Load and validate config
-try:
-    with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-        CONFIG = json.load(f)
-except json.JSONDecodeError as e:
-    raise RuntimeError(f"Invalid JSON in configuration file {CONFIG_PATH}: {e}")
-except Exception as e:
-    raise RuntimeError(f"Error reading configuration file {CONFIG_PATH}: {e}")
-
-# Validate required key exists
-if "ai_context_path" not in CONFIG:
-    raise RuntimeError(
-        f"Missing required 'ai_context_path' key in {CONFIG_PATH}\n"
-        f"Configuration must include: {{'ai_context_path': '/path/to/your/ai_context'}}"
-    )
-
-AI_CONTEXT = CONFIG["ai_context_path"]
-
-# Validate ai_context path exists and is a directory
-if not os.path.exists(AI_CONTEXT):
-    raise RuntimeError(
-        f"The ai_context path specified in configuration does not exist: {AI_CONTEXT}\n"
-        f"Please update {CONFIG_PATH} with a valid path."
-    )
-
-if not os.path.isdir(AI_CONTEXT):
-    raise RuntimeError(
-        f"The ai_context path is not a directory: {AI_CONTEXT}\n"
-        f"Please update {CONFIG_PATH} with a valid directory path."
-    )
-
-
-def list_files():
-    """Return a list of all files in ai_context."""
-    file_list = []
-    for root, _, files in os.walk(AI_CONTEXT):
-        for f in files:
-            rel_path = os.path.relpath(os.path.join(root, f), AI_CONTEXT)
-            file_list.append(rel_path.replace("\\", "/"))
-    return file_list
+# Re-read config/paths.json at most this often when it changes on disk.
+CONFIG_RECHECK = 2.0
+
+ROOT_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+
+_config = None
+_config_mtime = None
+_config_checked = 0.0
+_config_lock = threading.RLock()
 
+# Root registry built from the config
+_roots = {}
+_default_root = None
+# Set by start_indexing(); roots added by a reload are started too
+_indexing = False
+# Callbacks notified as callback(added_roots, removed_roots) after a reload
+_root_listeners = []
 
-def read_file(path):
+# Last hot-reload failure, reported by diagnose(); the previous config stays active
+config_error = None
+
+
+def _read_config():
     """
-    Return the contents of a file relative to ai_context.
+    Read and validate config/paths.json.
 
-    Args:
-        path: Relative path to the file within ai_context
+    Returns:
+        (config dict, {root name: root settings}, default root name)
+
+    Raises:
+        RuntimeError: If the file is missing or invalid, or a root path
+            does not point to a directory
+    """
+    # Validate config file exists
+    if not CONFIG_PATH.exists():
+        raise RuntimeError(
+            f"Configuration file not found: {CONFIG_PATH}\n"
+            f"Please create it with the following structure:\n"
+            f'{{"ai_context_path": "/path/to/your/ai_context"}}'
+        )
+
+    # Load and validate config
+    try:
+        with open(CONFIG_PATH, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    except json.JSONDecodeError as e:
+        raise RuntimeError(f"Invalid JSON in configuration file {CONFIG_PATH}: {e}")
+    except Exception as e:
+        raise RuntimeError(f"Error reading configuration file {CONFIG_PATH}: {e}")
+
+    # Validate required key exists
+    if "ai_context_path" not in config and "roots" not in config:
+        raise RuntimeError(
+            f"Missing required 'ai_context_path' (or 'roots') key in {CONFIG_PATH}\n"
+            f"Configuration must include: {{'ai_context_path': '/path/to/your/ai_context'}}"
+        )
+
+    index_base = config.get("index_path") or str(BASE_DIR / ".index")
+    specs = {}
+    if "ai_context_path" in config:
+        specs["default"] = {"path": config["ai_context_path"]}
+    for name, spec in config.get("roots", {}).items():
+        if isinstance(spec, str):
+            spec = {"path": spec}
+        if not ROOT_NAME.match(name):
+            raise RuntimeError(
+                f"Invalid root name '{name}' in {CONFIG_PATH}: "
+                f"use letters, digits, '_' and '-' only"
+            )
+        if "path" not in spec:
+            raise RuntimeError(f"Root '{name}' in {CONFIG_PATH} is missing 'path'")
+        specs[name] = spec
+
+    for name, spec in specs.items():
+        spec.setdefault("index_path", os.path.join(index_base, name))
+        spec.setdefault("memory_budget_mb", config.get("memory_budget_mb", DEFAULT_MEMORY_BUDGET_MB))
+        spec.setdefault("shards", config.get("shards", 1))
+        ai_context = spec["path"]
+
+        shards = spec["shards"]
+        if isinstance(shards, bool) or not isinstance(shards, int) or shards < 1:
+            raise RuntimeError(
+                f"Invalid shards for root '{name}' in {CONFIG_PATH}: {shards!r} (use a whole number >= 1)"
+            )
+
+        # Validate ai_context path exists and is a directory
+        if not os.path.exists(ai_context):
+            raise RuntimeError(
+                f"The ai_context path specified in configuration does not exist: {ai_context}\n"
+                f"Please update {CONFIG_PATH} with a valid path."
+            )
+
+        if not os.path.isdir(ai_context):
+            raise RuntimeError(
+                f"The ai_context path is not a directory: {ai_context}\n"
+                f"Please update {CONFIG_PATH} with a valid directory path."
+            )
+
+    try:
+        parse_rate_limits(config.get("rate_limits"))
+    except ValueError as e:
+        raise RuntimeError(f"Invalid rate_limits in {CONFIG_PATH}: {e}")
+    if "access_log" in config:
+        # Imported here: logging.handlers is too slow to load for every CLI run.
+        from access_log import parse_access_log
+
+        try:
+            parse_access_log(config["access_log"])
+        except ValueError as e:
+            raise RuntimeError(f"Invalid access_log in {CONFIG_PATH}: {e}")
+    if "result_encoding" in config:
+        from encoding import parse_result_encoding
+
+        try:
+            parse_result_encoding(config["result_encoding"])
+        except ValueError as e:
+            raise RuntimeError(f"Invalid result_encoding in {CONFIG_PATH}: {e}")
+
+    pin_seconds = config.get("session_pin_seconds", 0)
+    if isinstance(pin_seconds, bool) or not isinstance(pin_seconds, (int, float)) or pin_seconds < 0:
+        raise RuntimeError(f"session_pin_seconds in {CONFIG_PATH} must be a number >= 0")
+
+    default = config.get("default_root") or next(iter(specs), None)
+    if default not in specs:
+        raise RuntimeError(f"default_root '{default}' is not a configured root in {CONFIG_PATH}")
+
+    return config, specs, default
+
+
+def _apply_config(config, specs, default):
+    """Swap in a new root set, reusing roots whose settings did not change."""
+    global _config, _roots, _default_root
+    roots = {}
+    for name, spec in specs.items():
+        existing = _roots.get(name)
+        settings = (spec["path"], spec["index_path"], spec["memory_budget_mb"], spec["shards"])
+        if existing is not None and existing.settings() == settings:
+            roots[name] = existing
+        else:
+            roots[name] = KnowledgeRoot(name, *settings)
+
+    added = [r for name, r in roots.items() if _roots.get(name) is not r]
+    removed = [r for name, r in _roots.items() if roots.get(name) is not r]
+
+    _config, _roots, _default_root = config, roots, default
+
+    for r in removed:
+        r.stop()
+    if _indexing:
+        for r in added:
+            r.start()
+    if added or removed:
+        for callback in list(_root_listeners):
+            callback(added, removed)
+
+
+def load_config():
+    """
+    Load and validate config/paths.json.
+
+    Validation runs on first use rather than at import, so importing this
+    module (e.g. from the stdio server before its handshake) stays cheap.
+    Later calls pick up edits to the file (see reload_config()).
 
     Returns:
-        File contents as string
+        The configuration dict
 
     Raises:
-        ValueError: If path attempts to escape ai_context directory
-        FileNotFoundError: If file doesn't exist
+        RuntimeError: If the file is missing or invalid, or ai_context_path
+            does not point to a directory
+    """
+    global _config_mtime, _config_checked, config_error
+    if _config is not None:
+        now = time.monotonic()
+        if now - _config_checked >= CONFIG_RECHECK:
+            _config_checked = now
+            try:
+                changed = CONFIG_PATH.stat().st_mtime_ns != _config_mtime
+            except OSError:
+                changed = False
+            if changed:
+                try:
+                    reload_config()
+                except RuntimeError as e:
+                    # Keep serving the last good config.
+                    config_error = str(e)
+        return _config
+
+    with _config_lock:
+        if _config is None:
+            reload_config()
+    return _config
+
+
+def reload_config():
+    """
+    Re-read config/paths.json and apply it without a restart.
+
+    Roots whose settings are unchanged keep their index and cache; new roots
+    are created (and started if indexing is on) and removed roots are stopped.
+
+    Raises:
+        RuntimeError: If the new config is invalid; the current one stays active
+    """
+    global _config_mtime, _config_checked, config_error
+    with _config_lock:
+        try:
+            mtime = CONFIG_PATH.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        config, specs, default = _read_config()
+        _apply_config(config, specs, default)
+        _config_mtime = mtime
+        _config_checked = time.monotonic()
+        config_error = None
+
+
+def add_root_listener(callback):
+    """Register callback(added_roots, removed_roots), called after a reload."""
+    _root_listeners.append(callback)
+
+
+def get_root(name=None):
+    """
+    Return a configured KnowledgeRoot.
+
+    Args:
+        name: Root name; None selects the default root
+
+    Raises:
+        ValueError: If no root has that name
+    """
+    load_config()
+    if name is None:
+        name = _default_root
+    root = _roots.get(name)
+    if root is None:
+        raise ValueError(f"Unknown root '{name}'. Available roots: {', '.join(sorted(_roots))}")
+    return root
+
+
+def get_roots():
+    """Return every configured KnowledgeRoot, the default root first."""
+    load_config()
+    roots = dict(_roots)
+    default = roots.pop(_default_root)
+    return [default] + [roots[name] for name in sorted(roots)]
+
+
+def list_roots():
+    """Return name, path and index/cache state of every configured root."""
+    return [
+        {
+            "name": r.name,
+            "default": r.name == _default_root,
+            "path": r.path,
+            "memory_budget_mb": r.memory_budget_mb,
+            "shards": r.shards,
+            "index": r.index.status() if r.index else None,
+            "cache": r.cache.stats(),
+            "prefetch": r.prefetcher.stats(),
+            "ready": r.ready,
+            "warmup": r.warmup_status(),
+            "pins": r.pins(),
+        }
+        for r in get_roots()
+    ]
+
+
+def start_indexing():
+    """Start the shared index and watcher of every root, now and after reloads."""
+    global _indexing
+    load_config()
+    _indexing = True
+    for r in list(_roots.values()):
+        r.start()
+
+
+def _ai_context():
+    return get_root().path
+
+
+def __getattr__(name):
+    # CONFIG, AI_CONTEXT and INDEX_DIR resolve lazily (PEP 562) so existing
+    # callers keep working without forcing validation at import time. The
+    # latter two refer to the default root.
+    if name == "CONFIG":
+        return load_config()
+    if name == "AI_CONTEXT":
+        return _ai_context()
+    if name == "INDEX_DIR":
+        # Where the shared memory-mapped index lives (see index.py).
+        return get_root().index_dir
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _isolated(func):
+    """
+    Run a tool on one view of every root it reads (see roots.pinned), so it
+    sees a single index generation however the corpus changes meanwhile.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with pinned():
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def _filtered_paths(knowledge_root, filters):
     """
+    Files whose front matter matches filters, or None when there are none.
+
+    Raises:
+        ValueError: If filters are malformed
+    """
+    if not filters:
+        return None
+    return knowledge_root.metadata().select(normalize_filters(filters))
+
+
+@_isolated
+def list_files(root=None, sizes=False, filters=None):
+    """
+    Return a list of all files in ai_context.
+
+    Args:
+        root: Knowledge root name (default root if omitted)
+        sizes: Return {"path", "bytes", "tokens"} dicts instead of paths, so
+            reads can be planned against a token budget. tokens is None for
+            files that are not UTF-8 text.
+        filters: Front-matter filters such as {"module": "mon_forge"}; only
+            Markdown files whose front matter matches every filter are listed
+
+    Raises:
+        ValueError: If filters are malformed
+    """
+    knowledge_root = get_root(root)
+    selected = _filtered_paths(knowledge_root, filters)
+    snapshot = knowledge_root.snapshot()
+    if snapshot is not None:
+        paths = snapshot.paths
+        if selected is not None:
+            paths = [path for path in paths if path in selected]
+        if not sizes:
+            return list(paths)
+        return [
+            {
+                "path": path,
+                "bytes": snapshot.entries[path]["size"],
+                "tokens": snapshot.entries[path].get("tokens"),
+            }
+            for path in paths
+        ]
+
+    if selected is not None:
+        file_list = sorted(selected)
+    else:
+        ai_context = knowledge_root.path
+        file_list = []
+        for root, _, files in os.walk(ai_context):
+            check_cancelled()
+            for f in files:
+                rel_path = os.path.relpath(os.path.join(root, f), ai_context)
+                file_list.append(rel_path.replace("\\", "/"))
+    if not sizes:
+        return file_list
+    entries = []
+    for path in file_list:
+        check_cancelled()
+        entries.append(_file_size(knowledge_root, path))
+    return entries
+
+
+def _file_size(knowledge_root, path):
+    """Size entry for list_files(sizes=True) when no index snapshot is current."""
+    full_path = os.path.join(knowledge_root.path, path)
+    entry = {"path": path, "bytes": None, "tokens": None}
+    try:
+        entry["bytes"] = os.path.getsize(full_path)
+        # Not read_file(): sizing a listing is not a read to learn from.
+        entry["tokens"] = estimate_tokens(_read_text(knowledge_root, path)[1])
+    except (OSError, ValueError):
+        pass
+    return entry
+
+
+def _resolve_path(knowledge_root, path):
+    """
+    Validate a path relative to a root and return (absolute path, relative path).
+
+    Raises:
+        ValueError: If path escapes the root or is not a regular file
+        FileNotFoundError: If nothing exists at path
+    """
+    # Once the root is watched, validated paths are remembered until the
+    # watcher reports any change. A hit still lstat()s the resolved path so a
+    # file swapped for a symlink in between is re-validated, not followed.
+    paths = knowledge_root.paths if knowledge_root.started else None
+    if paths is not None:
+        entry = paths.get(path)
+        if entry is not None:
+            try:
+                if stat.S_ISREG(os.lstat(entry[0]).st_mode):
+                    return entry
+            except OSError:
+                pass
+
     # Security: Prevent directory traversal attacks
     # Use realpath to resolve symlinks and normalize paths
-    full_path = os.path.realpath(os.path.join(AI_CONTEXT, path))
-    ai_context_abs = os.path.realpath(AI_CONTEXT)
+    ai_context_abs = knowledge_root.real_path
+    full_path = os.path.realpath(os.path.join(ai_context_abs, path))
 
     # Ensure the resolved path is within ai_context (with proper separator check)
     if not (
@@ -83,55 +442,395 @@ def read_file(path):
             f"Access denied: path '{path}' is outside ai_context directory"
         )
 
-    # Validate file exists and is a file
-    if not os.path.exists(full_path):
+    # Validate file exists and is a file (one stat instead of exists + isfile)
+    try:
+        mode = os.stat(full_path).st_mode
+    except OSError:
         raise FileNotFoundError(f"File not found: {path}")
 
-    if not os.path.isfile(full_path):
+    if not stat.S_ISREG(mode):
         raise ValueError(f"Not a file: {path}")
 
+    entry = (full_path, os.path.relpath(full_path, ai_context_abs).replace("\\", "/"))
+    if paths is not None:
+        paths.put(path, entry)
+    return entry
+
+
+def _read_text(knowledge_root, path):
+    """
+    Return (relative path, full text, served from cache) for a file, via the
+    caches when warm.
+    """
+    full_path, rel_path = _resolve_path(knowledge_root, path)
+    snapshot = knowledge_root.snapshot()
+    # Only text of the version this snapshot indexed
+    version = file_version(snapshot, rel_path)
+
     # Read with error handling
+    cache = knowledge_root.cache if knowledge_root.started else None
+    if cache is not None:
+        content = cache.get(rel_path, version)
+        if content is not None:
+            return rel_path, content, True
     try:
-        with open(full_path, "r", encoding="utf-8") as f:
-            return f.read()
+        content = None
+        if snapshot is not None:
+            content = snapshot.read_text(rel_path)
+        if content is None:
+            with open(full_path, "r", encoding="utf-8") as f:
+                st = os.fstat(f.fileno())
+                content = f.read()
+            # The version on disk: the same as the snapshot's if unchanged
+            version = (st.st_mtime_ns, st.st_size)
     except UnicodeDecodeError:
         raise ValueError(f"File is not valid UTF-8: {path}")
+    if cache is not None:
+        cache.put(rel_path, content, version)
+    return rel_path, content, False
 
 
-def search(query):
-    """Search all Markdown files for a query string."""
-    results = []
-    for root, _, files in os.walk(AI_CONTEXT):
+def _sections(knowledge_root, rel_path, text):
+    """Sections of text, from the index when it has them."""
+    snapshot = knowledge_root.snapshot()
+    stats = snapshot.stats(rel_path) if snapshot is not None else None
+    if stats is not None and "sections" in stats:
+        return stats["sections"]
+    return split_sections(text)
+
+
+@_isolated
+def read_file(path, root=None, max_tokens=None):
+    """
+    Return the contents of a file relative to ai_context.
+
+    Args:
+        path: Relative path to the file within ai_context
+        root: Knowledge root name (default root if omitted)
+        max_tokens: Approximate token budget; longer files are cut at a
+            section or paragraph boundary and end with a truncation note
+
+    Returns:
+        File contents as string
+
+    Raises:
+        ValueError: If path attempts to escape ai_context directory
+        FileNotFoundError: If file doesn't exist
+    """
+    knowledge_root = get_root(root)
+    rel_path, content, cached = _read_text(knowledge_root, path)
+    if knowledge_root.started:
+        # Warm the likely next reads in the background (see prefetch.py).
+        knowledge_root.prefetcher.on_read(
+            rel_path, cached, lambda next_path: _read_text(knowledge_root, next_path)
+        )
+    if max_tokens is None:
+        return content
+    return truncate(content, max_tokens, _sections(knowledge_root, rel_path, content))
+
+
+@_isolated
+def get_section(path, heading, root=None, max_tokens=None):
+    """
+    Return one section of a Markdown file: the heading line and everything up
+    to the next heading of the same or a higher level.
+
+    Args:
+        path: Relative path to the file within ai_context
+        heading: Heading text, matched case-insensitively
+        root: Knowledge root name (default root if omitted)
+        max_tokens: Approximate token budget, as for read_file()
+
+    Raises:
+        ValueError: If the file has no such heading (the message lists them)
+    """
+    knowledge_root = get_root(root)
+    rel_path, content, _ = _read_text(knowledge_root, path)
+    sections = _sections(knowledge_root, rel_path, content)
+
+    wanted = heading.strip().lstrip("#").strip().lower()
+    for i, section in enumerate(sections):
+        if section["heading"] is not None and section["heading"].lower() == wanted:
+            break
+    else:
+        headings = [s["heading"] for s in sections if s["heading"] is not None]
+        raise ValueError(
+            f"No section '{heading}' in {path}. Headings: {', '.join(headings) or 'none'}"
+        )
+
+    # Subsections belong to the section; the next sibling or parent ends it.
+    end = len(content)
+    for following in sections[i + 1 :]:
+        if following["level"] <= section["level"]:
+            end = following["start"]
+            break
+    subsections = [s for s in sections[i:] if s["start"] < end]
+    base = section["start"]
+    text = content[base:end]
+    if max_tokens is None:
+        return text
+    return truncate(text, max_tokens, [dict(s, start=s["start"] - base) for s in subsections])
+
+
+def _iter_markdown(knowledge_root, paths=None):
+    """
+    Yield (relative_path, text) for every Markdown file in ai_context, or
+    only for the given paths.
+    """
+    if paths is not None:
+        for path in sorted(paths):
+            check_cancelled()
+            try:
+                rel_path, text, _ = _read_text(knowledge_root, path)
+            except (ValueError, FileNotFoundError):
+                continue
+            yield rel_path, text
+        return
+
+    snapshot = knowledge_root.snapshot()
+    if snapshot is not None:
+        cache = knowledge_root.cache
+        for path in snapshot.paths:
+            if not path.endswith(".md"):
+                continue
+            check_cancelled()
+            # Decoded text already in the content cache saves a decode.
+            text = cache.peek(path, file_version(snapshot, path))
+            if text is None:
+                text = snapshot.read_text(path)
+            if text is not None:
+                yield path, text
+        return
+
+    ai_context = knowledge_root.path
+    for root, _, files in os.walk(ai_context):
         for f in files:
             if not f.endswith(".md"):
                 continue
-            rel_path = os.path.relpath(os.path.join(root, f), AI_CONTEXT)
+            check_cancelled()
+            rel_path = os.path.relpath(os.path.join(root, f), ai_context)
             with open(os.path.join(root, f), "r", encoding="utf-8") as file:
-                for i, line in enumerate(file.readlines(), start=1):
-                    if query.lower() in line.lower():
-                        results.append(
-                            {
-                                "file": rel_path.replace("\\", "/"),
-                                "line": i,
-                                "snippet": line.strip(),
-                            }
-                        )
+                yield rel_path.replace("\\", "/"), file.read()
+
+
+@_isolated
+def search(query, root=None, filters=None, context_lines=0, highlight=False):
+    """
+    Search all Markdown files for a query string.
+
+    Args:
+        query: Case-insensitive substring to look for
+        root: Knowledge root name (default root if omitted)
+        filters: Front-matter filters such as {"status": "canonical"}; only
+            matching files are read and searched
+        context_lines: Lines of context (0-20) on each side of a match. With
+            more than 0, matches in one file whose windows touch share a
+            single result, whose "context" holds the window
+        highlight: Add "highlights", the [start, end] offsets of each match
+            in the result's snippet (or context)
+
+    Match lines and windows come from the line offsets stored in the index
+    and the text already in memory, so no file is read twice. On a sharded
+    root (see shards.py) the query runs on every shard's worker process in
+    parallel and the results are merged in the same order.
+
+    Raises:
+        ValueError: If filters are malformed or context_lines is out of range
+        RuntimeError: If a shard worker fails
+    """
+    if not 0 <= context_lines <= MAX_CONTEXT_LINES:
+        raise ValueError(f"context_lines must be between 0 and {MAX_CONTEXT_LINES}")
+    knowledge_root = get_root(root)
+    selected = _filtered_paths(knowledge_root, filters)
+    query = query.lower()
+    if knowledge_root.sharded:
+        return knowledge_root.index.search(query, selected, context_lines, highlight)
+    # Stored line offsets; search_text() computes them for files the index lacks.
+    snapshot = knowledge_root.snapshot()
+    results = []
+    for rel_path, text in _iter_markdown(knowledge_root, selected):
+        starts = snapshot.line_starts(rel_path) if snapshot is not None else None
+        results.extend(search_text(rel_path, text, query, starts, context_lines, highlight))
     return results
 
 
-def get_schema(name):
-    """Return a schema file from schemas/."""
-    path = f"schemas/{name}_schema.md"
-    return read_file(path)
+# Most passages similar() returns
+MAX_SIMILAR = 50
+
+
+@_isolated
+def similar(query_or_path, top_k=5, root=None):
+    """
+    Find the passages most similar to a query or to a file (TF-IDF cosine).
+
+    Unlike search(), this matches on shared vocabulary rather than an exact
+    substring, so one call can stand in for several keyword searches.
+
+    Args:
+        query_or_path: Free text, or the relative path of a Markdown file to
+            find related passages for (the file's own passages are skipped)
+        top_k: Number of passages to return (1-50)
+        root: Knowledge root name (default root if omitted)
+
+    Returns:
+        List of {"file", "heading", "score", "snippet"} dicts, best first
+    """
+    if not 1 <= top_k <= MAX_SIMILAR:
+        raise ValueError(f"top_k must be between 1 and {MAX_SIMILAR}")
+    knowledge_root = get_root(root)
+    vectors = knowledge_root.vector_index()
+
+    if query_or_path.endswith(".md"):
+        try:
+            _, rel_path = _resolve_path(knowledge_root, query_or_path)
+        except (ValueError, FileNotFoundError):
+            pass
+        else:
+            return vectors.similar(path=rel_path, top_k=top_k)
+    return vectors.similar(query=query_or_path, top_k=top_k)
+
+
+@_isolated
+def suggest(prefix, limit=10, root=None):
+    """
+    Autocomplete a search term from the vocabulary of the Markdown files.
+
+    Args:
+        prefix: Start of the term (case-insensitive)
+        limit: Number of terms to return (1-100)
+        root: Knowledge root name (default root if omitted)
+
+    Returns:
+        List of {"term", "df"} dicts, where df is the number of files the
+        term appears in; most widely used terms first
+    """
+    if not 1 <= limit <= MAX_SUGGESTIONS:
+        raise ValueError(f"limit must be between 1 and {MAX_SUGGESTIONS}")
+    return get_root(root).vector_index().prefix_index().suggest(prefix.strip(), limit)
+
+
+# Link hops related() follows at most
+MAX_RELATED_DEPTH = 3
+
+
+@_isolated
+def related(path, depth=1, root=None):
+    """
+    Return the files linked to or from a file, up to depth link hops away.
+
+    Args:
+        path: Relative path to the file within ai_context
+        depth: Link hops to follow in either direction (1-3)
+        root: Knowledge root name (default root if omitted)
+
+    Returns:
+        List of {"path", "distance", "links_to", "linked_from"} dicts, nearest
+        first
+
+    Raises:
+        ValueError: If path escapes ai_context or depth is out of range
+        FileNotFoundError: If file doesn't exist
+    """
+    if not 1 <= depth <= MAX_RELATED_DEPTH:
+        raise ValueError(f"depth must be between 1 and {MAX_RELATED_DEPTH}")
+    knowledge_root = get_root(root)
+    _, rel_path = _resolve_path(knowledge_root, path)
+    return knowledge_root.link_graph().related(rel_path, depth)
 
 
-def get_module_purpose(name):
-    """Return a module purpose file from module_purposes/."""
-    path = f"module_purposes/{name}.md"
-    return read_file(path)
+# Largest bundle export_snapshot() returns inline (base64); bigger exports
+# are streamed from the server's GET /export route.
+EXPORT_INLINE_LIMIT = 16 * 1024 * 1024
 
 
-def diagnose():
+@_isolated
+def export_snapshot(root=None, since=None):
+    """
+    Return the whole capsule as a .tar.gz, or only what changed since a manifest.
+
+    Args:
+        root: Knowledge root name (default root if omitted)
+        since: manifest_hash from an earlier export; when it is still known
+            only changed and added files are included, otherwise the full
+            archive is returned
+
+    Returns:
+        Dict with "manifest_hash", "generation", "base" (since, when a delta
+        was made), "full", "files" (members included), "removed" (paths
+        deleted since the base), "bytes" and "archive" (base64). The archive
+        ends with .intellihub/manifest.json, and delta bundles also carry
+        .intellihub/delta.json.
+
+    Raises:
+        ValueError: If the bundle is larger than EXPORT_INLINE_LIMIT
+    """
+    info, chunks = get_root(root).exporter().open(since)
+    if info["bytes"] > EXPORT_INLINE_LIMIT:
+        chunks.close()
+        raise ValueError(
+            f"Export is {info['bytes']} bytes, over the {EXPORT_INLINE_LIMIT} byte inline limit; "
+            "download it from the server's GET /export route instead"
+        )
+    data = b"".join(chunks)
+    return dict(info, encoding="base64", archive=base64.b64encode(data).decode("ascii"))
+
+
+class NameNotFoundError(FileNotFoundError):
+    """A schema or module purpose name matched no file; carries ranked suggestions."""
+
+    def __init__(self, message, suggestions):
+        super().__init__(message)
+        self.suggestions = suggestions
+
+
+# A near-miss is served directly when its similarity reaches this score and
+# no other name ties with it; otherwise the caller gets suggestions.
+NAME_RESOLVE_SCORE = 0.6
+NAME_SUGGESTIONS = 5
+
+
+def _read_named(kind, directory, suffix, name, root):
+    """
+    Read directory/<name><suffix>, resolving near-miss names.
+
+    Raises:
+        NameNotFoundError: If no name is close enough; the message lists the
+            best candidates
+    """
+    try:
+        return read_file(f"{directory}/{name}{suffix}", root)
+    except FileNotFoundError:
+        pass
+
+    index = get_root(root).name_index(directory, suffix)
+    ranked = index.lookup(name, limit=NAME_SUGGESTIONS)
+    if ranked:
+        best, score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if score >= NAME_RESOLVE_SCORE and score > runner_up:
+            return read_file(f"{directory}/{best}{suffix}", root)
+
+    suggestions = [candidate for candidate, _ in ranked]
+    message = f"{kind} not found: {name}"
+    if suggestions:
+        message += f". Did you mean: {', '.join(suggestions)}?"
+    raise NameNotFoundError(message, suggestions)
+
+
+@_isolated
+def get_schema(name, root=None):
+    """Return a schema file from schemas/, resolving near-miss names."""
+    return _read_named("Schema", "schemas", "_schema.md", name, root)
+
+
+@_isolated
+def get_module_purpose(name, root=None):
+    """Return a module purpose file from module_purposes/, resolving near-miss names."""
+    return _read_named("Module purpose", "module_purposes", ".md", name, root)
+
+
+@_isolated
+def diagnose(root=None):
     """
     Perform a full health check of the ai_context knowledge capsule.
     Returns a structured diagnostic report describing:
@@ -143,7 +842,9 @@ def diagnose():
     - overall status
     """
 
+    knowledge_root = get_root(root)
     report = {
+        "root": knowledge_root.name,
         "path_valid": False,
         "file_inventory": {},
         "schemas": {},
@@ -156,10 +857,14 @@ def diagnose():
     # ------------------------------------------------------------
     # 1. PATH VALIDITY
     # ------------------------------------------------------------
-    if not os.path.isdir(AI_CONTEXT):
+    ai_context = knowledge_root.path
+    if config_error:
+        report["issues"].append(f"Config reload failed, previous config still active: {config_error}")
+
+    if not os.path.isdir(ai_context):
         report["path_valid"] = False
         report["status"] = "error"
-        report["issues"].append(f"ai_context path does not exist: {AI_CONTEXT}")
+        report["issues"].append(f"ai_context path does not exist: {ai_context}")
         return report
 
     report["path_valid"] = True
@@ -167,7 +872,7 @@ def diagnose():
     # ------------------------------------------------------------
     # 2. FILE INVENTORY
     # ------------------------------------------------------------
-    all_files = list_files()
+    all_files = list_files(root)
     md_files = [f for f in all_files if f.endswith(".md")]
 
     report["file_inventory"] = {
@@ -194,17 +899,18 @@ def diagnose():
     # ------------------------------------------------------------
     # 3. SCHEMA HEALTH
     # ------------------------------------------------------------
-    schemas_dir = os.path.join(AI_CONTEXT, "schemas")
+    schemas_dir = os.path.join(ai_context, "schemas")
     schema_files = []
     unreadable_schemas = []
 
     if os.path.isdir(schemas_dir):
         for f in os.listdir(schemas_dir):
+            check_cancelled()
             if f.endswith("_schema.md"):
                 schema_files.append(f)
                 try:
-                    # Test readability
-                    read_file(f"schemas/{f}")
+                    # Test readability (without counting it as a read; see prefetch.py)
+                    _read_text(knowledge_root, f"schemas/{f}")
                 except Exception as e:
                     unreadable_schemas.append(f)
                     report["issues"].append(f"Unreadable schema: {f} ({str(e)})")
@@ -221,17 +927,18 @@ def diagnose():
     # ------------------------------------------------------------
     # 4. MODULE PURPOSE HEALTH
     # ------------------------------------------------------------
-    module_purposes_dir = os.path.join(AI_CONTEXT, "module_purposes")
+    module_purposes_dir = os.path.join(ai_context, "module_purposes")
     module_files = []
     unreadable_modules = []
 
     if os.path.isdir(module_purposes_dir):
         for f in os.listdir(module_purposes_dir):
+            check_cancelled()
             if f.endswith(".md"):
                 module_files.append(f)
                 try:
-                    # Test readability
-                    read_file(f"module_purposes/{f}")
+                    # Test readability (without counting it as a read; see prefetch.py)
+                    _read_text(knowledge_root, f"module_purposes/{f}")
                 except Exception as e:
                     unreadable_modules.append(f)
                     report["issues"].append(
@@ -254,7 +961,7 @@ def diagnose():
     searchable = True
     try:
         # Test search with a common term
-        sample_results = search("the")[:5]  # Limit to 5 results
+        sample_results = search("the", root)[:5]  # Limit to 5 results
     except Exception as e:
         searchable = False
         report["issues"].append(f"Search functionality broken: {str(e)}")
@@ -265,7 +972,24 @@ def diagnose():
     }
 
     # ------------------------------------------------------------
-    # 6. OVERALL STATUS
+    # 6. LINK GRAPH HEALTH
+    # ------------------------------------------------------------
+    graph = knowledge_root.link_graph()
+    broken_links = graph.broken()
+    orphans = graph.orphans()
+
+    report["links"] = {
+        "files_with_links": len(graph.outgoing),
+        "edges": graph.edge_count(),
+        "broken": broken_links,
+        "orphans": orphans,
+    }
+
+    for link in broken_links:
+        report["issues"].append(f"Broken link in {link['source']}: {link['target']}")
+
+    # ------------------------------------------------------------
+    # 7. OVERALL STATUS
     # ------------------------------------------------------------
     if not report["issues"]:
         report["status"] = "healthy"
@@ -14,6 +14,8 @@ def format_diagnostic_report(report):
 
     # Path validity
     add("[Path]")
+    if "root" in report:
+        add(f"  Root: {report['root']}")
     add(f"  Valid: {report['path_valid']}")
     add("")
 
@@ -64,6 +66,21 @@ def format_diagnostic_report(report):
     add(f"  Sample results: {len(si['sample_results'])}")
     add("")
 
+    # Link graph
+    links = report.get("links")
+    if links is not None:
+        add("[Links]")
+        add(f"  Files with links: {links['files_with_links']}")
+        add(f"  Edges: {links['edges']}")
+        add(f"  Broken: {len(links['broken'])}")
+        if links["orphans"]:
+            add("  Orphans (not linked from any file):")
+            for f in links["orphans"]:
+                add(f"    - {f}")
+        else:
+            add("  Orphans: None")
+        add("")
+
     # Issues
     add("[Issues]")
     if report["issues"]:
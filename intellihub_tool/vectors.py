@@ -0,0 +1,240 @@
+"""
+TF-IDF vector index over Markdown passages, built with NumPy.
+
+Every section of every Markdown file (see tokens.split_sections) is one
+passage. Passages keep their raw term counts, so a changed file only
+re-tokenizes itself; document frequencies, weights and the per-term posting
+arrays are recompiled lazily, fully vectorized, on the next query.
+
+Scoring is cosine similarity between log-scaled, IDF-weighted vectors. A
+query touches only the postings of its own terms: their weights are gathered
+and summed per passage with one np.bincount call.
+"""
+import re
+import threading
+from collections import Counter
+
+import numpy as np
+
+from prefixes import PrefixIndex
+from tokens import split_sections
+
+_TERM = re.compile(r"[a-z0-9]+(?:['_-][a-z0-9]+)*")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be but by for from has have in into is it its of on or
+    that the their there these this to was were will with not no can all any
+    """.split()
+)
+
+SNIPPET_CHARS = 200
+
+
+def terms(text):
+    """Lowercased index terms of text (stopwords and 1-letter words dropped)."""
+    return [t for t in _TERM.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+class VectorIndex:
+    """
+    Passage vectors of one capsule with incremental per-file updates.
+
+    Versions are copy-on-write, like LinkGraph: copy() shares the passage
+    lists, which updates replace rather than modify, and a version handed to
+    readers is never changed again. Its lock only guards the postings and
+    prefix index compiled lazily on first query.
+    """
+
+    def __init__(self):
+        self.vocabulary = {}
+        # path -> list of passages: (heading, snippet, term ids, counts)
+        self._files = {}
+        self._compiled = None
+        self._prefixes = None
+        self._lock = threading.Lock()
+
+    def copy(self):
+        """Return a new version to apply changes to; this one stays as it is."""
+        vectors = VectorIndex()
+        vectors.vocabulary = dict(self.vocabulary)
+        vectors._files = dict(self._files)
+        # Still valid until the copy changes (set_file/remove_file reset them)
+        vectors._compiled = self._compiled
+        vectors._prefixes = self._prefixes
+        return vectors
+
+    def __len__(self):
+        return sum(len(passages) for passages in self._files.values())
+
+    # ---- Updates ----
+
+    def set_file(self, path, text):
+        """(Re)index the passages of one Markdown file."""
+        passages = []
+        sections = split_sections(text)
+        for i, section in enumerate(sections):
+            end = sections[i + 1]["start"] if i + 1 < len(sections) else len(text)
+            body = text[section["start"] : end]
+            counts = Counter(terms(body))
+            if not counts:
+                continue
+            vocabulary = self.vocabulary
+            ids = [vocabulary.setdefault(t, len(vocabulary)) for t in counts]
+            passages.append(
+                (
+                    section["heading"],
+                    " ".join(body[:SNIPPET_CHARS * 2].split())[:SNIPPET_CHARS],
+                    np.array(ids, dtype=np.int32),
+                    np.array(list(counts.values()), dtype=np.float32),
+                )
+            )
+        self._files[path] = passages
+        self._compiled = None
+
+    def remove_file(self, path):
+        if self._files.pop(path, None) is not None:
+            self._compiled = None
+
+    # ---- Queries ----
+
+    def similar(self, query=None, path=None, top_k=5):
+        """
+        Rank passages by cosine similarity to a text query or to a file.
+
+        Args:
+            query: Free text to match
+            path: Indexed file to find neighbours of (its own passages are
+                excluded); used instead of query when given
+            top_k: Number of passages to return
+
+        Returns:
+            List of {"file", "heading", "score", "snippet"} dicts, best first
+        """
+        compiled = self._compile()
+        if compiled is None:
+            return []
+        owners, headings, snippets, idf, postings, norms, _ = compiled
+        vocab_size = len(idf)
+
+        if path is not None:
+            passages = self._files.get(path, [])
+            if not passages:
+                return []
+            ids = np.concatenate([p[2] for p in passages])
+            counts = np.concatenate([p[3] for p in passages])
+            query_counts = np.bincount(ids, weights=counts, minlength=vocab_size)
+        else:
+            ids = [self.vocabulary[t] for t in terms(query or "") if t in self.vocabulary]
+            if not ids:
+                return []
+            query_counts = np.bincount(np.array(ids, dtype=np.int64), minlength=vocab_size)
+
+        query_counts = query_counts[:vocab_size]
+        q_terms = np.flatnonzero(query_counts)
+        q_weights = (1 + np.log(query_counts[q_terms])) * idf[q_terms]
+        q_norm = np.linalg.norm(q_weights)
+        if q_norm == 0:
+            return []
+
+        # Gather the postings of the query terms and sum per passage.
+        indptr, passage_ids, weights = postings
+        starts, ends = indptr[q_terms], indptr[q_terms + 1]
+        lengths = ends - starts
+        if not lengths.sum():
+            return []
+        take = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        scores = np.bincount(
+            passage_ids[take],
+            weights=weights[take] * np.repeat(q_weights, lengths),
+            minlength=len(owners),
+        )
+        scores /= norms * q_norm
+
+        if path is not None:
+            scores[owners == path] = 0.0
+        k = min(top_k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [
+            {
+                "file": str(owners[i]),
+                "heading": headings[i],
+                "score": round(float(scores[i]), 4),
+                "snippet": snippets[i],
+            }
+            for i in best
+            if scores[i] > 0
+        ]
+
+    def prefix_index(self):
+        """Return a PrefixIndex of every indexed term and the number of files using it."""
+        compiled = self._compile()
+        with self._lock:
+            if self._prefixes is not None and self._prefixes[0] is compiled:
+                return self._prefixes[1]
+        if compiled is None:
+            return PrefixIndex({})
+        file_df = compiled[6]
+        prefixes = PrefixIndex(
+            {term: int(file_df[i]) for term, i in self.vocabulary.items() if i < len(file_df) and file_df[i]}
+        )
+        with self._lock:
+            self._prefixes = (compiled, prefixes)
+        return prefixes
+
+    def _compile(self):
+        """Build (or reuse) the posting arrays for the current passages."""
+        with self._lock:
+            if self._compiled is not None:
+                return self._compiled
+            files = dict(self._files)
+            vocab_size = len(self.vocabulary)
+
+        owners, headings, snippets, ids, counts, passage_of = [], [], [], [], [], []
+        for path in sorted(files):
+            for heading, snippet, term_ids, term_counts in files[path]:
+                passage_of.append(np.full(len(term_ids), len(owners), dtype=np.int32))
+                owners.append(path)
+                headings.append(heading)
+                snippets.append(snippet)
+                ids.append(term_ids)
+                counts.append(term_counts)
+        if not owners:
+            return None
+
+        ids = np.concatenate(ids)
+        counts = np.concatenate(counts)
+        passage_of = np.concatenate(passage_of)
+
+        df = np.bincount(ids, minlength=vocab_size)
+        idf = np.log((1 + len(owners)) / (1 + df)).astype(np.float32) + 1
+        weights = (1 + np.log(counts)) * idf[ids]
+        norms = np.sqrt(np.bincount(passage_of, weights=weights**2, minlength=len(owners)))
+
+        # Number of files (not passages) each term appears in.
+        owner_ids = np.unique(np.array(owners, dtype=object), return_inverse=True)[1]
+        pairs = np.unique(owner_ids[passage_of].astype(np.int64) * vocab_size + ids)
+        file_df = np.bincount(pairs % vocab_size, minlength=vocab_size)
+
+        # Postings sorted by term: CSC layout over (term, passage).
+        order = np.argsort(ids, kind="stable")
+        indptr = np.zeros(vocab_size + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        compiled = (
+            np.array(owners, dtype=object),
+            headings,
+            snippets,
+            idf,
+            (indptr, passage_of[order], weights[order]),
+            norms,
+            file_df,
+        )
+        with self._lock:
+            # Keep it unless an update landed while compiling.
+            if self._files.keys() == files.keys() and all(
+                self._files[p] is files[p] for p in files
+            ):
+                self._compiled = compiled
+        return compiled
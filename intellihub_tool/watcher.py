@@ -0,0 +1,107 @@
+import os
+import threading
+
+
+class CorpusWatcher:
+    """
+    Poll an ai_context directory for file changes.
+
+    Each call to poll() compares a fresh (mtime, size) snapshot of every file
+    against the previous one. When anything differs the generation counter is
+    bumped and every registered listener is called with the change set.
+    """
+
+    def __init__(self, root, interval=1.0):
+        self.root = root
+        self.interval = interval
+        self.generation = 0
+        self._snapshot = None
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def scan(self):
+        """Return {relative_path: (mtime_ns, size)} for every file under root."""
+        snapshot = {}
+        for root, _, files in os.walk(self.root):
+            for f in files:
+                full_path = os.path.join(root, f)
+                try:
+                    st = os.stat(full_path)
+                except OSError:
+                    # File vanished between listing and stat.
+                    continue
+                rel_path = os.path.relpath(full_path, self.root).replace("\\", "/")
+                snapshot[rel_path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def files(self):
+        """Return the most recent scan, or None before the first poll."""
+        return self._snapshot
+
+    def add_listener(self, callback):
+        """Register callback(changes, generation), called after each change."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def poll(self):
+        """
+        Rescan once and notify listeners if anything changed.
+
+        The first call only records a baseline snapshot.
+
+        Returns:
+            Dict with "added", "modified" and "removed" path sets, or None if
+            nothing changed.
+        """
+        current = self.scan()
+        with self._lock:
+            previous = self._snapshot
+            self._snapshot = current
+            if previous is None:
+                return None
+
+            added = current.keys() - previous.keys()
+            removed = previous.keys() - current.keys()
+            modified = {
+                path
+                for path in current.keys() & previous.keys()
+                if current[path] != previous[path]
+            }
+            if not (added or removed or modified):
+                return None
+
+            self.generation += 1
+            generation = self.generation
+
+        changes = {"added": added, "modified": modified, "removed": removed}
+        for callback in list(self._listeners):
+            callback(changes, generation)
+        return changes
+
+    def start(self):
+        """Poll in a background daemon thread until stop() is called."""
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self.poll()
+            self._thread = threading.Thread(
+                target=self._run, name="intellihub-watcher", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()